@@ -0,0 +1,31 @@
+"""A text adventure game.
+
+The submodules are imported on first use, so importing the package costs
+nothing and ``adventuregame.rooms`` works without importing it first. The
+room classes and the map are loaded by world.load_tiles, and modules that
+are only needed by some commands, like argparse or multiprocessing, are
+imported by the functions that use them. Short-lived worker processes
+therefore only import what they run.
+"""
+
+
+_SUBMODULES = frozenset({
+    'actions', 'catalog', 'combat', 'enemies', 'game', 'instrument',
+    'inventory', 'items', 'mapfile', 'mapgen', 'melee', 'npc', 'output',
+    'paging', 'pathfinding', 'player', 'recording', 'rooms', 'savegame',
+    'scheduler', 'server', 'sharding', 'simulation', 'solver', 'vecenv',
+    'world'})
+
+
+def __getattr__(name):
+    """ Imports a submodule when it is first accessed as an attribute. """
+    if name in _SUBMODULES:
+        # Importing a submodule sets it as an attribute of the package.
+        __import__(__name__ + '.' + name)
+        return globals()[name]
+    raise AttributeError("module {!r} has no attribute {!r}"
+                         .format(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | _SUBMODULES)
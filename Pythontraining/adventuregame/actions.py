@@ -9,9 +9,11 @@ class Action:
         name (str): The name of the Action.
         hotkey (str): The used hotkey to do this action.
         kwargs: The additional arguments that are needed by some actions.
+        method_name (str): The name of the Player method.
     """
     def __init__(self, method, name, hotkey, **kwargs):
         self.method = method
+        self.method_name = method.__name__
         self.name = name
         self.hotkey = hotkey
         self.kwargs = kwargs
@@ -60,6 +62,13 @@ class Attack(Action):
                          enemy=enemy)
 
 
+class AutoBattle(Action):
+    """ Class that maps to the auto_battle method."""
+    def __init__(self, enemy):
+        super().__init__(method=Player.auto_battle, name="Auto-battle",
+                         hotkey="u", enemy=enemy)
+
+
 class Flee(Action):
     """ Class that maps to the flee method."""
     def __init__(self, tile):
@@ -76,5 +85,14 @@ class Buy(Action):
 
 class Sell(Action):
     """ Class that maps to the sell method."""
-    def __init__(self):
-        super().__init__(method=Player.sell, name="Sell", hotkey="t")
+    def __init__(self, trader):
+        super().__init__(method=Player.sell, name="Sell", hotkey="t",
+                         trader=trader)
+
+
+# Actions without arguments hold no state, so all rooms share one instance.
+MOVE_NORTH = MoveNorth()
+MOVE_SOUTH = MoveSouth()
+MOVE_EAST = MoveEast()
+MOVE_WEST = MoveWest()
+VIEW_INVENTORY = ViewInventory()
@@ -0,0 +1,232 @@
+"""Module that loads the content of the game from a table.
+
+The items, enemies and NPCs are the rows of resources/catalog.txt, a tab
+separated table next to the map files with a header row and the columns
+
+    class, base, name, hp, damage, value, healing, stock, description
+
+The table is read once, and every column is stored as a list or an array,
+so the id of an entity type is simply its row. The items, enemies and npc
+modules build a class for every row with one of their base classes, named
+after the class column. Dagger(), Ogre() and WeaponTrader() therefore work
+as before, and new content only needs a new row. The classes are built
+when those modules are imported, entity_class() imports them if needed.
+
+spawn_many() creates many entities of one type at once, for the rooms of
+big maps, without running the constructors of every single entity.
+"""
+
+
+import importlib
+import os
+from array import array
+
+
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            os.pardir, 'resources', 'catalog.txt')
+COLUMNS = ('class', 'base', 'name', 'hp', 'damage', 'value', 'healing',
+           'stock', 'description')
+
+# The catalog that has been loaded, see get().
+_catalog = None
+
+# The module that builds the classes of the rows of every base class.
+_BASE_MODULES = {'Weapon': 'adventuregame.items',
+                 'HealthPotion': 'adventuregame.items',
+                 'Enemy': 'adventuregame.enemies',
+                 'Trader': 'adventuregame.npc'}
+
+
+class CatalogFormatError(ValueError):
+    """ Raised when the catalog table can't be read. """
+
+
+class Catalog:
+    """ The stats of all entity types, stored column by column.
+
+    Attributes:
+        ids (dict): The id of every entity type by class name.
+        class_names (:obj:'list' of :obj:'str'): The class name by id.
+        bases (:obj:'list' of :obj:'str'): The name of the base class by id.
+        names (:obj:'list' of :obj:'str'): The name shown in the game.
+        hp (:obj:'array'): The Health Points enemies and NPCs start with.
+        damage (:obj:'array'): The damage of weapons and enemies.
+        value (:obj:'array'): The value of items.
+        healing (:obj:'array'): The Health Points potions restore.
+        stock (:obj:'list' of :obj:'tuple'): The ids of the items a trader
+            sells.
+        descriptions (:obj:'list' of :obj:'str'): The description by id.
+        classes (:obj:'list'): The class built for every id, None until the
+            module of its base class has been imported.
+    """
+    def __init__(self):
+        self.ids = {}
+        self.class_names = []
+        self.bases = []
+        self.names = []
+        self.hp = array('i')
+        self.damage = array('i')
+        self.value = array('i')
+        self.healing = array('i')
+        self.stock = []
+        self.descriptions = []
+        self.classes = []
+
+    def __len__(self):
+        return len(self.class_names)
+
+    def add(self, class_name, base, name, hp=0, damage=0, value=0, healing=0,
+            stock=(), description=''):
+        """ Adds an entity type and returns its id.
+
+        Args:
+            stock (:obj:'list' of :obj:'str'): The class names of the items
+                a trader sells. They have to be in the catalog already.
+
+        Raises:
+            CatalogFormatError: If the class name is already in the catalog,
+                or an item of the stock is not.
+        """
+        if class_name in self.ids:
+            raise CatalogFormatError("'{}' is in the catalog twice."
+                                     .format(class_name))
+        try:
+            stock_ids = tuple(self.ids[item_name] for item_name in stock)
+        except KeyError as error:
+            raise CatalogFormatError("'{}' sells the unknown item {}."
+                                     .format(class_name, error)) from None
+        type_id = self.ids[class_name] = len(self.class_names)
+        self.class_names.append(class_name)
+        self.bases.append(base)
+        self.names.append(name)
+        self.hp.append(hp)
+        self.damage.append(damage)
+        self.value.append(value)
+        self.healing.append(healing)
+        self.stock.append(stock_ids)
+        self.descriptions.append(description)
+        self.classes.append(None)
+        return type_id
+
+    def rows(self, base):
+        """ Returns the ids of all entity types with the base class name. """
+        return [i for i, name in enumerate(self.bases) if name == base]
+
+
+def read(path=CATALOG_PATH):
+    """ Reads a catalog table.
+
+    Args:
+        path (str): The tab separated table. Defaults to
+            resources/catalog.txt.
+
+    Returns:
+        catalog (:obj:'Catalog'): The catalog.
+
+    Raises:
+        CatalogFormatError: If the table has the wrong columns or a number
+            can't be read.
+    """
+    catalog = Catalog()
+    with open(path, 'r', encoding='utf-8') as f:
+        header = tuple(f.readline().rstrip('\n').split('\t'))
+        if header != COLUMNS:
+            raise CatalogFormatError("{} doesn't have the columns {}."
+                                     .format(path, ', '.join(COLUMNS)))
+        for number, line in enumerate(f, 2):
+            line = line.rstrip('\n')
+            if not line:
+                continue
+            cols = line.split('\t')
+            if len(cols) != len(COLUMNS):
+                raise CatalogFormatError("Line {} of {} has {} columns "
+                                         "instead of {}.".format(
+                                             number, path, len(cols),
+                                             len(COLUMNS)))
+            class_name, base, name, hp, damage, value, healing, stock, \
+                description = cols
+            try:
+                numbers = [int(hp), int(damage), int(value), int(healing)]
+            except ValueError:
+                raise CatalogFormatError("Line {} of {} has a stat that is "
+                                         "not a number.".format(number, path)
+                                         ) from None
+            catalog.add(class_name, base, name, *numbers,
+                        [s for s in stock.split(',') if s], description)
+    return catalog
+
+
+def get():
+    """ Returns the catalog, which is read from CATALOG_PATH on first use. """
+    global _catalog
+    if _catalog is None:
+        _catalog = read()
+    return _catalog
+
+
+def define_classes(namespace, *bases):
+    """ Builds a class for every row of the catalog with one of the bases.
+
+    The class gets the class name of the row and the stats the base class
+    lists in its _columns, a tuple of (attribute, column) pairs. The stock
+    column is turned into the classes of the items, see entity_class. The
+    classes are put into the namespace, the globals() of the module that
+    defines the bases.
+
+    Returns:
+        :obj:'list': The new classes.
+    """
+    catalog = get()
+    by_name = {base.__name__: base for base in bases}
+    defined = []
+    for type_id, base_name in enumerate(catalog.bases):
+        base = by_name.get(base_name)
+        if base is None:
+            continue
+        attributes = {'__slots__': (), '__module__': namespace['__name__'],
+                      '__doc__': " {} ".format(catalog.descriptions[type_id]),
+                      'catalog_id': type_id}
+        for attribute, column in base._columns:
+            if column == 'stock':
+                attributes[attribute] = tuple(
+                    entity_class(i) for i in catalog.stock[type_id])
+            elif column == 'description':
+                attributes[attribute] = catalog.descriptions[type_id]
+            elif column == 'name':
+                attributes[attribute] = catalog.names[type_id]
+            else:
+                attributes[attribute] = getattr(catalog, column)[type_id]
+        cls = type(catalog.class_names[type_id], (base,), attributes)
+        catalog.classes[type_id] = namespace[cls.__name__] = cls
+        defined.append(cls)
+    return defined
+
+
+def entity_class(type_id):
+    """ Returns the class of the entity type with the id.
+
+    The module of the base class is imported if it hasn't been yet, which
+    builds the classes of its rows.
+    """
+    cls = get().classes[type_id]
+    if cls is None:
+        module = _BASE_MODULES.get(_catalog.bases[type_id])
+        if module is not None:
+            importlib.import_module(module)
+            cls = _catalog.classes[type_id]
+    return cls
+
+
+def spawn(type_id):
+    """ Creates an entity of the type with the id. """
+    return entity_class(type_id)()
+
+
+def spawn_many(type_id, count):
+    """ Creates count entities of the type with the id.
+
+    Returns:
+        :obj:'list': The entities, created by the spawn_many classmethod of
+            the entity type.
+    """
+    return entity_class(type_id).spawn_many(count)
@@ -0,0 +1,97 @@
+"""Module that resolves whole fights without playing them round by round.
+
+A fight in an EnemyRoom runs one exchange per turn: the enemy hits the
+player when the turn starts and then the player attacks with the best
+weapon. Both damages are constant, so the outcome follows from the Health
+Points alone. The enemy dies after ceil(enemy hp / weapon damage) attacks,
+and between two attacks the player takes one hit. The number of attacks is
+kept in a table per weapon type, enemy type and enemy Health Points, since
+the same fights are resolved over and over.
+
+resolve() is the simulation API and only computes the outcome, fight()
+applies it to a player and an enemy like the Attack actions would have.
+"""
+
+
+import collections
+
+
+Battle = collections.namedtuple('Battle',
+                                ['won', 'attacks', 'hp_lost', 'enemy_hp'])
+Battle.__doc__ = """ The outcome of a fight, from the player's next attack on.
+
+Attributes:
+    won (bool): True if the enemy dies before the player.
+    attacks (int): The number of attacks the player makes.
+    hp_lost (int): The Health Points the player loses, including the hit
+        that kills the player when the fight is lost.
+    enemy_hp (int): The Health Points the enemy has left at the end.
+"""
+
+# The number of attacks that kill an enemy, by the type of the weapon, the
+# type of the enemy and its Health Points.
+_attacks = {}
+
+
+def attacks_to_kill(weapon, enemy):
+    """ Returns the number of attacks the weapon needs to kill the enemy.
+
+    Args:
+        weapon (:obj:'Weapon'): The weapon the player attacks with.
+        enemy (:obj:'Enemy'): The enemy, with its current Health Points.
+    """
+    key = (type(weapon), type(enemy), enemy.hp)
+    attacks = _attacks.get(key)
+    if attacks is None:
+        attacks = _attacks[key] = max(0, -(-enemy.hp // weapon.damage))
+    return attacks
+
+
+def resolve(hp, weapon, enemy):
+    """ Computes the outcome of attacking the enemy until one side is dead.
+
+    The fight starts with the player's attack, the enemy's hit of the
+    current turn has already been taken. The result is the same as choosing
+    Attack in every turn of the fight.
+
+    Args:
+        hp (int): The Health Points the player has before the attack.
+        weapon (:obj:'Weapon'): The weapon the player attacks with.
+        enemy (:obj:'Enemy'): The enemy, with its current Health Points.
+
+    Returns:
+        battle (:obj:'Battle'): The outcome of the fight.
+    """
+    attacks = attacks_to_kill(weapon, enemy)
+    if enemy.damage > 0:
+        # The player survives one hit less than it takes to bring the
+        # Health Points to 0.
+        hits = -(-hp // enemy.damage)
+        if hits < attacks:
+            return Battle(False, hits, hits * enemy.damage,
+                          enemy.hp - hits * weapon.damage)
+    return Battle(True, attacks, max(0, attacks - 1) * enemy.damage,
+                  enemy.hp - attacks * weapon.damage)
+
+
+def fight(player, enemy):
+    """ Fights the enemy with the player's best weapon until one is dead.
+
+    The player and the enemy end up in the state the Attack actions would
+    have left them in. If the fight is lost, the hit that kills the player is
+    left to the room, which deals it when the next turn starts.
+
+    Returns:
+        battle (:obj:'Battle'): The outcome of the fight, None if the
+            player has no weapon.
+    """
+    weapon = player.inventory.best_weapon()
+    if weapon is None:
+        return None
+    battle = resolve(player.hp, weapon, enemy)
+    enemy.hp = battle.enemy_hp
+    if battle.won:
+        player.hp -= battle.hp_lost
+    else:
+        player.hp -= battle.hp_lost - enemy.damage
+    return battle
@@ -1,39 +1,49 @@
+"""Module with the enemies of the game.
+
+The enemy types are the rows of the catalog (see the catalog module) and
+their classes are built from it when this module is imported.
+"""
+
+
+from adventuregame import catalog
+
+
 class Enemy:
     """ The super class of all enemytypes in the game.
 
+    The name, the Health Points an enemy starts with and the damage are the
+    same for all enemies of a type and are stored on the class.
+
     Attributes:
         name (str): Name of the enemy.
+        max_hp (int): Health Points the enemy starts with.
         hp (int): Remaining Healt Points of the enemy.
         damage (int): Damage Value the enemy does to the player.
     """
-    def __init__(self, name, hp, damage):
-        self.name = name
-        self.hp = hp
-        self.damage = damage
+    __slots__ = ('hp',)
+    name = ''
+    max_hp = 0
+    damage = 0
+    _columns = (('name', 'name'), ('max_hp', 'hp'), ('damage', 'damage'))
+
+    def __init__(self, hp=None):
+        self.hp = self.max_hp if hp is None else hp
+
+    @classmethod
+    def spawn_many(cls, count):
+        """ Returns count new enemies of this type with full Health Points.
+
+        The enemies are created without calling __init__, which takes most
+        of the time when thousands of enemies are created.
+        """
+        enemies = [object.__new__(cls) for _ in range(count)]
+        hp = cls.max_hp
+        for enemy in enemies:
+            enemy.hp = hp
+        return enemies
 
     def is_alive(self):
         return self.hp > 0
 
 
-class Ogre(Enemy):
-    """ Enemy of the Type Ogre. """
-    def __init__(self):
-        super().__init__(name="Ogre",
-                         hp=50,
-                         damage=20)
-
-
-class Zombie(Enemy):
-    """ Enemy of the Type Zombie. """
-    def __init__(self):
-        super().__init__(name="Zombie",
-                         hp=15,
-                         damage=5)
-
-
-class Wolf(Enemy):
-    """ Enemy of the Type Wolf."""
-    def __init__(self):
-        super().__init__(name="Wolf",
-                         hp=20,
-                         damage=10)
+catalog.define_classes(globals(), Enemy)
@@ -1,4 +1,4 @@
-from adventuregame import world
+from adventuregame import scheduler, world
 from adventuregame.player import Player
 
 
@@ -6,42 +6,59 @@ def play():
     """ The main function in which the game is looped.
 
     The game is looped as long as the player is still alive and did not
-    achieve victory.
+    achieve victory. The world ticks once per turn, so killed enemies come
+    back and looted items can be found again.
     """
     world.load_tiles()
-    player = Player()
+    world.scheduler = scheduler.TimingWheel()
+    run(Player())
 
+
+def run(player):
+    """ Loops the game of a player until the player has died or won.
+
+    The player's world, output sink and read function decide where the game
+    is played, so the same loop runs the terminal game and the replays of
+    recorded games.
+    """
     # These lines load the starting room and display the text
-    room = world.tile_exists(player.location_x, player.location_y)
-    print(room.entry_text())
+    room = player.world.tile_exists(player.location_x, player.location_y)
+    player.out.write(room.entry_text())
     while player.is_alive() and not player.victory:
-        room = world.tile_exists(player.location_x, player.location_y)
+        player.world.tick()
+        room = player.world.tile_exists(player.location_x, player.location_y)
         room.modify_player(player)
 
         # Check again since the room could have changed the player's state
         if player.is_alive() and not player.victory:
             make_action(player, room)
+    player.out.flush()
+
+
+def print_menu(room, out):
+    """ Writes the available actions of the room to the output sink. """
+    out.write("Choose an action:\n")
+    for action in room.available_actions():
+        out.write("{}", action)
 
 
 def make_action(player, room):
-    """ User input is taken to do the action the user chose. """
-    print("Choose an action:\n")
-    available_actions = room.available_actions()
-    for action in available_actions:
-        print(action)
+    """ User input is taken to do the action the user chose.
+
+    The output of the turn is written to the terminal at once, right before
+    the input is taken.
+    """
+    print_menu(room, player.out)
 
     # Validation loop that takes the input and checks if there's a matching
     # action. If not it asks again.
-    action_validator = False
-    while not action_validator:
-        action_input = input('Action: ')
-        for action in available_actions:
-            if action_input == action.hotkey:
-                player.do_action(action, **action.kwargs)
-                action_validator = True
-                break
-        else:
-            print("This is not a valid action.")
+    while True:
+        player.out.flush()
+        action = room.action_for_hotkey(player.read('Action: '))
+        if action is not None:
+            player.do_action(action, **action.kwargs)
+            break
+        player.out.write("This is not a valid action.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,215 @@
+"""Module that measures where the time of the turns goes.
+
+Instrumentation is off by default and then costs nothing: enable() replaces
+the hot methods of the game with timed wrappers and disable() puts the
+original methods back. While it is on, every call of
+
+* RoomTile.modify_player and RoomTile.available_actions, per room type,
+* Player.do_action, per action,
+* and every action method of the Player
+
+is counted and its latency is added to a histogram. snapshot() returns the
+counts and the p50/p99 latencies as a dict, dump() as a text table::
+
+    instrument.enable()
+    simulation.run_batch(runs=1000, processes=1)
+    print(instrument.dump())
+
+Switching instrumentation on or off counts up Player.methods_version, so
+the players drop the action methods they have cached and call the current
+ones from then on.
+"""
+
+
+import functools
+import time
+
+from adventuregame import rooms
+from adventuregame.player import Player
+
+
+# The Player methods the actions and the headless trades call.
+ACTION_METHODS = ('move_north', 'move_south', 'move_east', 'move_west',
+                  'print_inventory', 'attack', 'auto_battle', 'flee', 'buy',
+                  'sell', 'buy_item', 'sell_item')
+
+# The histograms by hook and name, and the replaced methods by class and
+# attribute name.
+_histograms = {}
+_originals = {}
+
+
+class Histogram:
+    """ Latency histogram with logarithmic buckets.
+
+    A bucket covers a quarter of a power of two of nanoseconds, so the
+    percentiles are exact to about 20%, with a few dozen buckets for all
+    latencies from nanoseconds to minutes.
+
+    Attributes:
+        count (int): Number of recorded latencies.
+        total (int): Sum of the recorded latencies in nanoseconds.
+    """
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self._buckets = {}
+
+    def record(self, nanoseconds):
+        """ Adds a latency to the histogram. """
+        self.count += 1
+        self.total += nanoseconds
+        # The bucket is given by the number of bits and the two bits after
+        # the leading one. Latencies below 8 ns have a bucket of their own.
+        bits = nanoseconds.bit_length()
+        if bits > 3:
+            bucket = bits * 4 + (nanoseconds >> (bits - 3)) % 4
+        else:
+            bucket = nanoseconds
+        self._buckets[bucket] = self._buckets.get(bucket, 0) + 1
+
+    @staticmethod
+    def _upper_bound(bucket):
+        """ Returns the largest latency in a bucket. """
+        if bucket < 16:
+            return bucket
+        bits, sub = divmod(bucket, 4)
+        return ((4 + sub + 1) << (bits - 3)) - 1
+
+    def percentile(self, percent):
+        """ Returns the latency below which percent of the calls were.
+
+        Args:
+            percent (float): The percentile, for example 50 or 99.
+
+        Returns:
+            int: The upper bound of the bucket, in nanoseconds.
+        """
+        if not self.count:
+            return 0
+        rank = self.count * percent / 100
+        seen = 0
+        for bucket in sorted(self._buckets):
+            seen += self._buckets[bucket]
+            if seen >= rank:
+                return self._upper_bound(bucket)
+        return self._upper_bound(max(self._buckets))
+
+
+def _record(hook, name, nanoseconds):
+    histogram = _histograms.get((hook, name))
+    if histogram is None:
+        histogram = _histograms[(hook, name)] = Histogram()
+    histogram.record(nanoseconds)
+
+
+def _room_hook(function, hook):
+    """ Wraps a room method so its calls are measured per room type. """
+    @functools.wraps(function)
+    def timed(self, *args, **kwargs):
+        start = time.perf_counter_ns()
+        try:
+            return function(self, *args, **kwargs)
+        finally:
+            _record(hook, type(self).__name__,
+                    time.perf_counter_ns() - start)
+    return timed
+
+
+def _do_action_hook(function):
+    """ Wraps Player.do_action so its calls are measured per action. """
+    @functools.wraps(function)
+    def timed(self, action, **kwargs):
+        start = time.perf_counter_ns()
+        try:
+            return function(self, action, **kwargs)
+        finally:
+            _record('do_action', action.method_name,
+                    time.perf_counter_ns() - start)
+    return timed
+
+
+def _method_hook(function, name):
+    """ Wraps a Player action method. """
+    @functools.wraps(function)
+    def timed(self, *args, **kwargs):
+        start = time.perf_counter_ns()
+        try:
+            return function(self, *args, **kwargs)
+        finally:
+            _record('action', name, time.perf_counter_ns() - start)
+    return timed
+
+
+def _patch(cls, attribute, wrapper):
+    _originals[(cls, attribute)] = cls.__dict__[attribute]
+    setattr(cls, attribute, wrapper)
+
+
+def is_enabled():
+    return bool(_originals)
+
+
+def enable():
+    """ Replaces the hot methods with timed wrappers.
+
+    Room types that are defined after this call are not measured.
+    """
+    if is_enabled():
+        return
+    for cls in {rooms.RoomTile, *rooms._room_classes.values()}:
+        for hook in ('modify_player', 'available_actions'):
+            if hook in cls.__dict__:
+                _patch(cls, hook, _room_hook(cls.__dict__[hook], hook))
+    _patch(Player, 'do_action', _do_action_hook(Player.do_action))
+    for name in ACTION_METHODS:
+        _patch(Player, name, _method_hook(Player.__dict__[name], name))
+    Player.methods_version += 1
+
+
+def disable():
+    """ Puts the original methods back. The measurements are kept. """
+    if not is_enabled():
+        return
+    for (cls, attribute), original in _originals.items():
+        setattr(cls, attribute, original)
+    _originals.clear()
+    Player.methods_version += 1
+
+
+def reset():
+    """ Throws all measurements away. """
+    _histograms.clear()
+
+
+def snapshot():
+    """ Returns the measurements.
+
+    Returns:
+        dict: For every hook ('modify_player', 'available_actions',
+            'do_action' and 'action') a dict with the count, the total,
+            the p50 and the p99 latency in nanoseconds per room type or
+            action name.
+    """
+    result = {}
+    for (hook, name), histogram in sorted(_histograms.items()):
+        result.setdefault(hook, {})[name] = {
+            'count': histogram.count,
+            'total_ns': histogram.total,
+            'p50_ns': histogram.percentile(50),
+            'p99_ns': histogram.percentile(99),
+        }
+    return result
+
+
+def dump():
+    """ Returns the measurements as a text table. """
+    lines = ["{:<18} {:<18} {:>10} {:>10} {:>10} {:>12}".format(
+        'hook', 'name', 'count', 'p50 us', 'p99 us', 'total ms')]
+    for hook, names in snapshot().items():
+        for name, stats in names.items():
+            lines.append("{:<18} {:<18} {:>10} {:>10.2f} {:>10.2f} {:>12.2f}"
+                         .format(hook, name, stats['count'],
+                                 stats['p50_ns'] / 1e3, stats['p99_ns'] / 1e3,
+                                 stats['total_ns'] / 1e6))
+    return "\n".join(lines)
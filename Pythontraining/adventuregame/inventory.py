@@ -0,0 +1,100 @@
+"""Module for the inventory of the player.
+
+The inventory keeps the items in the order they were added, like a list, but
+also indexes them by name and keeps the weapons in a heap ordered by damage,
+so looking up an item, removing it and finding the best weapon don't need
+to go through all the items.
+"""
+
+
+import heapq
+import itertools
+
+from adventuregame import items
+
+
+class Inventory:
+    """ The items of a player, indexed by name and by weapon damage.
+
+    Attributes:
+        total_value (int): The summed up value of all items.
+    """
+    def __init__(self, initial_items=()):
+        self.total_value = 0
+        self._items = {}
+        self._by_name = {}
+        self._weapons = []
+        self._weapon_count = 0
+        self._counter = itertools.count()
+        for item in initial_items:
+            self.append(item)
+
+    def __iter__(self):
+        return iter(self._items.values())
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, item):
+        return self.find(item.name) is not None
+
+    def append(self, item):
+        """ Adds an item at the end of the inventory. """
+        key = next(self._counter)
+        self._items[key] = item
+        self._by_name.setdefault(item.name, {})[key] = None
+        self.total_value += item.value
+        if isinstance(item, items.Weapon):
+            heapq.heappush(self._weapons, (-item.damage, key))
+            self._weapon_count += 1
+
+    def _first_key(self, name):
+        """ Returns the key of the first item with the name, or None. """
+        keys = self._by_name.get(name)
+        return next(iter(keys)) if keys else None
+
+    def find(self, name):
+        """ Returns the first item with the given name, or None. """
+        key = self._first_key(name)
+        return None if key is None else self._items[key]
+
+    def count(self, name):
+        """ Returns how many items with the given name are in the inventory."""
+        return len(self._by_name.get(name, ()))
+
+    def remove(self, item):
+        """ Removes the first occurrence of the item.
+
+        Raises:
+            ValueError: If the item is not in the inventory.
+        """
+        keys = self._by_name.get(item.name, ())
+        for key in keys:
+            if self._items[key] == item:
+                break
+        else:
+            raise ValueError("The item is not in the inventory.")
+        del keys[key]
+        if not keys:
+            del self._by_name[item.name]
+        del self._items[key]
+        self.total_value -= item.value
+
+        # Removed weapons stay in the heap until they come to the top, or
+        # until they make up most of the heap.
+        if isinstance(item, items.Weapon):
+            self._weapon_count -= 1
+            if len(self._weapons) > 2 * self._weapon_count + 16:
+                self._weapons = [entry for entry in self._weapons
+                                 if entry[1] in self._items]
+                heapq.heapify(self._weapons)
+
+    def best_weapon(self):
+        """ Returns the weapon with the most damage, or None.
+
+        If several weapons do the same damage, the first one is returned.
+        """
+        weapons = self._weapons
+        while weapons and weapons[0][1] not in self._items:
+            heapq.heappop(weapons)
+        return self._items[weapons[0][1]] if weapons else None
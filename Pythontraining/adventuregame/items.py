@@ -1,3 +1,42 @@
+"""Module with all the items of the game.
+
+Items never change, so the static data of every item type (name,
+description, value, damage, healing) is stored on the class, and creating
+an item returns a shared prototype: Dagger() is Dagger() and Gold(5) is
+Gold(5) is Gold(amount=5). The instances hold nothing but the state given
+to the constructor.
+
+The weapons and potions are the rows of the catalog (see the catalog module)
+and their classes are built from it when this module is imported.
+"""
+
+
+from adventuregame import catalog
+
+
+# The prototypes of all items that have been created, by type and the
+# arguments of the constructor in the order of its parameters.
+_prototypes = {}
+# The prototype of every call of a constructor that has been made, so the
+# arguments of a call are only bound to the parameters once.
+_calls = {}
+
+
+def _prototype(cls, args, kwargs):
+    """ Returns the prototype for a call of the constructor of cls. """
+    init = cls.__init__
+    if init is not object.__init__:
+        import inspect
+        bound = inspect.signature(init).bind(None, *args, **kwargs)
+        bound.apply_defaults()
+        args = tuple(bound.arguments.values())[1:]
+    key = (cls, args)
+    item = _prototypes.get(key)
+    if item is None:
+        item = _prototypes[key] = object.__new__(cls)
+    return item
+
+
 class Item:
     """ Superclass of all items in the game.
 
@@ -6,15 +45,29 @@ class Item:
         description (str): Short description what the item is/does.
         value (int): Value the item has when buying or selling it.
     """
-    def __init__(self, name, description, value):
-        self.name = name
-        self.description = description
-        self.value = value
+    __slots__ = ()
+    name = ''
+    description = ''
+    value = 0
+    _columns = (('name', 'name'), ('description', 'description'),
+                ('value', 'value'))
+
+    def __new__(cls, *args, **kwargs):
+        key = (cls, args, tuple(sorted(kwargs.items())))
+        item = _calls.get(key)
+        if item is None:
+            item = _calls[key] = _prototype(cls, args, kwargs)
+        return item
 
     def __str__(self):
         return "{}\n=====\n{}\nValue: {}\n".format(self.name, self.description,
                                                    self.value)
 
+    @classmethod
+    def spawn_many(cls, count):
+        """ Returns count items of this type, which are all the prototype. """
+        return [cls()] * count
+
 
 class Gold(Item):
     """ Item that can be found to give the player more gold.
@@ -22,11 +75,16 @@ class Gold(Item):
     Attributes:
         amount (int): The amount of gold that is added on pick up.
     """
+    __slots__ = ('amount',)
+    name = "Gold"
+    description = "A shiny gold coin."
+
     def __init__(self, amount):
         self.amount = amount
-        super().__init__(name="Gold",
-                         description="A shiny gold coin.",
-                         value=self.amount)
+
+    @property
+    def value(self):
+        return self.amount
 
 
 class HealthPotion(Item):
@@ -35,27 +93,9 @@ class HealthPotion(Item):
     Attributes:
         healing (int): Amount of Health Points the potion heals.
     """
-    def __init__(self, name, description, value, healing):
-        self.healing = healing
-        super().__init__(name, description, value)
-
-
-class SmallHealthPotion(HealthPotion):
-    """ A Healthpotion that restores 30 Health Points. """
-    def __init__(self):
-        super().__init__(name="Small Health Potion",
-                         description="Restores 20 HP",
-                         value=20,
-                         healing=30)
-
-
-class LargeHealthPotion(HealthPotion):
-    """ A Healthpotion that restores 50 Health Points. """
-    def __init__(self):
-        super().__init__(name="Large Health Potion",
-                         description="Restores 50 HP",
-                         value=40,
-                         healing=50)
+    __slots__ = ()
+    healing = 0
+    _columns = Item._columns + (('healing', 'healing'),)
 
 
 class Weapon(Item):
@@ -65,9 +105,9 @@ class Weapon(Item):
         damage (int): The amount of damage the weapon does to the enemy's
             Health Points.
     """
-    def __init__(self, name, description, value, damage):
-        self.damage = damage
-        super().__init__(name, description, value)
+    __slots__ = ()
+    damage = 0
+    _columns = Item._columns + (('damage', 'damage'),)
 
     def __str__(self):
         return "{}\n=====\n{}\nValue: {}\nDamage: {}".format(self.name,
@@ -76,31 +116,4 @@ class Weapon(Item):
                                                              self.damage)
 
 
-class Stone(Weapon):
-    """ A Weapon that deals 5 damage. """
-    def __init__(self):
-        super().__init__(name="Stone",
-                         description="A small stone. You can use it. But well,"
-                                     " it doesn't really hurt.",
-                         value=0,
-                         damage=5)
-
-
-class Dagger(Weapon):
-    """ A Weapon that deals 10 damage. """
-    def __init__(self):
-        super().__init__(name="Dagger",
-                         description="A small dagger. It's not really a good"
-                                     " Weapon, but it's a start.",
-                         value=10,
-                         damage=10)
-
-
-class Sword(Weapon):
-    """ A Weapon that deals 25 damage. """
-    def __init__(self):
-        super().__init__(name="Sword",
-                         description="An ordinary Sword. Nice to have in an"
-                                     " unknown area.",
-                         value=20,
-                         damage=25)
+catalog.define_classes(globals(), HealthPotion, Weapon)
@@ -0,0 +1,381 @@
+"""Module that reads the map sources and the compiled binary map format.
+
+A map can be written as tab separated text (map.txt) or as a spreadsheet
+(map.xlsx). Parsing them cell by cell is slow for big maps, so they can be
+compiled into a binary file that is loaded through mmap without any
+parsing::
+
+    python -m adventuregame.mapfile resources/map.txt
+
+The compiled file consists of a header, a string table with the names of the
+room types and a grid of uint16 type ids (0 for empty cells, i + 1 for the
+i-th name), stored row by row. The room index of world.load_tiles follows:
+the number of rooms of every type, the uint32 room index of every cell, the
+uint32 cell of every room and the neighbour mask of every cell. All numbers
+are stored in little-endian byte order, so loading a compiled map only
+copies these arrays and builds the rooms, type by type, without looking at
+the cells one by one.
+"""
+
+
+import collections
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+
+MAGIC = b'AGMP'
+VERSION = 2
+COMPILED_EXTENSION = '.bin'
+
+# magic, version, number of names, width, height, size and modification time
+# of the source file the map was compiled from.
+_HEADER = struct.Struct('<4sHHIIQq')
+_NAME_LENGTH = struct.Struct('<H')
+_XLSX_NAMESPACE = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+
+MapData = collections.namedtuple('MapData',
+                                 ['names', 'width', 'height', 'cells',
+                                  'index'], defaults=(None,))
+MapData.__doc__ = """ A map as a table of room type names and a grid of ids.
+
+Attributes:
+    names (:obj:'list' of :obj:'str'): The names of the room types.
+    width (int): Number of columns of the map.
+    height (int): Number of rows of the map.
+    cells: Row-major uint16 type ids, 0 for empty cells and i + 1 for
+        names[i].
+    index (:obj:'RoomIndex'): The room index of a compiled map, None for
+        a map source. See index_rooms.
+"""
+
+RoomIndex = collections.namedtuple('RoomIndex',
+                                   ['counts', 'grid', 'rooms', 'neighbours'])
+RoomIndex.__doc__ = """ Where the rooms of a map are, numbered type by type.
+
+The rooms are numbered from 1, first the rooms of names[0] in row-major
+order, then the rooms of names[1] and so on.
+
+Attributes:
+    counts: The number of rooms of every room type.
+    grid: The room index of every cell, 0 for empty cells.
+    rooms: The cell of every room, the room with index i at rooms[i - 1].
+    neighbours: The EAST/WEST/NORTH/SOUTH bits of every cell (see the world
+        module).
+"""
+
+# Bits of the neighbour masks, the same as in the world module.
+_EAST, _WEST, _NORTH, _SOUTH = 1, 2, 4, 8
+
+
+class MapFormatError(ValueError):
+    """ Raised when a compiled map file can't be read. """
+
+
+def _to_map_data(rows, width):
+    """ Turns rows of tile names into a MapData object.
+
+    Args:
+        rows (:obj:'list' of :obj:'list'): The tile names of every row.
+        width (int): The number of columns. Missing cells are empty.
+
+    Returns:
+        data (:obj:'MapData'): The map.
+    """
+    ids = {'': 0}
+    names = []
+    cells = array('H', bytes(2 * width * len(rows)))
+    for y, cols in enumerate(rows):
+        for x in range(min(width, len(cols))):
+            tile_name = cols[x]
+            type_id = ids.get(tile_name)
+            if type_id is None:
+                names.append(tile_name)
+                type_id = ids[tile_name] = len(names)
+            cells[y * width + x] = type_id
+    return MapData(names, width, len(rows), cells)
+
+
+def read_text(path):
+    """ Reads a tab separated map file.
+
+    Args:
+        path (str): Path to the map file.
+
+    Returns:
+        data (:obj:'MapData'): The map.
+    """
+    with open(path, 'r') as f:
+        rows = [row.rstrip('\n').split('\t') for row in f]
+
+    # Same amount of Tabs expected on each line as on the first one.
+    return _to_map_data(rows, len(rows[0]))
+
+
+def _column_index(reference):
+    """ Returns the zero based column of a cell reference like 'AB12'. """
+    column = 0
+    for char in reference:
+        if not char.isalpha():
+            break
+        column = column * 26 + ord(char.upper()) - ord('A') + 1
+    return column - 1
+
+
+def read_xlsx(path):
+    """ Reads the first worksheet of a map spreadsheet.
+
+    Args:
+        path (str): Path to the .xlsx file.
+
+    Returns:
+        data (:obj:'MapData'): The map.
+    """
+    # Only the spreadsheets need these modules, and they take longer to
+    # import than a small map takes to load.
+    import xml.etree.ElementTree as ElementTree
+    import zipfile
+
+    with zipfile.ZipFile(path) as workbook:
+        strings = []
+        if 'xl/sharedStrings.xml' in workbook.namelist():
+            shared = ElementTree.fromstring(
+                workbook.read('xl/sharedStrings.xml'))
+            for item in shared.iter(_XLSX_NAMESPACE + 'si'):
+                strings.append(''.join(t.text or '' for t in
+                                       item.iter(_XLSX_NAMESPACE + 't')))
+        sheet = ElementTree.fromstring(
+            workbook.read('xl/worksheets/sheet1.xml'))
+
+    cells = {}
+    for cell in sheet.iter(_XLSX_NAMESPACE + 'c'):
+        reference = cell.get('r')
+        row = int(''.join(c for c in reference if c.isdigit())) - 1
+        if cell.get('t') == 'inlineStr':
+            value = ''.join(t.text or '' for t in
+                            cell.iter(_XLSX_NAMESPACE + 't'))
+        else:
+            value = cell.findtext(_XLSX_NAMESPACE + 'v') or ''
+            if cell.get('t') == 's':
+                value = strings[int(value)]
+        cells[(_column_index(reference), row)] = value.strip()
+
+    width = max(x for x, y in cells) + 1 if cells else 0
+    height = max(y for x, y in cells) + 1 if cells else 0
+    rows = [[cells.get((x, y), '') for x in range(width)]
+            for y in range(height)]
+    return _to_map_data(rows, width)
+
+
+def neighbour_masks(grid, width, height):
+    """ Computes the neighbour mask of every cell of a grid.
+
+    Args:
+        grid: Row-major values, 0 for empty cells.
+        width (int): Number of cells in a row.
+        height (int): Number of rows.
+
+    Returns:
+        masks (bytearray): The EAST/WEST/NORTH/SOUTH bits of every cell.
+    """
+    masks = bytearray(len(grid))
+    for i in range(len(grid)):
+        if not grid[i]:
+            continue
+        x, y = i % width, i // width
+        mask = 0
+        if x + 1 < width and grid[i + 1]:
+            mask |= _EAST
+        if x > 0 and grid[i - 1]:
+            mask |= _WEST
+        if y > 0 and grid[i - width]:
+            mask |= _NORTH
+        if y + 1 < height and grid[i + width]:
+            mask |= _SOUTH
+        masks[i] = mask
+    return masks
+
+
+def index_rooms(data):
+    """ Numbers the rooms of a map type by type.
+
+    Args:
+        data (:obj:'MapData'): The map.
+
+    Returns:
+        index (:obj:'RoomIndex'): The room index, with arrays.
+    """
+    cells_by_type = [array('I') for _ in data.names]
+    for i, type_id in enumerate(data.cells):
+        if type_id:
+            cells_by_type[type_id - 1].append(i)
+
+    counts = array('I', [len(cells) for cells in cells_by_type])
+    rooms = array('I')
+    for cells in cells_by_type:
+        rooms.extend(cells)
+    grid = array('I', bytes(array('I').itemsize * len(data.cells)))
+    for index, i in enumerate(rooms, 1):
+        grid[i] = index
+    return RoomIndex(counts, grid, rooms,
+                     neighbour_masks(grid, data.width, data.height))
+
+
+def read_source(path):
+    """ Reads a map.txt or a map.xlsx file, depending on the extension. """
+    if path.lower().endswith('.xlsx'):
+        return read_xlsx(path)
+    return read_text(path)
+
+
+def compiled_path(source):
+    """ Returns the path of the compiled map that belongs to a source file. """
+    return os.path.splitext(source)[0] + COMPILED_EXTENSION
+
+
+def compile_map(source, target=None):
+    """ Compiles a map source file into the binary map format.
+
+    Args:
+        source (str): Path to the map.txt or map.xlsx file.
+        target (str): Path of the compiled file. Defaults to the source path
+            with the extension .bin.
+
+    Returns:
+        str: The path of the compiled file.
+    """
+    target = target or compiled_path(source)
+    data = read_source(source)
+    stat = os.stat(source)
+    index = index_rooms(data)
+    arrays = [index.counts, array('H', data.cells), index.grid, index.rooms]
+    if sys.byteorder != 'little':
+        for numbers in arrays:
+            numbers.byteswap()
+
+    with open(target, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(data.names), data.width,
+                             data.height, stat.st_size, stat.st_mtime_ns))
+        for name in data.names:
+            encoded = name.encode('utf-8')
+            f.write(_NAME_LENGTH.pack(len(encoded)))
+            f.write(encoded)
+        # The arrays start at offsets that are a multiple of 4, so they can
+        # be cast to uint32.
+        f.write(bytes(-f.tell() % 4))
+        for numbers in arrays:
+            numbers.tofile(f)
+            f.write(bytes(-f.tell() % 4))
+        f.write(index.neighbours)
+    return target
+
+
+def _read_header(buffer):
+    """ Returns the unpacked header of a compiled map and checks it. """
+    if len(buffer) < _HEADER.size:
+        raise MapFormatError("The compiled map is too short.")
+    header = _HEADER.unpack_from(buffer, 0)
+    if header[0] != MAGIC or header[1] != VERSION:
+        raise MapFormatError("This is not a compiled map of version {}."
+                             .format(VERSION))
+    return header
+
+
+def is_fresh(compiled, source):
+    """ Checks if a compiled map exists and was compiled from the source.
+
+    Args:
+        compiled (str): Path to the compiled map.
+        source (str): Path to the source file. If it doesn't exist, any
+            compiled map is used.
+
+    Returns:
+        bool: False if the compiled map is missing or the source has been
+            changed since it was compiled.
+    """
+    try:
+        with open(compiled, 'rb') as f:
+            header = _read_header(f.read(_HEADER.size))
+    except (OSError, MapFormatError):
+        return False
+    try:
+        stat = os.stat(source)
+    except OSError:
+        return True
+    return header[5:] == (stat.st_size, stat.st_mtime_ns)
+
+
+def _view(buffer, offset, typecode, count):
+    """ Returns count numbers of the mapped file and the offset after them.
+
+    On little-endian machines the numbers are a view of the file, otherwise
+    a byteswapped copy.
+    """
+    size = array(typecode).itemsize
+    end = offset + size * count
+    if end > len(buffer):
+        raise MapFormatError("The compiled map is incomplete.")
+    if sys.byteorder == 'little':
+        numbers = memoryview(buffer)[offset:end].cast(typecode)
+    else:
+        numbers = array(typecode, buffer[offset:end])
+        numbers.byteswap()
+    return numbers, end + -end % 4
+
+
+def load_compiled(path):
+    """ Loads a compiled map through mmap.
+
+    The arrays are not copied, the cells and the room index of the returned
+    map are views of the mapped file.
+
+    Args:
+        path (str): Path to the compiled map.
+
+    Returns:
+        data (:obj:'MapData'): The map, with its room index.
+    """
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, count, width, height, size, mtime = _read_header(buffer)
+
+    names = []
+    offset = _HEADER.size
+    for _ in range(count):
+        length, = _NAME_LENGTH.unpack_from(buffer, offset)
+        offset += _NAME_LENGTH.size
+        names.append(buffer[offset:offset + length].decode('utf-8'))
+        offset += length
+    offset += -offset % 4
+
+    tiles = width * height
+    counts, offset = _view(buffer, offset, 'I', count)
+    cells, offset = _view(buffer, offset, 'H', tiles)
+    grid, offset = _view(buffer, offset, 'I', tiles)
+    rooms, offset = _view(buffer, offset, 'I', sum(counts))
+    neighbours, offset = _view(buffer, offset, 'B', tiles)
+    return MapData(names, width, height, cells,
+                   RoomIndex(counts, grid, rooms, neighbours))
+
+
+def main(argv=None):
+    """ The compile-map entry point. """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog='compile-map',
+        description="Compiles map.txt or map.xlsx into a binary map.")
+    parser.add_argument('source', nargs='?')
+    parser.add_argument('-o', '--output', default=None)
+    args = parser.parse_args(argv)
+
+    from adventuregame import world
+    source = args.source or world.MAP_PATH
+    print("Compiled {} to {}".format(source,
+                                     compile_map(source, args.output)))
+
+
+if __name__ == "__main__":
+    main()
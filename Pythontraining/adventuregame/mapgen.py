@@ -0,0 +1,82 @@
+"""Module that generates big random maps in the map.txt format.
+
+The map is written row by row, so maps with millions of tiles can be
+generated without keeping them in memory. Every even row is a corridor of
+rooms and every fourth column connects the corridors, the other cells hold
+a room by chance. Every room can therefore be reached from the start in the
+top left corner, and the exit is in the bottom left corner::
+
+    python -m adventuregame.mapgen big_map.txt --width 1000 --height 1000
+"""
+
+
+import itertools
+import random
+
+
+# The room types and how often they are chosen, relative to each other.
+ROOM_WEIGHTS = (('EmptyRoom', 50),
+                ('WolfRoom', 8),
+                ('ZombieRoom', 8),
+                ('OgreRoom', 3),
+                ('DaggerRoom', 4),
+                ('Find5GoldRoom', 8),
+                ('HealingRoom', 5),
+                ('WeaponRoom', 2),
+                ('ItemRoom', 2))
+
+
+def generate(path, width, height, seed=0, density=0.5):
+    """ Writes a random map to a file.
+
+    Args:
+        path (str): The map.txt file to write.
+        width (int): Number of columns.
+        height (int): Number of rows, at least 2.
+        seed (int): Seed of the random generator.
+        density (float): Chance that a cell off the corridors has a room.
+
+    Returns:
+        int: The number of rooms on the map.
+    """
+    if width < 1 or height < 2:
+        raise ValueError("A map needs at least 1 column and 2 rows.")
+    rng = random.Random(seed)
+    names = [name for name, weight in ROOM_WEIGHTS]
+    cum_weights = list(itertools.accumulate(w for name, w in ROOM_WEIGHTS))
+    rooms = 0
+    with open(path, 'w', newline='\n') as f:
+        for y in range(height):
+            row = rng.choices(names, cum_weights=cum_weights, k=width)
+            if y % 2:
+                for x in range(width):
+                    if x % 4 and rng.random() >= density:
+                        row[x] = ''
+            if y == 0:
+                row[0] = 'StartingRoom'
+            elif y == height - 1:
+                row[0] = 'CaveExit'
+            rooms += width - row.count('')
+            f.write('\t'.join(row))
+            f.write('\n')
+    return rooms
+
+
+def main(argv=None):
+    """ Command line entry point that writes a generated map. """
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path')
+    parser.add_argument('--width', type=int, default=100)
+    parser.add_argument('--height', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--density', type=float, default=0.5)
+    args = parser.parse_args(argv)
+    rooms = generate(args.path, args.width, args.height, args.seed,
+                     args.density)
+    print("Wrote {} rooms to {}".format(rooms, args.path))
+
+
+if __name__ == "__main__":
+    main()
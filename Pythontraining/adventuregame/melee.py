@@ -0,0 +1,209 @@
+"""Module for fights of several players against the enemy of one room.
+
+EnemyRoom.modify_player and Player.attack change the Health Points of the
+enemy and of one player as if the player was alone in the room. That is
+right on a WorldOverlay, but on the loaded world, which several threads
+can play at once, they would race on the Health Points of the enemy.
+
+Such a world fights through the Arena in world.arena instead::
+
+    world.arena = melee.Arena()
+
+A player that enters an EnemyRoom joins the Melee of the room in
+EnemyRoom.modify_player, and Player.attack only queues the attack. Every
+world.tick resolves each melee as one round: the queued attacks are dealt
+to the enemy at once, and if the enemy survives, its next hit is split
+between the players that attacked. Players that didn't attack have fled
+and left the room. A player takes its share of the hit in its next
+modify_player, so the rounds are in the same order as in a fight alone:
+the enemy hits a player that enters, and then in every turn the attack of
+the last turn lands before the enemy hits again. The world has to be
+ticked once between the turns of all its players.
+
+The Health Points of a player are only changed by the player's own thread,
+the rounds just compute the hits. Every melee has its own lock, which is
+held while attacks are queued, hits are taken and the round is resolved,
+so the fights of different rooms don't wait for each other, and the locks
+keep the rounds atomic on free-threaded builds of Python as well.
+"""
+
+
+import collections
+import threading
+
+
+Round = collections.namedtuple('Round',
+                               ['room', 'attacks', 'damage', 'enemy_hp',
+                                'hits'])
+Round.__doc__ = """ The outcome of one tick of a melee.
+
+Attributes:
+    room (:obj:'EnemyRoom'): The room of the melee.
+    attacks (int): The number of attacks the players made.
+    damage (int): The damage the attacks did to the enemy.
+    enemy_hp (int): The Health Points the enemy has left.
+    hits (:obj:'tuple' of :obj:'tuple'): The players that stay in the room
+        and the Health Points each of them loses in its next turn.
+"""
+
+
+class Melee:
+    """ The players in one EnemyRoom and their attacks of the current tick.
+
+    Attributes:
+        room (:obj:'EnemyRoom'): The room, whose enemy is fought.
+        players (:obj:'list' of :obj:'Player'): The players in the room, in
+            the order they joined.
+    """
+    def __init__(self, room):
+        self.room = room
+        self.players = []
+        self._attacks = []
+        # The share of the last hit of every player that hasn't taken it.
+        self._hits = {}
+        # The player who takes the first share of a hit that can't be split
+        # evenly, so the remainder goes round.
+        self._turn = 0
+        self._lock = threading.Lock()
+
+    def join(self, player):
+        """ Lets the player enter the room, or stay in it for another turn.
+
+        Should be called by the thread of the player, which owns the Health
+        Points of the player.
+
+        Returns:
+            int: The Health Points the player loses: the whole damage of a
+                living enemy for a player that enters, the share of the hit
+                of the last round for a player that stays.
+        """
+        with self._lock:
+            if player not in self.players:
+                self.players.append(player)
+                enemy = self.room.enemy
+                return enemy.damage if enemy.is_alive() else 0
+            return self._hits.pop(player, 0)
+
+    def leave(self, player):
+        """ Removes the player, the player's queued attacks and hit. """
+        with self._lock:
+            if player in self.players:
+                self.players.remove(player)
+                self._attacks = [attack for attack in self._attacks
+                                 if attack[0] is not player]
+                self._hits.pop(player, None)
+
+    def attack(self, player):
+        """ Queues an attack of the player with the best weapon.
+
+        Should be called by the thread of the player, which owns the
+        inventory.
+
+        Returns:
+            bool: False if the player has no weapon or is not in the room.
+        """
+        weapon = player.inventory.best_weapon()
+        if weapon is None:
+            return False
+        with self._lock:
+            if player not in self.players:
+                return False
+            self._attacks.append((player, weapon.damage))
+        return True
+
+    def resolve(self):
+        """ Resolves the queued attacks and the hit of the enemy.
+
+        The attacks are dealt first. The players that didn't attack leave
+        the room. An enemy that is still alive then hits the players that
+        stay, and its damage is split between them, so it loses nothing by
+        being fought by several players.
+
+        Returns:
+            battle_round (:obj:'Round'): The outcome of the tick.
+        """
+        with self._lock:
+            enemy = self.room.enemy
+            attacks, self._attacks = self._attacks, []
+            damage = 0
+            if enemy.is_alive():
+                damage = sum(hit for _, hit in attacks)
+                enemy.hp -= damage
+            attackers = {player for player, _ in attacks}
+            self.players = [player for player in self.players
+                            if player in attackers]
+            hits = ()
+            if enemy.is_alive() and self.players:
+                hits = self._split_hit(enemy.damage)
+            self._hits = dict(hits)
+            return Round(self.room, len(attacks), damage, enemy.hp, hits)
+
+    def _split_hit(self, damage):
+        """ Returns the share of the damage of every player in the room. """
+        count = len(self.players)
+        share, remainder = divmod(damage, count)
+        start = self._turn % count
+        self._turn = start + 1
+        return tuple(
+            (player, share + 1 if (index - start) % count < remainder
+             else share)
+            for index, player in enumerate(self.players))
+
+    def is_empty(self):
+        """ Returns True if no player is in the room. """
+        return not self.players
+
+
+class Arena:
+    """ The melees of the EnemyRooms of a shared world.
+
+    The melee of a room is created when the first player joins it, and
+    dropped in a tick in which no player is left in the room.
+    """
+    def __init__(self):
+        self._melees = {}
+        self._lock = threading.Lock()
+
+    def join(self, player, room):
+        """ Lets the player join the melee of the room, see Melee.join.
+
+        Returns:
+            int: The Health Points the player loses.
+        """
+        # The arena lock is held while the player joins, so a tick can't
+        # drop the melee in between.
+        with self._lock:
+            position = (room.x, room.y)
+            melee = self._melees.get(position)
+            if melee is None:
+                melee = self._melees[position] = Melee(room)
+            return melee.join(player)
+
+    def leave(self, player, room):
+        """ Takes the player out of the melee of the room, if there is one."""
+        melee = self._melees.get((room.x, room.y))
+        if melee is not None:
+            melee.leave(player)
+
+    def attack(self, player, room):
+        """ Queues an attack of the player in the melee of the room.
+
+        Returns:
+            bool: False if the player hasn't joined the room or has no
+                weapon.
+        """
+        melee = self._melees.get((room.x, room.y))
+        return melee is not None and melee.attack(player)
+
+    def tick(self):
+        """ Resolves a round of every melee that has players.
+
+        Returns:
+            :obj:'list' of :obj:'Round': The outcome of every melee.
+        """
+        with self._lock:
+            for position, melee in list(self._melees.items()):
+                if melee.is_empty():
+                    del self._melees[position]
+            melees = list(self._melees.values())
+        return [melee.resolve() for melee in melees]
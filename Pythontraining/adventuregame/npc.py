@@ -1,4 +1,33 @@
-from adventuregame import items
+"""Module with the NPCs of the game.
+
+The traders are the rows of the catalog (see the catalog module) and their
+classes are built from it when this module is imported.
+
+A trader is shared by all players of a world, since TraderRoom.copy returns
+the room itself. Buying and selling are orders that the trader fills under
+its own lock. Trades don't change the trader, so the lock only serialises
+the changes to the gold and inventory of the players that trade with it.
+Many orders can be filled in one call with Trader.fill_orders, which takes
+the lock once for the whole batch.
+"""
+
+
+import collections
+import threading
+
+from adventuregame import catalog
+
+
+Order = collections.namedtuple('Order', ['player', 'item_name', 'sell'],
+                               defaults=(False,))
+Order.__doc__ = """ A trade a player wants to make with a trader.
+
+Attributes:
+    player (:obj:'Player'): The player who trades.
+    item_name (str): The name of the item to buy or sell.
+    sell (bool): True if the player sells the item, False if the player
+        buys it.
+"""
 
 
 class Npc:
@@ -8,6 +37,8 @@ class Npc:
         name (str): The name of the NPC.
         hp (str): Health Points of the NPC.
     """
+    __slots__ = ('name', 'hp')
+
     def __init__(self, name, hp):
         self.name = name
         self.hp = hp
@@ -16,30 +47,97 @@ class Npc:
 class Trader(Npc):
     """ Superclass of trader NPCs in the game.
 
-    Attributes (:obj:'list' of :obj:'Item'
+    The traders of the catalog are created without arguments, with the name,
+    the Health Points and the stock of their row.
+
+    The items are indexed by name. The inventory is replaced as a whole, by
+    assigning a new list, and never changed in place, so a reader always
+    sees a complete inventory and index without taking the lock.
+
+    Attributes:
+        inventory (:obj:'list' of :obj:'Item'): The items the trader sells.
     """
-    def __init__(self, name, hp, inventory):
+    __slots__ = ('_inventory', '_by_name', '_lock')
+    trader_name = ''
+    max_hp = 0
+    stock = ()
+    _columns = (('trader_name', 'name'), ('max_hp', 'hp'), ('stock', 'stock'))
+
+    def __init__(self, name=None, hp=None, inventory=None):
+        if inventory is None:
+            inventory = [item_type() for item_type in self.stock]
+        self._lock = threading.Lock()
         self.inventory = inventory
-        super().__init__(name, hp)
+        super().__init__(self.trader_name if name is None else name,
+                         self.max_hp if hp is None else hp)
 
-    def print_inventory(self):
-        """ Prints the inventory of the trader. """
-        for item in self.inventory:
-            print(item, '\n')
+    @property
+    def inventory(self):
+        """ The items the trader sells. """
+        return self._inventory
+
+    @inventory.setter
+    def inventory(self, inventory):
+        # Like the old linear search, the last item with a name is sold.
+        by_name = {item.name: item for item in inventory}
+        with self._lock:
+            self._inventory, self._by_name = inventory, by_name
+
+    def find(self, item_name):
+        """ Returns the item with the given name, or None. """
+        return self._by_name.get(item_name)
+
+    def fill_orders(self, orders):
+        """ Fills the orders one after the other while holding the lock.
+
+        A player buys an item if the trader has it and the player has enough
+        gold, and sells an item of the own inventory for its value. The
+        traders buy everything and keep their inventory as it is, so the
+        lock only guards the players' side of the trades.
 
+        Args:
+            orders (:obj:'list' of :obj:'Order'): The orders.
 
-class WeaponTrader(Trader):
-    """ Trader that trades weapons."""
-    def __init__(self):
-        super().__init__(name="Trader Jill",
-                         hp=15,
-                         inventory=[items.Sword(), items.Dagger()])
+        Returns:
+            :obj:'list' of :obj:'Item': The item that was traded for every
+                order, None if the order couldn't be filled.
+        """
+        traded = []
+        with self._lock:
+            by_name = self._by_name
+            for player, item_name, sell in orders:
+                if sell:
+                    item = player.inventory.find(item_name)
+                    if item is not None:
+                        player.inventory.remove(item)
+                        player.gold += item.value
+                else:
+                    item = by_name.get(item_name)
+                    if item is not None and item.value <= player.gold:
+                        player.inventory.append(item)
+                        player.gold -= item.value
+                    else:
+                        item = None
+                traded.append(item)
+        return traded
+
+    def fill_order(self, player, item_name, sell=False):
+        """ Fills a single order, see fill_orders.
+
+        Returns:
+            item (:obj:'Item'): The item that was traded, or None.
+        """
+        return self.fill_orders([Order(player, item_name, sell)])[0]
+
+    @classmethod
+    def spawn_many(cls, count):
+        """ Returns count new traders of this type. """
+        return [cls() for _ in range(count)]
+
+    def print_inventory(self, out):
+        """ Writes the inventory of the trader to the output sink out. """
+        for item in self.inventory:
+            out.write("{}\n", item)
 
 
-class ItemTrader(Trader):
-    """ Trader that trades Health Potions."""
-    def __init__(self):
-        super().__init__(name="Trader Marc",
-                         hp=20,
-                         inventory=[items.SmallHealthPotion(),
-                                    items.LargeHealthPotion()])
+catalog.define_classes(globals(), Trader)
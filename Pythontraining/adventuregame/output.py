@@ -0,0 +1,68 @@
+"""Module with the sinks all the output of the game is written to.
+
+The game never prints directly. Every line is written to the sink of the
+player, as a format string and its arguments, so a sink that throws the
+output away doesn't even have to format it:
+
+* TerminalSink collects the lines of a turn and writes them to stdout at
+  once when it is flushed.
+* NullSink drops everything, for headless games.
+* BufferSink collects the encoded lines of a network session until they are
+  sent.
+"""
+
+
+import sys
+
+
+class Sink:
+    """ Superclass of all output sinks. """
+    def write(self, text, *args):
+        """ Writes a line.
+
+        Args:
+            text (str): The line, or a format string if args are given.
+            *args: The values that are formatted into the line.
+        """
+        raise NotImplementedError()
+
+    def flush(self):
+        """ Passes on the written lines, if the sink holds them back. """
+
+
+class TerminalSink(Sink):
+    """ Sink that buffers the lines until it is flushed to stdout. """
+    def __init__(self):
+        self._lines = []
+
+    def write(self, text, *args):
+        self._lines.append(text.format(*args) if args else text)
+
+    def flush(self):
+        if self._lines:
+            self._lines.append('')
+            sys.stdout.write('\n'.join(self._lines))
+            sys.stdout.flush()
+            self._lines.clear()
+
+
+class NullSink(Sink):
+    """ Sink that throws all lines away without formatting them. """
+    def write(self, text, *args):
+        pass
+
+
+class BufferSink(Sink):
+    """ Sink that collects the UTF-8 encoded lines of a session. """
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def write(self, text, *args):
+        self._buffer += (text.format(*args) if args else text).encode('utf-8')
+        self._buffer += b'\n'
+
+    def take(self):
+        """ Returns the collected bytes and empties the buffer. """
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
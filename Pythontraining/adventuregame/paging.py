@@ -0,0 +1,258 @@
+"""Module that loads very large maps region by region.
+
+The map file is memory-mapped and only the byte offsets of the rows are
+indexed up front; the offsets of the regions in a row are indexed the first
+time the row is read. The rooms of a region are built the first time one of its
+tiles is needed, and the least recently used regions are dropped again when
+too many are loaded. The state the player changed in a dropped region is
+kept and restored when the region is built again, and the pending events of
+its rooms (see the scheduler module) are cancelled and scheduled again on
+the new rooms.
+"""
+
+
+import bisect
+import collections
+import itertools
+import mmap
+from array import array
+
+from adventuregame import world
+
+
+class Region:
+    """ The rooms of one square part of the map.
+
+    Attributes:
+        rooms (:obj:'list' of :obj:'RoomTile'): Row-major rooms of the region,
+            None for empty cells.
+        neighbours (bytearray): Row-major neighbour masks of the region.
+    """
+    def __init__(self, rooms, neighbours):
+        self.rooms = rooms
+        self.neighbours = neighbours
+
+
+class PagedWorld:
+    """ A world space whose regions are loaded from the map file on demand.
+
+    Attributes:
+        width (int): Number of columns of the map.
+        height (int): Number of rows of the map.
+        region_size (int): Width and height of a region in tiles.
+        max_regions (int): Number of regions that are kept loaded.
+        starting_position (tuple): Position of the StartingRoom.
+    """
+    def __init__(self, path=world.MAP_PATH, region_size=32, max_regions=64):
+        self.region_size = region_size
+        self.max_regions = max_regions
+        self._regions = collections.OrderedDict()
+        self._saved = {}
+        # The callback names and due ticks of the events of dropped rooms.
+        self._events = {}
+        self._row_offsets = {}
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._index_rows()
+        self.starting_position = self._find(b'StartingRoom')
+
+    def _index_rows(self):
+        """ Indexes the byte offset of the start of every row. """
+        data = self._map
+        size = len(data)
+        first_row_end = data.find(b'\n')
+        if first_row_end == -1:
+            first_row_end = size
+        self.width = data[:first_row_end].count(b'\t') + 1
+        self._columns = -(-self.width // self.region_size)
+
+        rows = array('Q')
+        pos = 0
+        while pos < size:
+            rows.append(pos)
+            end = data.find(b'\n', pos)
+            pos = size if end == -1 else end + 1
+        self.height = len(rows)
+        self._rows = rows
+
+    def _offsets(self, y):
+        """ Returns the byte offsets of the region columns of row y.
+
+        The offsets of the first cell of every region column are followed by
+        the offset of the end of the row. A row with fewer cells than the
+        first row ends early; the offsets of its missing cells point at its
+        end, so the cells are read as empty. The offsets of a row are indexed
+        the first time the row is read.
+        """
+        offsets = self._row_offsets.get(y)
+        if offsets is None:
+            data = self._map
+            start = self._rows[y]
+            end = data.find(b'\n', start)
+            if end == -1:
+                end = len(data)
+            lengths = map(len, data[start:end].split(b'\t'))
+            # The offset of every cell, and one behind the last cell.
+            starts = list(itertools.accumulate(
+                map((1).__add__, lengths), initial=start))
+            offsets = array('Q', starts[:min(self.width, len(starts) - 1):
+                                        self.region_size])
+            offsets.extend([end] * (self._columns + 1 - len(offsets)))
+            self._row_offsets[y] = offsets
+        return offsets
+
+    def _find(self, tile_name):
+        """ Returns the position of the last tile with the given name.
+
+        Only whole cells count, and as in world.load_tiles the last one in
+        the order of the rows wins. Without such a tile it is (0, 0).
+        """
+        data = self._map
+        size = len(data)
+        end = size
+        while True:
+            pos = data.rfind(tile_name, 0, end)
+            if pos == -1:
+                return 0, 0
+            end = pos + len(tile_name) - 1
+            behind = pos + len(tile_name)
+            if data[behind:behind + 2] == b'\r\n':
+                behind += 1
+            if ((pos == 0 or data[pos - 1] in b'\t\n') and
+                    (behind == size or data[behind] in b'\t\n')):
+                y = bisect.bisect_right(self._rows, pos) - 1
+                x = data[self._rows[y]:pos].count(b'\t')
+                if x < self.width:
+                    return x, y
+
+    def _row_names(self, y, x0, x1):
+        """ Returns the tile names of row y from column x0 up to column x1.
+
+        Args:
+            y (int): The row, must be on the map.
+            x0 (int): First column, must be on the map.
+            x1 (int): Column behind the last one, at most the map width.
+
+        Returns:
+            names (:obj:'list' of :obj:'str'): One name per column, empty
+                strings for empty cells.
+        """
+        first = x0 // self.region_size
+        last = (x1 - 1) // self.region_size
+        offsets = self._offsets(y)
+        cells = self._map[offsets[first]:offsets[last + 1]].split(b'\t')
+        skip = x0 - first * self.region_size
+        names = [cell.strip().decode() for cell in cells[skip:skip + x1 - x0]]
+        # The cells behind the end of a short row are empty.
+        names.extend([''] * (x1 - x0 - len(names)))
+        return names
+
+    def _load_region(self, key):
+        """ Builds the rooms and neighbour masks of a region.
+
+        Args:
+            key (tuple): Column and row of the region.
+
+        Returns:
+            region (:obj:'Region'): The loaded region.
+        """
+        from adventuregame import rooms
+
+        size = self.region_size
+        x0, y0 = key[0] * size, key[1] * size
+        x1, y1 = min(x0 + size, self.width), min(y0 + size, self.height)
+
+        # The names are read with a border of one tile, so the neighbour
+        # masks at the edges of the region are right.
+        bx0, bx1 = max(x0 - 1, 0), min(x1 + 1, self.width)
+        by0, by1 = max(y0 - 1, 0), min(y1 + 1, self.height)
+        names = [self._row_names(y, bx0, bx1) for y in range(by0, by1)]
+
+        def occupied(x, y):
+            if bx0 <= x < bx1 and by0 <= y < by1:
+                return names[y - by0][x - bx0] != ''
+            return False
+
+        room_list = [None] * (size * size)
+        masks = bytearray(size * size)
+        for y in range(y0, y1):
+            for x in range(x0, x1):
+                tile_name = names[y - by0][x - bx0]
+                if tile_name == '':
+                    continue
+                i = (y - y0) * size + (x - x0)
+                room = rooms.room_type(tile_name, y + 1, x + 1)(x, y)
+                state = self._saved.pop((x, y), None)
+                if state is not None:
+                    room.restore_state(state)
+                events = self._events.pop((x, y), None)
+                if events and world.scheduler is not None:
+                    for name, due in events:
+                        room.resume_event(world.scheduler, name,
+                                          due - world.scheduler.now)
+                room_list[i] = room
+                masks[i] = ((world.EAST if occupied(x + 1, y) else 0) |
+                            (world.WEST if occupied(x - 1, y) else 0) |
+                            (world.NORTH if occupied(x, y - 1) else 0) |
+                            (world.SOUTH if occupied(x, y + 1) else 0))
+        return Region(room_list, masks)
+
+    def _evict(self):
+        """ Drops the least recently used region and keeps its changes.
+
+        The events of its rooms are cancelled, so they don't change rooms
+        that are no longer in the world, and kept with their due tick.
+        """
+        key, region = self._regions.popitem(last=False)
+        scheduler = world.scheduler
+        for room in region.rooms:
+            if room is not None:
+                state = room.save_state()
+                if state is not None:
+                    self._saved[(room.x, room.y)] = state
+                if scheduler is not None:
+                    cancelled = room.cancel_events(scheduler)
+                    if cancelled:
+                        self._events[(room.x, room.y)] = [
+                            (name, scheduler.now + delay)
+                            for name, delay in cancelled]
+
+    def region(self, x, y):
+        """ Returns the loaded region that contains position (x, y).
+
+        Args:
+            x (int): x-Coordinate in the Worldspace, must be on the map.
+            y (int): y-Coordinate in the Worldspace, must be on the map.
+
+        Returns:
+            region (:obj:'Region'): The region, loaded if necessary.
+        """
+        key = (x // self.region_size, y // self.region_size)
+        region = self._regions.get(key)
+        if region is None:
+            if len(self._regions) >= self.max_regions:
+                self._evict()
+            region = self._regions[key] = self._load_region(key)
+        else:
+            self._regions.move_to_end(key)
+        return region
+
+    def tile_exists(self, x, y):
+        """ Returns the room at position (x, y), or none, if there is no room.
+        """
+        if 0 <= x < self.width and 0 <= y < self.height:
+            size = self.region_size
+            return self.region(x, y).rooms[(y % size) * size + x % size]
+        return None
+
+    def neighbours(self, x, y):
+        """ Returns the neighbour mask of position (x, y). """
+        if 0 <= x < self.width and 0 <= y < self.height:
+            size = self.region_size
+            return self.region(x, y).neighbours[(y % size) * size + x % size]
+        return 0
+
+    def close(self):
+        """ Closes the memory map of the map file. """
+        self._regions.clear()
+        self._map.close()
@@ -0,0 +1,301 @@
+"""Module that finds paths through the world and measures distances.
+
+A WorldGraph is built once from the loaded world and uses the neighbour masks
+of the world as its edges. Shortest paths between two rooms are searched
+with A*, and for the key rooms of the game (the exit, the healing rooms and
+the traders) a distance field is kept: the number of moves from every cell to
+the nearest room of that type. Asking how far the next trader is, or which
+way to go, is then a single lookup.
+
+When a tile is changed with world.set_tile, the distance fields are repaired
+around the changed cell instead of being computed again.
+"""
+
+
+import collections
+import heapq
+from array import array
+
+from adventuregame import actions, rooms, world
+
+
+KEY_ROOMS = ('CaveExit', 'HealingRoom', 'TraderRoom')
+
+# Distance of the cells from which no room of the type can be reached.
+UNREACHABLE = -1
+
+# The move action, the neighbour bit and the offset of the four directions.
+_DIRECTIONS = ((actions.MOVE_EAST, world.EAST, 1, 0),
+               (actions.MOVE_WEST, world.WEST, -1, 0),
+               (actions.MOVE_NORTH, world.NORTH, 0, -1),
+               (actions.MOVE_SOUTH, world.SOUTH, 0, 1))
+
+
+class WorldGraph:
+    """ The rooms of the loaded world as a graph.
+
+    The graph reads the neighbour masks of the dense world, so it can't be
+    built for a paged world.
+
+    Attributes:
+        width (int): Number of columns of the world.
+        height (int): Number of rows of the world.
+        generation (int): The world.generation the graph was built for.
+    """
+    def __init__(self, key_rooms=KEY_ROOMS):
+        if world._pager is not None:
+            raise NotImplementedError("A paged world has no graph.")
+        self.width = world.width
+        self.height = world.height
+        self.generation = world.generation
+        self._masks = world._neighbours
+        self._fields = {}
+        for name in key_rooms:
+            self.distance_field(name)
+
+    def _cell(self, x, y):
+        """ Returns the index of the cell at (x, y), or None if the position
+        is outside the world.
+        """
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return y * self.width + x
+        return None
+
+    def _steps(self, i):
+        """ Returns the indices of the cells adjacent to cell i. """
+        mask = self._masks[i]
+        if mask & world.EAST:
+            yield i + 1
+        if mask & world.WEST:
+            yield i - 1
+        if mask & world.NORTH:
+            yield i - self.width
+        if mask & world.SOUTH:
+            yield i + self.width
+
+    def _is_target(self, room_class, i):
+        """ Checks if the room in cell i is of the type room_class. """
+        return isinstance(world._rooms[world._grid[i]], room_class)
+
+    def distance_field(self, room_name):
+        """ Returns the distance of every cell to the nearest room of a type.
+
+        The field is computed with a breadth first search from all rooms of
+        the type on the first call and then kept up to date.
+
+        Args:
+            room_name (str): Name of the room type, superclasses like
+                TraderRoom included.
+
+        Returns:
+            distances (:obj:'array'): Row-major number of moves to the
+                nearest room of the type, UNREACHABLE for cells without a
+                way there.
+        """
+        field = self._fields.get(room_name)
+        if field is None:
+            room_class = rooms.room_class(room_name)
+            distances = array('i', [UNREACHABLE]) * (self.width * self.height)
+            queue = collections.deque()
+            for room in world._rooms:
+                if isinstance(room, room_class):
+                    i = room.y * self.width + room.x
+                    distances[i] = 0
+                    queue.append(i)
+            while queue:
+                i = queue.popleft()
+                step = distances[i] + 1
+                for j in self._steps(i):
+                    if distances[j] == UNREACHABLE:
+                        distances[j] = step
+                        queue.append(j)
+            field = self._fields[room_name] = (room_class, distances)
+        return field[1]
+
+    def distance_to(self, room_name, x, y):
+        """ Returns the number of moves from (x, y) to the nearest room of a
+        type, UNREACHABLE if there is no way, or None if (x, y) is outside the
+        world.
+        """
+        i = self._cell(x, y)
+        if i is None:
+            return None
+        return self.distance_field(room_name)[i]
+
+    def next_move(self, room_name, x, y):
+        """ Returns the move action towards the nearest room of a type.
+
+        Returns:
+            action (:obj:'Action'): One of the move actions, None if the
+                player is already there, there is no way or (x, y) is outside
+                the world.
+        """
+        i = self._cell(x, y)
+        if i is None:
+            return None
+        distances = self.distance_field(room_name)
+        if distances[i] <= 0:
+            return None
+        mask = self._masks[i]
+        for action, bit, dx, dy in _DIRECTIONS:
+            if (mask & bit and
+                    distances[i + dy * self.width + dx] == distances[i] - 1):
+                return action
+        return None
+
+    def path_to(self, room_name, x, y):
+        """ Returns the positions from (x, y) to the nearest room of a type.
+
+        Returns:
+            path (:obj:'list' of :obj:'tuple'): The positions including the
+                start and the room, None if there is no way or (x, y) is
+                outside the world.
+        """
+        i = self._cell(x, y)
+        if i is None:
+            return None
+        distances = self.distance_field(room_name)
+        if distances[i] == UNREACHABLE:
+            return None
+        path = [(x, y)]
+        while distances[i]:
+            i = next(j for j in self._steps(i)
+                     if distances[j] == distances[i] - 1)
+            path.append((i % self.width, i // self.width))
+        return path
+
+    def shortest_path(self, start, goal):
+        """ Searches the shortest path between two positions with A*.
+
+        Args:
+            start (tuple): The x and y coordinate to start from.
+            goal (tuple): The x and y coordinate to go to.
+
+        Returns:
+            path (:obj:'list' of :obj:'tuple'): The positions including the
+                start and the goal, None if there is no way or a position is
+                outside the world.
+        """
+        width = self.width
+        source = self._cell(*start)
+        target = self._cell(*goal)
+        if source is None or target is None:
+            return None
+        if not world._grid[source] or not world._grid[target]:
+            return None
+        goal_x, goal_y = goal
+        came_from = {source: None}
+        moves = {source: 0}
+        queue = [(abs(start[0] - goal_x) + abs(start[1] - goal_y), source)]
+        while queue:
+            i = heapq.heappop(queue)[1]
+            if i == target:
+                break
+            step = moves[i] + 1
+            for j in self._steps(i):
+                if step < moves.get(j, step + 1):
+                    moves[j] = step
+                    came_from[j] = i
+                    x, y = j % width, j // width
+                    heapq.heappush(
+                        queue, (step + abs(x - goal_x) + abs(y - goal_y), j))
+        else:
+            return None
+
+        path = []
+        while i is not None:
+            path.append((i % width, i // width))
+            i = came_from[i]
+        path.reverse()
+        return path
+
+    def distance(self, start, goal):
+        """ Returns the number of moves between two positions, or
+        UNREACHABLE.
+        """
+        path = self.shortest_path(start, goal)
+        return UNREACHABLE if path is None else len(path) - 1
+
+    def tile_changed(self, x, y):
+        """ Repairs the distance fields after the tile at (x, y) changed.
+
+        The cells whose shortest way led through the changed cell are reset
+        and filled again from their unchanged neighbours, then shorter ways
+        through the changed cell are spread outwards. Only the cells whose
+        distance can change are visited.
+        """
+        changed = y * self.width + x
+        for room_class, distances in self._fields.values():
+            # The cells below the changed cell in the shortest path tree.
+            affected = {changed}
+            stack = [changed] if distances[changed] != UNREACHABLE else []
+            while stack:
+                i = stack.pop()
+                cells = (self._neighbour_cells(i) if i == changed
+                         else self._steps(i))
+                for j in cells:
+                    if j not in affected and distances[j] == distances[i] + 1:
+                        affected.add(j)
+                        stack.append(j)
+            for i in affected:
+                distances[i] = UNREACHABLE
+
+            queue = []
+            for i in affected:
+                if not world._grid[i]:
+                    continue
+                if self._is_target(room_class, i):
+                    best = 0
+                else:
+                    reachable = [distances[j] for j in self._steps(i)
+                                 if distances[j] != UNREACHABLE]
+                    if not reachable:
+                        continue
+                    best = min(reachable) + 1
+                distances[i] = best
+                queue.append((best, i))
+            heapq.heapify(queue)
+
+            while queue:
+                distance, i = heapq.heappop(queue)
+                if distance != distances[i]:
+                    continue
+                for j in self._steps(i):
+                    if (distances[j] == UNREACHABLE or
+                            distances[j] > distance + 1):
+                        distances[j] = distance + 1
+                        heapq.heappush(queue, (distance + 1, j))
+
+    def _neighbour_cells(self, i):
+        """ Returns the indices of the cells next to cell i on the map.
+
+        Unlike _steps, the cells are returned whether the rooms are connected
+        or not, since a removed room has already lost its connections.
+        """
+        x, y = i % self.width, i // self.width
+        if x + 1 < self.width:
+            yield i + 1
+        if x > 0:
+            yield i - 1
+        if y > 0:
+            yield i - self.width
+        if y + 1 < self.height:
+            yield i + self.width
+
+
+_graph = None
+
+
+def world_graph():
+    """ Returns the graph of the loaded world.
+
+    The graph is built on the first call and whenever another world has been
+    loaded since. It is kept up to date with world.set_tile.
+    """
+    global _graph
+    if _graph is None or _graph.generation != world.generation:
+        if _graph is not None:
+            world.remove_tile_listener(_graph.tile_changed)
+        _graph = WorldGraph()
+        world.add_tile_listener(_graph.tile_changed)
+    return _graph
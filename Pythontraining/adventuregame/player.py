@@ -2,8 +2,11 @@
 
 
 import random
+from adventuregame import combat
 from adventuregame import items
+from adventuregame import output
 from adventuregame import world
+from adventuregame.inventory import Inventory
 
 
 class Player:
@@ -11,19 +14,36 @@ class Player:
 
     Attributes:
         hp (int): The players Health Points.
-        inventory (:obj:'list' of :obj:'Item'): The inventory of the player.
+        inventory (:obj:'Inventory'): The inventory of the player.
         gold (int): The amount of gold the player has collected.
         location_x (int):  Current position of the player on the x-axis.
         location_y (int): Current position of the player on the y-axis.
         victory (bool): Boolean that is set true as soon as the player has won.
+        world: The world the player moves in, the world module or a
+            WorldOverlay of the player's session.
+        out (:obj:'Sink'): The sink all the output of the player's game is
+            written to.
+        random (:obj:'random.Random'): The random generator of the player's
+            game, seeded so that a game can be played again.
+        read: Function that is called with a prompt and returns the line
+            the user typed, input by default.
     """
-
-    def __init__(self):
+    # Counted up whenever the methods of the class are replaced (see the
+    # instrument module), so the players drop the methods they cached.
+    methods_version = 0
+
+    def __init__(self, world_view=None, out=None, seed=None, read=None):
+        self.world = world if world_view is None else world_view
+        self.out = output.TerminalSink() if out is None else out
+        self.random = random.Random(seed)
+        self.read = input if read is None else read
         self.hp = 100
-        self.inventory = [items.Stone()]
+        self.inventory = Inventory([items.Stone()])
         self.gold = 15
-        self.location_x, self.location_y = world.starting_position
+        self.location_x, self.location_y = self.world.starting_position
         self.victory = False
+        self._handlers = {}
+        self._handlers_version = Player.methods_version
 
     def is_alive(self):
         """ Checks if the player is still alive.
@@ -34,14 +54,14 @@ class Player:
         return self.hp > 0
 
     def print_inventory(self):
-        """ Prints the Inventory in the console.
+        """ Writes the Inventory to the output sink of the player.
 
         Returns:
             None
         """
         for item in self.inventory:
-            print(item, '\n')
-        print("You have {} Gold".format(self.gold))
+            self.out.write("{}\n", item)
+        self.out.write("You have {} Gold", self.gold)
 
     def move(self, dx, dy):
         """ Moves the player in the specified direction.
@@ -55,7 +75,8 @@ class Player:
         """
         self.location_x += dx
         self.location_y += dy
-        print(world.tile_exists(self.location_x, self.location_y).entry_text())
+        self.out.write(self.world.tile_exists(self.location_x,
+                                              self.location_y).entry_text())
 
     def move_north(self):
         """ Moves the player north.
@@ -89,58 +110,76 @@ class Player:
         """
         self.move(dx=-1, dy=0)
 
-    def buy(self, trader):
+    def buy(self, trader, item_name=None):
         """ Buys an item from the trader and puts it into the inventory.
 
         Args:
             trader: The trader the player is interacting with.
+            item_name (str): The name of the item to buy. If None, the
+                inventory of the trader is shown and the user is asked.
 
         Returns:
             None
         """
         # Shows the inventory of the trader and asks the user to choose one.
-        trader.print_inventory()
-        item_input = input("Choose an item: ")
-        item = None
-
-        # Loops over the inventory of the trader to get the matching item.
-        for i in trader.inventory:
-            if i.name == item_input:
-                item = i
-
-        # If there was a matching item and the player has enough gold, the item
-        # is appended to the players inventory. If there's no matching item, or
-        # the player doesn't have enough gold, an error message is displayed.
-        if item is not None and item.value <= self.gold:
-            self.inventory.append(item)
-            self.gold -= item.value
-            print("You bought {}".format(item.name))
+        if item_name is None:
+            trader.print_inventory(self.out)
+            self.out.flush()
+            item_name = self.read("Choose an item: ")
+        self.buy_item(trader, item_name)
+
+    def buy_item(self, trader, item_input):
+        """ Buys the item with the given name from the trader.
+
+        Args:
+            trader: The trader the player is interacting with.
+            item_input (str): The name of the item the player wants to buy.
+
+        Returns:
+            None
+        """
+        # The trader hands over the item if it has one with the name and the
+        # player has enough gold. If not, an error message is displayed.
+        item = trader.fill_order(self, item_input)
+        if item is not None:
+            self.out.write("You bought {}", item.name)
         else:
-            print("You can't buy this.")
+            self.out.write("You can't buy this.")
+
+    def sell(self, trader, item_name=None):
+        """ Sells an item from the inventory to the trader for its value.
+
+        Args:
+            trader: The trader the player is interacting with.
+            item_name (str): The name of the item to sell. If None, the
+                inventory is shown and the user is asked.
+
+        Returns:
+            None
+        """
+        if item_name is None:
+            self.print_inventory()
+            self.out.flush()
+            item_name = self.read("Choose item to sell: ")
+        self.sell_item(trader, item_name)
 
-    def sell(self):
-        """ Removes an item from the inventory and adds the item value as gold.
+    def sell_item(self, trader, item_name):
+        """ Sells the item with the given name to the trader.
+
+        Args:
+            trader: The trader the player is interacting with.
+            item_name (str): The name of the item the player wants to sell.
 
         Returns:
             None
         """
-        self.print_inventory()
-        item_name = input("Choose item to sell: ")
-        item = None
-
-        # Loops over the players inventory to get the matching item.
-        for i in self.inventory:
-            if i.name == item_name:
-                item = i
-        # If there was a matching item, the item value gets added to the
-        # players gold and the item gets removed. If not, an error message
-        # is displayed.
+        # The trader takes the item if the player has one with the name and
+        # pays its value. If not, an error message is displayed.
+        item = trader.fill_order(self, item_name, sell=True)
         if item is not None:
-            self.gold += item.value
-            self.inventory.remove(item)
-            print("You sold {}".format(item.name))
+            self.out.write("You sold {}", item.name)
         else:
-            print("You don't have this Item.")
+            self.out.write("You don't have this Item.")
 
     def attack(self, enemy):
         """ Deals damage to the enemy in this rooms.
@@ -151,28 +190,71 @@ class Player:
         Returns:
             None
         """
-        weapon = None
-        max_dmg = 0
-
         # Takes the Weapon with the most Damage in the inventory.
-        for i in self.inventory:
-            if isinstance(i, items.Weapon):
-                if i.damage > max_dmg:
-                    max_dmg = i.damage
-                    weapon = i
-
-        print("You attack with {}. {} takes {} Damage.".format(weapon.name,
-                                                               enemy.name,
-                                                               max_dmg))
+        weapon = self.inventory.best_weapon()
+        if weapon is None:
+            self.out.write("You have no weapon to attack {} with.", enemy.name)
+            return
+        max_dmg = weapon.damage
+
+        # The enemy of a world with an arena is fought together, the attack
+        # lands when the world ticks.
+        arena = self.world.arena
+        if arena is not None:
+            room = self.world.tile_exists(self.location_x, self.location_y)
+            if arena.attack(self, room):
+                self.out.write("You attack {} with {}.", enemy.name,
+                               weapon.name)
+            else:
+                self.out.write("You are not fighting {}.", enemy.name)
+            return
+
+        self.out.write("You attack with {}. {} takes {} Damage.", weapon.name,
+                       enemy.name, max_dmg)
 
         # Removes the damage the player's attack did from the hp of the enemy
         # and displays the enemy's remaining hp, or reports his death.
         enemy.hp = enemy.hp - max_dmg
         if enemy.is_alive():
-            print("{} has {} HP remaining.".format(enemy.name,
-                                                   enemy.hp))
+            self.out.write("{} has {} HP remaining.", enemy.name, enemy.hp)
+        else:
+            self.out.write("{} has been defeated.", enemy.name)
+
+    def auto_battle(self, enemy):
+        """ Attacks the enemy until one of them is dead, in a single turn.
+
+        The outcome is computed by the combat module and is the same as
+        attacking in every turn of the fight. The world is then advanced by
+        the ticks of the other turns the fight takes, so events elsewhere
+        keep their time. The fight itself is not exact with events: the
+        enemy doesn't regenerate while it is fought.
+
+        On a world with an arena the enemy is fought together with the other
+        players, so an auto-battle is a single attack there.
+
+        Args:
+            enemy: The enemy the player is fighting.
+
+        Returns:
+            None
+        """
+        if self.world.arena is not None:
+            self.attack(enemy)
+            return
+        battle = combat.fight(self, enemy)
+        if battle is None:
+            self.out.write("You have no weapon to attack {} with.", enemy.name)
+            return
+        self.out.write("You fight {} for {} rounds and lose {} HP.",
+                       enemy.name, battle.attacks, battle.hp_lost)
+        # The turn of the auto-battle is ticked by the game loop.
+        if battle.attacks > 1:
+            self.world.tick(battle.attacks - 1)
+        if battle.won:
+            self.out.write("{} has been defeated. You have {} HP remaining.",
+                           enemy.name, self.hp)
         else:
-            print("{} has been defeated.".format(enemy.name))
+            self.out.write("{} has {} HP remaining.", enemy.name, enemy.hp)
 
     def flee(self, tile):
         """ Moves the player randomly to an adjacent room.
@@ -181,14 +263,14 @@ class Player:
             None
         """
         available_moves = tile.adjacent_moves()
-        r = random.randint(0, len(available_moves) - 1)
+        r = self.random.randint(0, len(available_moves) - 1)
         self.do_action(available_moves[r])
 
     def do_action(self, action, **kwargs):
         """ Maps the choosen Action object to the right player action.
 
         Takes the name of the Method from the Action object. Then the matching
-        player method gets executed.
+        player method gets executed. The bound methods are cached per player.
         Args:
             action: The Action object in which the matching player method is
                 saved.
@@ -198,6 +280,12 @@ class Player:
         Returns:
             None
         """
-        action_method = getattr(self, action.method.__name__)
+        if self._handlers_version != Player.methods_version:
+            self._handlers = {}
+            self._handlers_version = Player.methods_version
+        action_method = self._handlers.get(action.method_name)
+        if action_method is None:
+            action_method = getattr(self, action.method_name)
+            self._handlers[action.method_name] = action_method
         if action_method:
             action_method(**kwargs)
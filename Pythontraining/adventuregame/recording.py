@@ -0,0 +1,220 @@
+"""Module that records games and plays them again without a terminal.
+
+A recording holds the seed of the player's random generator and every line
+the user typed, the hotkeys as well as the item names for buying and
+selling. Replaying a recording runs the loop of game.run on a WorldOverlay
+with a NullSink and the recorded lines, so nothing waits for a terminal.
+The world ticks once per turn, as in game.play, so enemies respawn at the
+same turns as in the recorded game.
+The final state of the player is recorded too, which makes a directory of
+recordings a regression test for every change of the game::
+
+    python -m adventuregame.recording record game.rec
+    python -m adventuregame.recording replay recordings/*.rec
+
+A recording is a text file with one entry per line: ``seed <n>``, then one
+``input <line>`` for every line typed, then ``end <hp> <gold> <x> <y>
+<victory>``.
+"""
+
+
+import collections
+import random
+import time
+
+from adventuregame import game, output, scheduler, world
+from adventuregame.player import Player
+
+
+Result = collections.namedtuple('Result',
+                                ['hp', 'gold', 'x', 'y', 'victory'])
+Result.__doc__ = """ The state of the player at the end of a game.
+
+Attributes:
+    hp (int): The players Health Points.
+    gold (int): The amount of gold the player had.
+    x (int): The last position of the player on the x-axis.
+    y (int): The last position of the player on the y-axis.
+    victory (bool): True if the player reached the exit.
+"""
+
+
+def result_of(player):
+    """ Returns the Result of a player's game. """
+    return Result(player.hp, player.gold, player.location_x,
+                  player.location_y, player.victory)
+
+
+class Recording:
+    """ The inputs of one game.
+
+    Attributes:
+        seed (int): The seed of the player's random generator.
+        inputs (:obj:'list' of :obj:'str'): The lines the user typed.
+        result (:obj:'Result'): The state at the end of the game, None if
+            the game hasn't ended yet.
+    """
+    def __init__(self, seed, inputs=(), result=None):
+        self.seed = seed
+        self.inputs = list(inputs)
+        self.result = result
+
+    def dump(self, path):
+        """ Writes the recording to a file. """
+        with open(path, 'w', encoding='utf-8', newline='\n') as f:
+            f.write("seed {}\n".format(self.seed))
+            for line in self.inputs:
+                f.write("input {}\n".format(line))
+            if self.result is not None:
+                f.write("end {} {} {} {} {:d}\n".format(*self.result))
+
+    @classmethod
+    def load(cls, path):
+        """ Reads a recording from a file.
+
+        Raises:
+            ValueError: If the file is not a recording.
+        """
+        recording = cls(None)
+        with open(path, 'r', encoding='utf-8', newline='\n') as f:
+            for number, line in enumerate(f, 1):
+                kind, _, value = line.rstrip('\n').partition(' ')
+                if kind == 'input':
+                    recording.inputs.append(value)
+                elif kind == 'seed':
+                    recording.seed = int(value)
+                elif kind == 'end':
+                    hp, gold, x, y, victory = map(int, value.split())
+                    recording.result = Result(hp, gold, x, y, bool(victory))
+                else:
+                    raise ValueError("Line {} of {} is not part of a "
+                                     "recording.".format(number, path))
+        return recording
+
+
+class Recorder:
+    """ Read function that records every line before it is returned.
+
+    Attributes:
+        recording (:obj:'Recording'): The recording the lines are added to.
+    """
+    def __init__(self, recording, read=input):
+        self.recording = recording
+        self._read = read
+
+    def __call__(self, prompt):
+        line = self._read(prompt)
+        self.recording.inputs.append(line)
+        return line
+
+
+def _reader(inputs):
+    """ Returns a read function that returns the inputs one by one.
+
+    The function raises EOFError after the last input, like input does at
+    the end of the stream.
+    """
+    lines = iter(inputs)
+
+    def read(prompt):
+        try:
+            return next(lines)
+        except StopIteration:
+            raise EOFError() from None
+    return read
+
+
+def record(path, seed=None):
+    """ Plays the game in the terminal and records it.
+
+    The recording is written even if the game is interrupted.
+
+    Args:
+        path (str): The file the recording is written to.
+        seed (int): Seed of the random generator, a random one by default.
+
+    Returns:
+        recording (:obj:'Recording'): The recording of the game.
+    """
+    world.load_tiles()
+    world.scheduler = scheduler.TimingWheel()
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    recording = Recording(seed)
+    player = Player(seed=seed, read=Recorder(recording))
+    try:
+        game.run(player)
+    finally:
+        recording.result = result_of(player)
+        recording.dump(path)
+    return recording
+
+
+def replay(recording):
+    """ Plays a recorded game again, without any output.
+
+    The world has to be loaded. If the recording ends before the game, the
+    game is stopped where the recording ends.
+
+    Returns:
+        result (:obj:'Result'): The state at the end of the replay.
+    """
+    player = Player(world.WorldOverlay(scheduler.TimingWheel()),
+                    output.NullSink(), recording.seed,
+                    _reader(recording.inputs))
+    try:
+        game.run(player)
+    except EOFError:
+        pass
+    return result_of(player)
+
+
+def replay_files(paths):
+    """ Replays recordings and compares them with their recorded results.
+
+    Args:
+        paths (:obj:'list' of :obj:'str'): The recording files.
+
+    Returns:
+        mismatches (:obj:'list' of :obj:'tuple'): The path, the recorded
+            and the replayed result of every recording that ended
+            differently.
+    """
+    world.load_tiles()
+    mismatches = []
+    for path in paths:
+        recording = Recording.load(path)
+        result = replay(recording)
+        if recording.result is not None and result != recording.result:
+            mismatches.append((path, recording.result, result))
+    return mismatches
+
+
+def main(argv=None):
+    """ Command line entry point to record a game or replay recordings. """
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    record_parser = commands.add_parser('record')
+    record_parser.add_argument('path')
+    record_parser.add_argument('--seed', type=int, default=None)
+    replay_parser = commands.add_parser('replay')
+    replay_parser.add_argument('paths', nargs='+')
+    args = parser.parse_args(argv)
+
+    if args.command == 'record':
+        record(args.path, args.seed)
+        return 0
+    start = time.perf_counter()
+    mismatches = replay_files(args.paths)
+    seconds = time.perf_counter() - start
+    for path, recorded, replayed in mismatches:
+        print("{}: recorded {}, replayed {}".format(path, recorded, replayed))
+    print("Replayed {} recordings in {:.3f} s, {} ended differently."
+          .format(len(args.paths), seconds, len(mismatches)))
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
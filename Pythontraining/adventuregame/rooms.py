@@ -1,16 +1,136 @@
-from adventuregame import items, enemies, actions, world, npc
+"""Module of the room types that can be put on the map.
+
+The modules of the items, enemies, actions, traders and the world are only
+imported when a room first needs them, so importing this module doesn't
+read the catalog.
+"""
+
+
+import copy
+
+
+def _moves_for_mask(mask):
+    """ Returns the move actions for a neighbour mask of the world grid. """
+    from adventuregame import actions, world
+    moves = []
+    if mask & world.EAST:
+        moves.append(actions.MOVE_EAST)
+    if mask & world.WEST:
+        moves.append(actions.MOVE_WEST)
+    if mask & world.NORTH:
+        moves.append(actions.MOVE_NORTH)
+    if mask & world.SOUTH:
+        moves.append(actions.MOVE_SOUTH)
+    return tuple(moves)
+
+
+# The moves of every neighbour mask and the neighbours function of the world
+# module, looked up once on first use.
+_MOVES_BY_MASK = None
+_neighbours = None
+
+
+def _load_moves():
+    """ Puts together the moves of every neighbour mask. """
+    global _MOVES_BY_MASK, _neighbours
+    from adventuregame import world
+    _neighbours = world.neighbours
+    _MOVES_BY_MASK = [_moves_for_mask(mask) for mask in range(16)]
+
+# Every subclass of RoomTile is registered here under its class name, the
+# ones that can be put on the map in _room_types as well.
+_room_classes = {}
+_room_types = {}
+
+
+class UnknownRoomError(ValueError):
+    """ Raised when the map contains a name that is not a room type.
+
+    Attributes:
+        tile_name (str): The unknown name.
+        line (int): Line of the map in which the name was found.
+        column (int): Column of the map in which the name was found.
+    """
+    def __init__(self, tile_name, line=None, column=None):
+        self.tile_name = tile_name
+        self.line = line
+        self.column = column
+        message = "Unknown room type '{}'".format(tile_name)
+        if line is not None:
+            message += " in line {}, column {} of the map".format(line, column)
+        super().__init__(message)
+
+
+def room_type(tile_name, line=None, column=None):
+    """ Returns the room class that the tile name puts on the map.
+
+    Args:
+        tile_name (str): The name of the room type in the map.
+        line (int): Line of the map, only used for the error message.
+        column (int): Column of the map, only used for the error message.
+
+    Returns:
+        cls: The RoomTile subclass.
+
+    Raises:
+        UnknownRoomError: If there is no room type with this name.
+    """
+    try:
+        return _room_types[tile_name]
+    except KeyError:
+        raise UnknownRoomError(tile_name, line, column) from None
+
+
+def room_class(name):
+    """ Returns the RoomTile subclass with the name, base classes included.
+
+    Raises:
+        UnknownRoomError: If there is no room class with this name.
+    """
+    try:
+        return _room_classes[name]
+    except KeyError:
+        raise UnknownRoomError(name) from None
 
 
 class RoomTile:
     """ Superclass for all the different rooms.
 
+    The actions of a room are built by build_actions and cached. Rooms whose
+    actions depend on their state return that state from menu_key, so the
+    cache holds one menu per state.
+
     Attributes:
         x (int): Room coordinate on the x-axis.
         y (int): Room coordinate on the y-axis.
     """
+    __slots__ = ('x', 'y', '_menus')
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
+        self._menus = None
+
+    def __init_subclass__(cls, register=True, **kwargs):
+        # Base classes that can't be built from a position pass
+        # register=False, so the map can't name them.
+        super().__init_subclass__(**kwargs)
+        _room_classes[cls.__name__] = cls
+        if register:
+            _room_types[cls.__name__] = cls
+
+    @classmethod
+    def create_many(cls, positions):
+        """ Builds a room of this type at every position.
+
+        Args:
+            positions (:obj:'list' of :obj:'tuple'): The (x, y) positions.
+
+        Returns:
+            rooms (:obj:'list' of :obj:'RoomTile'): The rooms, in the same
+                order as the positions.
+        """
+        return [cls(x, y) for x, y in positions]
 
     def entry_text(self):
         """ Prints an entry text whenever a room is entered. """
@@ -24,28 +144,112 @@ class RoomTile:
         """ Checks if there are adjacent RoomTiles to move to.
 
         Returns:
-            moves (:obj:'List' of :obj:'Actions'): Returns possible moves that
+            moves (:obj:'tuple' of :obj:'Actions'): Returns possible moves that
                 can be made from this Room to another.
         """
-        moves = []
-        if world.tile_exists(self.x + 1, self.y):
-            moves.append(actions.MoveEast())
-        if world.tile_exists(self.x - 1, self.y):
-            moves.append(actions.MoveWest())
-        if world.tile_exists(self.x, self.y - 1):
-            moves.append(actions.MoveNorth())
-        if world.tile_exists(self.x, self.y + 1):
-            moves.append(actions.MoveSouth())
-        return moves
+        if _MOVES_BY_MASK is None:
+            _load_moves()
+        return _MOVES_BY_MASK[_neighbours(self.x, self.y)]
 
-    def available_actions(self):
+    def build_actions(self):
         """ Returns all of the available actions in this room."""
-        moves = self.adjacent_moves()
-        moves.append(actions.ViewInventory())
+        from adventuregame import actions
+        moves = list(self.adjacent_moves())
+        moves.append(actions.VIEW_INVENTORY)
         return moves
 
+    def menu_key(self):
+        """ Returns the state of the room the available actions depend on."""
+        return None
+
+    def _menu(self):
+        """ Returns the cached actions and hotkey table for the room state."""
+        if self._menus is None:
+            self._menus = {}
+        key = self.menu_key()
+        menu = self._menus.get(key)
+        if menu is None:
+            available = tuple(self.build_actions())
+            hotkeys = {}
+            for action in available:
+                hotkeys.setdefault(action.hotkey, action)
+            menu = self._menus[key] = (available, hotkeys)
+        return menu
+
+    def available_actions(self):
+        """ Returns all of the available actions in this room.
+
+        Returns:
+            actions (:obj:'tuple' of :obj:'Action'): The cached actions.
+        """
+        return self._menu()[0]
+
+    def action_for_hotkey(self, hotkey):
+        """ Returns the available action with the hotkey, or None. """
+        return self._menu()[1].get(hotkey)
+
+    def invalidate_actions(self):
+        """ Drops the cached actions, for example when a neighbour changed."""
+        self._menus = None
+
+    def schedule_events(self, scheduler):
+        """ Registers the timed events of the room, like a respawn.
+
+        modify_player calls it with the scheduler of the player's world,
+        which is None if the world has no ticks. The callbacks are methods
+        of the room that take the scheduler, see resume_event.
+        """
+        pass
+
+    def resume_event(self, scheduler, name, delay):
+        """ Schedules an event that was saved by WorldOverlay.save_events.
+
+        Args:
+            scheduler (:obj:'TimingWheel'): The scheduler of the world.
+            name (str): The name of the callback method.
+            delay (int): The ticks until the event is due.
+        """
+        self._event = scheduler.schedule(delay, getattr(self, name),
+                                         scheduler)
+
+    def cancel_events(self, scheduler):
+        """ Cancels the events that schedule_events registered.
+
+        Returns:
+            events (:obj:'list' of :obj:'tuple'): The name of the callback
+                and the ticks until it was due of every cancelled event, see
+                resume_event.
+        """
+        event = getattr(self, '_event', None)
+        if event is None:
+            return []
+        scheduler.cancel(event)
+        self._event = None
+        return [(event.callback.__name__, event.due - scheduler.now)]
+
+    def save_state(self):
+        """ Returns the state the player can change in this room.
+
+        Returns:
+            None if the room is still as it was loaded from the map.
+        """
+        return None
+
+    def restore_state(self, state):
+        """ Sets the state that was returned by save_state. """
+        pass
+
+    def copy(self):
+        """ Returns a copy of the room that one session may change.
+
+        Returns:
+            room (:obj:'RoomTile'): The room itself, if there is nothing the
+                player can change in it.
+        """
+        return self
+
 
-class LootRoom(RoomTile):
+class LootRoom(RoomTile, register=False):
     """ Superclass for all Loot-Type rooms in which the player gains something
 
     Attributes:
@@ -53,11 +257,36 @@ class LootRoom(RoomTile):
         lootable (bool): Bool that defines if the item has already been picked
             up or not.
     """
+    __slots__ = ('item', 'lootable', '_event')
+    # Ticks until the item can be found again.
+    restock_ticks = 200
+
     def __init__(self, x, y, item):
         self.item = item
         self.lootable = True
+        self._event = None
         super().__init__(x, y)
 
+    @classmethod
+    def create_many(cls, positions):
+        """ Builds a room of this type at every position.
+
+        Only the first room is built by the constructor. The items are
+        shared prototypes, so the other rooms get the same item and are
+        built without calling __init__.
+        """
+        if not positions:
+            return []
+        first = cls(*positions[0])
+        found = [first]
+        new = object.__new__
+        for x, y in positions[1:]:
+            room = new(cls)
+            room.x, room.y, room._menus = x, y, None
+            room.item, room.lootable, room._event = first.item, True, None
+            found.append(room)
+        return found
+
     def add_loot(self, player):
         """ Adds the lootable item to the players inventory. """
         player.inventory.append(self.item)
@@ -67,12 +296,39 @@ class LootRoom(RoomTile):
         if self.lootable:
             self.add_loot(player)
             self.lootable = False
-        pass
+            self.schedule_events(player.world.scheduler)
+
+    def schedule_events(self, scheduler):
+        """ Puts the item back after restock_ticks. """
+        if scheduler is not None and self._event is None \
+                and not self.lootable:
+            self._event = scheduler.schedule(self.restock_ticks,
+                                             self._restock, scheduler)
+
+    def _restock(self, scheduler):
+        self._event = None
+        self.lootable = True
+
+    def save_state(self):
+        """ Returns False after the item has been picked up. """
+        return None if self.lootable else False
+
+    def restore_state(self, state):
+        self.lootable = state is None
+
+    def copy(self):
+        room = copy.copy(self)
+        room._event = None
+        room.invalidate_actions()
+        return room
 
 
 class DaggerRoom(LootRoom):
     """ A LootRoom in which a Dagger can be found. """
+    __slots__ = ()
+
     def __init__(self, x, y):
+        from adventuregame import items
         super().__init__(x, y, items.Dagger())
 
     def entry_text(self):
@@ -84,7 +340,10 @@ class DaggerRoom(LootRoom):
 
 class Find5GoldRoom(LootRoom):
     """ A LootRoom in which Gold can be found. """
+    __slots__ = ()
+
     def __init__(self, x, y):
+        from adventuregame import items
         super().__init__(x, y, items.Gold(5))
 
     def entry_text(self):
@@ -97,71 +356,170 @@ class Find5GoldRoom(LootRoom):
         player.gold += self.item.amount
 
 
-class EnemyRoom(RoomTile):
+class EnemyRoom(RoomTile, register=False):
     """ Superclass for Rooms with an enemy in it.
 
     Attributes:
         enemy (:obj:'Enemy'): The enemy object in this room.
     """
+    __slots__ = ('enemy', '_event')
+    # Ticks until a killed enemy is back, and until a wounded enemy regains
+    # regeneration_hp Health Points.
+    respawn_ticks = 100
+    regeneration_ticks = 10
+    regeneration_hp = 5
+
     def __init__(self, x, y, enemy):
         self.enemy = enemy
+        self._event = None
         super().__init__(x, y)
 
+    @classmethod
+    def create_many(cls, positions):
+        """ Builds a room of this type at every position.
+
+        Only the first room is built by the constructor. The other rooms get
+        enemies of the same type from spawn_many of the catalog and are built
+        without calling __init__.
+        """
+        if not positions:
+            return []
+        first = cls(*positions[0])
+        found = [first]
+        new = object.__new__
+        spawned = type(first.enemy).spawn_many(len(positions) - 1)
+        for (x, y), enemy in zip(positions[1:], spawned):
+            room = new(cls)
+            room.x, room.y, room._menus = x, y, None
+            room.enemy, room._event = enemy, None
+            found.append(room)
+        return found
+
     def modify_player(self, player):
-        """ Modifies the players Health Points from the attack of the enemy."""
+        """ Modifies the players Health Points from the attack of the enemy.
+
+        On a world with an arena the player joins the melee of the room
+        instead, and loses its share of the hit of the enemy.
+        """
+        arena = player.world.arena
+        if not self.enemy.is_alive():
+            hp_lost = 0
+        elif arena is not None:
+            hp_lost = arena.join(player, self)
+        else:
+            hp_lost = self.enemy.damage
+        if hp_lost:
+            player.hp = player.hp - hp_lost
+            player.out.write("The {} does {} Damage to you. You have {} HP "
+                             "remaining.", self.enemy.name, hp_lost,
+                             player.hp)
+        self.schedule_events(player.world.scheduler)
+
+    def schedule_events(self, scheduler):
+        """ Brings a killed enemy back, or heals a wounded one over time."""
+        if scheduler is None or self._event is not None:
+            return
+        if not self.enemy.is_alive():
+            self._event = scheduler.schedule(self.respawn_ticks,
+                                             self._respawn, scheduler)
+        elif self.enemy.hp < self.enemy.max_hp:
+            self._event = scheduler.schedule(self.regeneration_ticks,
+                                             self._regenerate, scheduler)
+
+    def _respawn(self, scheduler):
+        self._event = None
+        self.enemy.hp = self.enemy.max_hp
+
+    def _regenerate(self, scheduler):
+        # An enemy that was killed in the meantime respawns later instead.
+        self._event = None
         if self.enemy.is_alive():
-            player.hp = player.hp - self.enemy.damage
-            print("The {} does {} Damage to you. You have {} HP remaining."
-                  .format(self.enemy.name, self.enemy.damage, player.hp))
+            self.enemy.hp = min(self.enemy.max_hp,
+                                self.enemy.hp + self.regeneration_hp)
+        self.schedule_events(scheduler)
 
-    def available_actions(self):
+    def save_state(self):
+        """ Returns the remaining Health Points of a wounded enemy.
+
+        An enemy with all its Health Points is as it was loaded, so there is
+        nothing to keep for it.
+        """
+        if self.enemy.hp == self.enemy.max_hp:
+            return None
+        return self.enemy.hp
+
+    def restore_state(self, state):
+        self.enemy.hp = self.enemy.max_hp if state is None else state
+
+    def copy(self):
+        room = copy.copy(self)
+        room.enemy = copy.copy(self.enemy)
+        room._event = None
+        room.invalidate_actions()
+        return room
+
+    def menu_key(self):
+        return self.enemy.is_alive()
+
+    def build_actions(self):
         """ Chooses the available actions depending on the enemy's status."""
+        from adventuregame import actions
         if self.enemy.is_alive():
-            return [actions.Flee(tile=self), actions.Attack(enemy=self.enemy)]
+            return [actions.Flee(tile=self), actions.Attack(enemy=self.enemy),
+                    actions.AutoBattle(enemy=self.enemy)]
         else:
-            moves = self.adjacent_moves()
-            moves.append(actions.ViewInventory())
-            return moves
+            return super().build_actions()
 
 
 class OgreRoom(EnemyRoom):
     """ EnemyRoom with an Ogre as enemy."""
+    __slots__ = ()
+
     def __init__(self, x, y):
+        from adventuregame import enemies
         super().__init__(x, y, enemies.Ogre())
 
     def entry_text(self):
         if self.enemy.is_alive():
             return "A tall Ogre stands in your Way."
         else:
-            "The rotting Ogre still lies on the ground."
+            return "The rotting Ogre still lies on the ground."
 
 
 class WolfRoom(EnemyRoom):
     """ EnemyRoom with a Wolf as Enemy."""
+    __slots__ = ()
+
     def __init__(self, x, y):
+        from adventuregame import enemies
         super().__init__(x, y, enemies.Wolf())
 
     def entry_text(self):
         if self.enemy.is_alive():
             return "A wolf jumps right upon you."
         else:
-            "The corpse of a Wolf lies here."
+            return "The corpse of a Wolf lies here."
 
 
 class ZombieRoom(EnemyRoom):
     """ EnemyRoom with a Zombie as Enemy."""
+    __slots__ = ()
+
     def __init__(self, x, y):
+        from adventuregame import enemies
         super().__init__(x, y, enemies.Zombie())
 
     def entry_text(self):
         if self.enemy.is_alive():
             return "A Zombie slowly walks into your direction."
         else:
-            "The headless corpse is still rotting away on the ground."
+            return "The headless corpse is still rotting away on the ground."
 
 
 class EmptyRoom(RoomTile):
     """ Default Room for empty rooms."""
+    __slots__ = ()
+
     def entry_text(self):
         return "There is nothing here."
 
@@ -171,6 +529,8 @@ class EmptyRoom(RoomTile):
 
 class StartingRoom(RoomTile):
     """ The Room in which the game starts."""
+    __slots__ = ()
+
     def entry_text(self):
         return "Your eyes slowly adapt to the darkness. You find yourself " \
                "in a cave. Around you seem to be four paths."
@@ -179,12 +539,14 @@ class StartingRoom(RoomTile):
         pass
 
 
-class TraderRoom(RoomTile):
+class TraderRoom(RoomTile, register=False):
     """ Superclass for Rooms with a trader in it.
 
     Attributes:
         trader (:obj:'NPC'): A trader npc to buy and sell items.
     """
+    __slots__ = ('trader',)
+
     def __init__(self, x, y, trader):
         self.trader = trader
         super().__init__(x, y)
@@ -192,17 +554,20 @@ class TraderRoom(RoomTile):
     def modify_player(self, player):
         pass
 
-    def available_actions(self):
-        moves = self.adjacent_moves()
-        moves.append(actions.ViewInventory())
+    def build_actions(self):
+        from adventuregame import actions
+        moves = super().build_actions()
         moves.append(actions.Buy(trader=self.trader))
-        moves.append(actions.Sell())
+        moves.append(actions.Sell(trader=self.trader))
         return moves
 
 
 class WeaponRoom(TraderRoom):
     """ A TraderRoom with a Weapontrader in it."""
+    __slots__ = ()
+
     def __init__(self, x, y):
+        from adventuregame import npc
         super().__init__(x, y, npc.WeaponTrader())
 
     def entry_text(self):
@@ -211,7 +576,10 @@ class WeaponRoom(TraderRoom):
 
 class ItemRoom(TraderRoom):
     """ A TraderRoom with an Itemtrader in it."""
+    __slots__ = ()
+
     def __init__(self, x, y):
+        from adventuregame import npc
         super().__init__(x, y, npc.ItemTrader())
 
     def entry_text(self):
@@ -220,6 +588,8 @@ class ItemRoom(TraderRoom):
 
 class HealingRoom(RoomTile):
     """ A Room which heals the player to full life."""
+    __slots__ = ()
+
     def entry_text(self):
         return "You feel a healing Power flow through you. You get fully" \
                " healed."
@@ -230,6 +600,8 @@ class HealingRoom(RoomTile):
 
 class CaveExit(RoomTile):
     """ The Room with which the game ends as soon as the player reaches it."""
+    __slots__ = ()
+
     def entry_text(self):
         return "You find an exit to the cave. Be happy."
 
@@ -0,0 +1,471 @@
+"""Module that saves and restores games in a compact binary format.
+
+A snapshot holds the state of the player, the state of the player's random
+generator, the state of every room the player has changed and the pending
+timed events of those rooms, so a looted room still restocks and a killed
+enemy still respawns after the game is resumed. Writing a snapshot after
+every turn would be too expensive for a server with many sessions, so
+between two snapshots the turns are appended to a journal instead. A
+record of the journal holds the player's state, the state of the room the
+turn was played in and the pending events, which are the only things a turn
+can change. The state of the random generator is only written when the turn
+has used it::
+
+    journal = savegame.Journal('game.journal')
+    ...
+    journal.record(player, room)          # after every turn
+    journal.checkpoint(player, 'game.sav')  # now and then
+
+    player = savegame.resume('game.sav', 'game.journal')
+    journal = savegame.Journal('game.journal',
+                               savegame.snapshot_generation('game.sav'))
+
+The players have to play on a WorldOverlay, whose rooms are the rooms the
+player has changed. Both files start with a header and the names of the item
+types, so the item ids in the records stay valid when items are added to
+the game.
+
+The headers also hold the generation of the checkpoint. A checkpoint writes
+the snapshot of the next generation before it empties the journal, so after
+a crash in between, the journal still belongs to the older snapshot. Its
+records are skipped, since they would set the player back, and a journal
+that is opened for the newer snapshot starts over.
+"""
+
+
+import os
+import struct
+
+from adventuregame import items, scheduler, world
+from adventuregame.inventory import Inventory
+from adventuregame.player import Player
+
+
+SNAPSHOT_MAGIC = b'AGSV'
+JOURNAL_MAGIC = b'AGJN'
+VERSION = 3
+
+# magic, version, number of item type names and checkpoint generation.
+_HEADER = struct.Struct('<4sHHI')
+_NAME_LENGTH = struct.Struct('<H')
+# hp, gold, x, y, victory and number of items of the player.
+_PLAYER = struct.Struct('<iiIIBH')
+# Index of the item type name and the amount of gold items.
+_ITEM = struct.Struct('<Hi')
+_COUNT = struct.Struct('<I')
+# x, y, kind and value of the state of a room.
+_ROOM = struct.Struct('<IIBi')
+# Version, words and position of a random.Random, and whether it holds a
+# gauss value and the value.
+_RANDOM = struct.Struct('<B625I?d')
+_FLAG = struct.Struct('<?')
+# Whether the world ticks and the number of pending events.
+_EVENTS = struct.Struct('<?I')
+# x, y and delay of an event, followed by the name of its callback.
+_EVENT = struct.Struct('<IIi')
+
+# The kinds of room states that RoomTile.save_state returns.
+_NONE, _FALSE, _TRUE, _INT = range(4)
+
+
+class SaveFormatError(ValueError):
+    """ Raised when a snapshot or a journal can't be read. """
+
+
+def _item_types():
+    """ Returns the item classes of the game, ordered by name. """
+    found = []
+    stack = [items.Item]
+    while stack:
+        cls = stack.pop()
+        found.append(cls)
+        stack.extend(cls.__subclasses__())
+    return sorted(found, key=lambda cls: cls.__name__)
+
+
+ITEM_TYPES = _item_types()
+_ITEM_IDS = {cls: i for i, cls in enumerate(ITEM_TYPES)}
+
+
+def _write_header(magic, buffer, generation=0):
+    """ Appends the header and the item type names to the buffer. """
+    buffer += _HEADER.pack(magic, VERSION, len(ITEM_TYPES), generation)
+    for cls in ITEM_TYPES:
+        name = cls.__name__.encode('utf-8')
+        buffer += _NAME_LENGTH.pack(len(name))
+        buffer += name
+
+
+def _read_header(magic, data):
+    """ Reads the header of a snapshot or a journal.
+
+    Returns:
+        tuple: The item classes in the order of the file, the offset behind
+            the header and the checkpoint generation.
+    """
+    try:
+        file_magic, version, count, generation = _HEADER.unpack_from(data, 0)
+        offset = _HEADER.size
+        types = []
+        for _ in range(count):
+            length, = _NAME_LENGTH.unpack_from(data, offset)
+            offset += _NAME_LENGTH.size
+            name = bytes(data[offset:offset + length]).decode('utf-8')
+            types.append(getattr(items, name, None))
+            offset += length
+    except struct.error:
+        raise SaveFormatError("The header is incomplete.") from None
+    if file_magic != magic or version != VERSION:
+        raise SaveFormatError("This is not a save file of version {}."
+                              .format(VERSION))
+    return types, offset, generation
+
+
+def _pack_state(state):
+    """ Returns the kind and the value of a room state. """
+    if state is None:
+        return _NONE, 0
+    if state is True or state is False:
+        return (_TRUE if state else _FALSE), 0
+    return _INT, state
+
+
+def _unpack_state(kind, value):
+    """ Returns the room state from its kind and value. """
+    if kind == _NONE:
+        return None
+    if kind == _INT:
+        return value
+    return kind == _TRUE
+
+
+def _write_player(player, buffer):
+    """ Appends the state and the inventory of the player to the buffer. """
+    buffer += _PLAYER.pack(player.hp, player.gold, player.location_x,
+                           player.location_y, player.victory,
+                           len(player.inventory))
+    for item in player.inventory:
+        buffer += _ITEM.pack(_ITEM_IDS[type(item)],
+                             getattr(item, 'amount', 0))
+
+
+def _write_rooms(room_list, buffer):
+    """ Appends the number, positions and states of the rooms. """
+    buffer += _COUNT.pack(len(room_list))
+    for room in room_list:
+        buffer += _ROOM.pack(room.x, room.y, *_pack_state(room.save_state()))
+
+
+def _write_random(state, buffer):
+    """ Appends the state of a random generator to the buffer. """
+    version, words, gauss = state
+    buffer += _RANDOM.pack(version, *words, gauss is not None, gauss or 0.0)
+
+
+def _write_events(overlay, buffer):
+    """ Appends the pending events of the rooms of the overlay. """
+    events = overlay.save_events()
+    buffer += _EVENTS.pack(overlay.scheduler is not None, len(events))
+    for x, y, name, delay in events:
+        name = name.encode('utf-8')
+        buffer += _EVENT.pack(x, y, delay)
+        buffer += _NAME_LENGTH.pack(len(name))
+        buffer += name
+
+
+def _read_player(player, types, data, offset):
+    """ Sets the state of the player from the data, returns the new offset.
+    """
+    hp, gold, x, y, victory, count = _PLAYER.unpack_from(data, offset)
+    offset += _PLAYER.size
+    inventory = []
+    for _ in range(count):
+        type_id, amount = _ITEM.unpack_from(data, offset)
+        offset += _ITEM.size
+        cls = types[type_id]
+        if cls is None:
+            raise SaveFormatError("The save file has an unknown item.")
+        inventory.append(cls(amount) if issubclass(cls, items.Gold)
+                         else cls())
+    player.hp, player.gold, player.victory = hp, gold, bool(victory)
+    player.location_x, player.location_y = x, y
+    player.inventory = Inventory(inventory)
+    return offset
+
+
+def _read_rooms(overlay, data, offset):
+    """ Restores the rooms of the overlay, returns the new offset. """
+    count, = _COUNT.unpack_from(data, offset)
+    offset += _COUNT.size
+    for _ in range(count):
+        x, y, kind, value = _ROOM.unpack_from(data, offset)
+        offset += _ROOM.size
+        room = overlay.tile_exists(x, y)
+        if room is None:
+            raise SaveFormatError("There is no room at ({}, {}).".format(x, y))
+        room.restore_state(_unpack_state(kind, value))
+        room.invalidate_actions()
+    return offset
+
+
+def _read_random(player, data, offset):
+    """ Sets the state of the random generator of the player, returns the
+    new offset.
+    """
+    version, *words, has_gauss, gauss = _RANDOM.unpack_from(data, offset)
+    try:
+        player.random.setstate(
+            (version, tuple(words), gauss if has_gauss else None))
+    except ValueError:
+        raise SaveFormatError("The random state is invalid.") from None
+    return offset + _RANDOM.size
+
+
+def _read_events(overlay, data, offset):
+    """ Replaces the pending events of the overlay, returns the new offset.
+
+    A world that ticks gets a scheduler if it has none yet.
+    """
+    ticks, count = _EVENTS.unpack_from(data, offset)
+    offset += _EVENTS.size
+    events = []
+    for _ in range(count):
+        x, y, delay = _EVENT.unpack_from(data, offset)
+        offset += _EVENT.size
+        length, = _NAME_LENGTH.unpack_from(data, offset)
+        offset += _NAME_LENGTH.size
+        name = bytes(data[offset:offset + length]).decode('utf-8')
+        offset += length
+        if overlay.tile_exists(x, y) is None:
+            raise SaveFormatError("There is no room at ({}, {}).".format(x, y))
+        events.append((x, y, name, delay))
+    overlay.cancel_events()
+    if ticks and overlay.scheduler is None:
+        overlay.scheduler = scheduler.TimingWheel()
+    elif not ticks:
+        overlay.scheduler = None
+    overlay.restore_events(events)
+    return offset
+
+
+def dumps(player, generation=0):
+    """ Returns the snapshot of a player as bytes.
+
+    Args:
+        player (:obj:'Player'): A player who plays on a WorldOverlay.
+        generation (int): The checkpoint generation of the snapshot.
+
+    Returns:
+        bytes: The snapshot.
+    """
+    player.world.trim()
+    buffer = bytearray()
+    _write_header(SNAPSHOT_MAGIC, buffer, generation)
+    _write_player(player, buffer)
+    _write_random(player.random.getstate(), buffer)
+    _write_rooms(list(player.world.rooms.values()), buffer)
+    _write_events(player.world, buffer)
+    return bytes(buffer)
+
+
+def loads(data, out=None):
+    """ Creates a player on a new WorldOverlay from a snapshot.
+
+    The overlay gets a scheduler with the pending events of the snapshot if
+    the world of the player ticked.
+
+    Args:
+        data (bytes): The snapshot.
+        out (:obj:'Sink'): The output sink of the player.
+
+    Returns:
+        player (:obj:'Player'): The restored player.
+
+    Raises:
+        SaveFormatError: If the data is not a snapshot.
+    """
+    types, offset, _ = _read_header(SNAPSHOT_MAGIC, data)
+    player = Player(world.WorldOverlay(), out)
+    try:
+        offset = _read_player(player, types, data, offset)
+        offset = _read_random(player, data, offset)
+        offset = _read_rooms(player.world, data, offset)
+        _read_events(player.world, data, offset)
+    except (struct.error, IndexError, UnicodeDecodeError):
+        raise SaveFormatError("The snapshot is incomplete.") from None
+    player.world.trim()
+    return player
+
+
+def save(player, path, generation=0):
+    """ Writes the snapshot of a player to a file.
+
+    The file is replaced at once, so a crash leaves the old snapshot intact.
+    """
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(dumps(player, generation))
+    os.replace(temporary, path)
+
+
+def load(path, out=None):
+    """ Restores a player from a snapshot file, see loads. """
+    with open(path, 'rb') as f:
+        return loads(f.read(), out)
+
+
+class Journal:
+    """ Append-only file of the turns since the last snapshot.
+
+    Every record starts with its length, so a record that was cut off by a
+    crash is ignored when the journal is replayed.
+
+    Args:
+        path (str): Path of the journal file.
+        generation (int): The generation of the snapshot the records
+            follow, see snapshot_generation. A journal of another
+            generation is emptied. None keeps the journal as it is.
+
+    Attributes:
+        path (str): Path of the journal file.
+        generation (int): The generation of the snapshot the records
+            follow, which is counted up by every checkpoint.
+    """
+    def __init__(self, path, generation=None):
+        self.path = path
+        # The random state of the last record, None writes it with the next.
+        self._random_state = None
+        self._file = open(path, 'ab')
+        if self._file.tell() == 0:
+            self.generation = generation or 0
+            self._write_header()
+            return
+        with open(path, 'rb') as f:
+            self.generation = _read_header(JOURNAL_MAGIC, f.read())[2]
+        if generation is not None and generation != self.generation:
+            # The records belong to another snapshot.
+            self.generation = generation
+            self._file.truncate(0)
+            self._write_header()
+
+    def _write_header(self):
+        header = bytearray()
+        _write_header(JOURNAL_MAGIC, header, self.generation)
+        self._file.write(header)
+
+    def record(self, player, *changed_rooms):
+        """ Appends a turn to the journal.
+
+        Args:
+            player (:obj:'Player'): The player after the turn.
+            *changed_rooms (:obj:'RoomTile'): The rooms the turn could have
+                changed, usually the room the turn was played in.
+        """
+        buffer = bytearray(_COUNT.size)
+        _write_player(player, buffer)
+        random_state = player.random.getstate()
+        changed = random_state != self._random_state
+        buffer += _FLAG.pack(changed)
+        if changed:
+            _write_random(random_state, buffer)
+            self._random_state = random_state
+        _write_rooms(changed_rooms, buffer)
+        _write_events(player.world, buffer)
+        _COUNT.pack_into(buffer, 0, len(buffer) - _COUNT.size)
+        self._file.write(buffer)
+
+    def checkpoint(self, player, snapshot_path):
+        """ Saves a snapshot of the player and empties the journal.
+
+        The snapshot gets the next generation, so the old records are
+        skipped even if the journal isn't emptied because of a crash.
+        """
+        self._file.flush()
+        self.generation += 1
+        save(player, snapshot_path, self.generation)
+        self._file.seek(0)
+        self._file.truncate()
+        self._write_header()
+        self._random_state = None
+
+    def flush(self):
+        """ Writes the buffered records to the file. """
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def replay(player, path, generation=None):
+    """ Applies the records of a journal to a player.
+
+    Args:
+        player (:obj:'Player'): The player restored from the last snapshot.
+        path (str): Path of the journal file.
+        generation (int): The generation of the snapshot. The journal is
+            skipped if it belongs to another one. None replays any journal.
+
+    Returns:
+        int: The number of records that were replayed.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if not data:
+        return 0
+    types, offset, journal_generation = _read_header(JOURNAL_MAGIC, data)
+    if generation is not None and journal_generation != generation:
+        return 0
+    records = 0
+    while offset + _COUNT.size <= len(data):
+        length, = _COUNT.unpack_from(data, offset)
+        start = offset + _COUNT.size
+        if start + length > len(data):
+            break
+        record = memoryview(data)[start:start + length]
+        try:
+            _read_record(player, types, record)
+        except (struct.error, IndexError, UnicodeDecodeError):
+            raise SaveFormatError("A record of the journal is invalid.") \
+                from None
+        offset = start + length
+        records += 1
+    player.world.trim()
+    return records
+
+
+def _read_record(player, types, record):
+    """ Applies one record of a journal to the player. """
+    offset = _read_player(player, types, record, 0)
+    changed, = _FLAG.unpack_from(record, offset)
+    offset += _FLAG.size
+    if changed:
+        offset = _read_random(player, record, offset)
+    offset = _read_rooms(player.world, record, offset)
+    _read_events(player.world, record, offset)
+
+
+def snapshot_generation(path):
+    """ Returns the checkpoint generation of a snapshot file. """
+    with open(path, 'rb') as f:
+        return _read_header(SNAPSHOT_MAGIC, f.read())[2]
+
+
+def resume(snapshot_path, journal_path, out=None):
+    """ Loads the last snapshot and replays the journal written since.
+
+    Returns:
+        player (:obj:'Player'): The player as of the last recorded turn.
+    """
+    with open(snapshot_path, 'rb') as f:
+        data = f.read()
+    player = loads(data, out)
+    if os.path.exists(journal_path):
+        replay(player, journal_path,
+               _read_header(SNAPSHOT_MAGIC, data)[2])
+    return player
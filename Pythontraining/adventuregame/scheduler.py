@@ -0,0 +1,129 @@
+"""Module with the scheduler of the timed events of the world.
+
+Rooms register events for a later tick, for example the respawn of a killed
+enemy, and the game loops advance the clock by one tick per turn. The
+scheduler is a hierarchical timing wheel: level 0 has a bucket for each of
+the next `slots` ticks, and every higher level has buckets that span
+`slots` times as many ticks as the buckets of the level below. A bucket of a
+higher level is moved down a level when the clock reaches it, so every
+event is moved at most once per level and a tick only costs time for the
+events that are due, not for all the rooms or all the events.
+"""
+
+
+class Event:
+    """ A callback that is due at a tick.
+
+    Attributes:
+        due (int): The tick at which the callback is called.
+        callback: The function that is called.
+        args (tuple): The arguments of the callback.
+        cancelled (bool): True if the event has been cancelled.
+    """
+    __slots__ = ('due', 'callback', 'args', 'cancelled')
+
+    def __init__(self, due, callback, args):
+        self.due = due
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+
+class TimingWheel:
+    """ Scheduler for events that are due after a number of ticks.
+
+    Events that are due later than slots ** levels ticks wait in an overflow
+    list, which is looked at whenever the top level has gone round once.
+
+    Attributes:
+        now (int): The current tick.
+        pending (int): Number of events that are scheduled and not
+            cancelled.
+    """
+    def __init__(self, slots=64, levels=4):
+        self.now = 0
+        self.pending = 0
+        self._slots = slots
+        self._levels = levels
+        self._wheels = [[[] for _ in range(slots)] for _ in range(levels)]
+        self._horizon = slots ** levels
+        self._overflow = []
+
+    def schedule(self, delay, callback, *args):
+        """ Calls the callback with the arguments after delay ticks.
+
+        Args:
+            delay (int): Number of ticks, at least 1.
+            callback: The function to call.
+
+        Returns:
+            event (:obj:'Event'): The event, which can be cancelled.
+        """
+        event = Event(self.now + max(1, delay), callback, args)
+        self._insert(event)
+        self.pending += 1
+        return event
+
+    def cancel(self, event):
+        """ Makes sure the callback of the event is not called. """
+        if not event.cancelled:
+            event.cancelled = True
+            self.pending -= 1
+
+    def events(self):
+        """ Returns the events that are scheduled and not cancelled. """
+        found = [event for wheel in self._wheels for bucket in wheel
+                 for event in bucket if not event.cancelled]
+        found.extend(event for event in self._overflow if not event.cancelled)
+        return found
+
+    def _insert(self, event):
+        """ Puts the event into the lowest level whose buckets reach it. """
+        delay = event.due - self.now
+        span = 1
+        for wheel in self._wheels:
+            if delay < span * self._slots:
+                wheel[event.due // span % self._slots].append(event)
+                return
+            span *= self._slots
+        self._overflow.append(event)
+
+    def _cascade(self):
+        """ Moves the buckets the clock has reached down a level. """
+        span = self._horizon
+        if self.now % span == 0 and self._overflow:
+            waiting, self._overflow = self._overflow, []
+            for event in waiting:
+                self._insert(event)
+        for level in range(self._levels - 1, 0, -1):
+            span //= self._slots
+            if self.now % span == 0:
+                wheel = self._wheels[level]
+                index = self.now // span % self._slots
+                bucket, wheel[index] = wheel[index], []
+                for event in bucket:
+                    self._insert(event)
+
+    def advance(self, ticks=1):
+        """ Moves the clock forward and calls the callbacks that are due.
+
+        Callbacks may schedule new events, which are due one tick later at
+        the earliest.
+
+        Returns:
+            int: The number of callbacks that were called.
+        """
+        called = 0
+        first = self._wheels[0]
+        for _ in range(ticks):
+            self.now += 1
+            self._cascade()
+            index = self.now % self._slots
+            bucket, first[index] = first[index], []
+            for event in bucket:
+                if not event.cancelled:
+                    event.cancelled = True
+                    self.pending -= 1
+                    event.callback(*event.args)
+                    called += 1
+        return called
@@ -0,0 +1,263 @@
+"""Module that lets many players play the game over the network at once.
+
+Every connection gets its own Player and is played by a session coroutine,
+so a single process can host thousands of players. The output of a player
+is collected in a BufferSink and sent whenever the player is asked for
+input. Every session plays on
+its own WorldOverlay of the world that has been loaded with
+world.load_tiles. Start the server with
+``python -m adventuregame.server --port 4000`` and connect with any line
+based client, for example ``nc localhost 4000``.
+
+The lines of a player go through the read function of the Player like in
+the terminal game, so a session can be recorded by wrapping it in a
+Recorder (see the recording module). With ``--record DIRECTORY`` every
+session is written to a recording file in the directory.
+"""
+
+
+import asyncio
+import contextlib
+import os
+import random
+
+from adventuregame import actions, game, output, recording, scheduler, world
+from adventuregame.player import Player
+
+
+class LineTooLongError(Exception):
+    """ Raised when a client sends a line that is longer than the limit. """
+
+
+class Session:
+    """ The game of one connected player.
+
+    Attributes:
+        world (:obj:'WorldOverlay'): The rooms this session has changed,
+            which tick once per turn like the terminal game.
+        player (:obj:'Player'): The player of this session.
+        turns (int): Number of actions the player has made.
+        out (:obj:'BufferSink'): The output that hasn't been sent yet.
+    """
+    def __init__(self, reader, writer, read_timeout, write_timeout,
+                 seed=None):
+        self.world = world.WorldOverlay(scheduler.TimingWheel())
+        self.out = output.BufferSink()
+        self.player = Player(self.world, self.out, seed, self._received)
+        self.turns = 0
+        self._line = None
+        self._reader = reader
+        self._writer = writer
+        self._read_timeout = read_timeout
+        self._write_timeout = write_timeout
+
+    async def send(self, text=''):
+        """ Sends the collected output and then the text to the player.
+
+        Waits while the output buffer of the connection is full, so a slow
+        client can't make the server buffer unlimited output for it.
+
+        Raises:
+            asyncio.TimeoutError: If the client doesn't read the output in
+                time.
+        """
+        data = self.out.take() + text.encode('utf-8')
+        if data:
+            self._writer.write(data)
+            await asyncio.wait_for(self._writer.drain(), self._write_timeout)
+
+    def _received(self, prompt):
+        """ The read function of the player, returns the line ask received.
+        """
+        return self._line
+
+    async def ask(self, prompt):
+        """ Sends the prompt and waits for the next line of the player.
+
+        The line is passed through the read function of the player, which
+        may record it.
+
+        Returns:
+            str: The line without surrounding whitespace.
+
+        Raises:
+            EOFError: If the player has closed the connection.
+            asyncio.TimeoutError: If the player doesn't answer in time.
+            LineTooLongError: If the line is longer than the line limit.
+        """
+        await self.send(prompt)
+        try:
+            line = await asyncio.wait_for(self._reader.readline(),
+                                          self._read_timeout)
+        except ValueError:
+            # StreamReader.readline reports a line over its limit this way.
+            raise LineTooLongError() from None
+        if not line:
+            raise EOFError()
+        self._line = line.decode('utf-8', 'replace').strip()
+        return self.player.read(prompt)
+
+    async def run(self):
+        """ The game loop of game.play, with the network instead of stdin."""
+        player = self.player
+        room = self.world.tile_exists(player.location_x, player.location_y)
+        self.out.write(room.entry_text())
+        while player.is_alive() and not player.victory:
+            self.world.trim()
+            self.world.tick()
+            room = self.world.tile_exists(player.location_x,
+                                          player.location_y)
+            room.modify_player(player)
+
+            # Check again since the room could have changed the player's state
+            if player.is_alive() and not player.victory:
+                await self.make_action(room)
+        await self.send()
+
+    async def make_action(self, room):
+        """ Asks for an action until a valid one is chosen and executes it.
+
+        Buying and selling ask for the item without blocking the server.
+        """
+        player = self.player
+        game.print_menu(room, self.out)
+        while True:
+            action = room.action_for_hotkey(await self.ask('Action: '))
+            if action is not None:
+                break
+            self.out.write("This is not a valid action.")
+
+        if isinstance(action, actions.Buy):
+            trader = action.kwargs['trader']
+            trader.print_inventory(self.out)
+            player.buy_item(trader, await self.ask("Choose an item: "))
+        elif isinstance(action, actions.Sell):
+            player.print_inventory()
+            player.sell_item(action.kwargs['trader'],
+                             await self.ask("Choose item to sell: "))
+        else:
+            player.do_action(action, **action.kwargs)
+        self.turns += 1
+
+
+class GameServer:
+    """ Accepts connections and runs a Session for every one of them.
+
+    The world has to be loaded before the server is started.
+
+    Attributes:
+        read_timeout (float): Seconds a player may take to answer a prompt.
+        write_timeout (float): Seconds a client may take to read its output
+            before it is disconnected as too slow.
+        write_buffer (int): Bytes that are buffered per connection before a
+            session waits for the client.
+        line_limit (int): Longest line a client may send.
+        record_directory (str): The directory every session is recorded
+            to, as session-<number>.rec. None records nothing.
+        active_sessions (int): Number of sessions that are running.
+        finished_sessions (int): Number of sessions that have ended.
+        turns (int): Number of actions made in all ended sessions.
+    """
+    def __init__(self, read_timeout=300.0, write_timeout=10.0,
+                 write_buffer=64 * 1024, line_limit=1024,
+                 record_directory=None):
+        self.read_timeout = read_timeout
+        self.write_timeout = write_timeout
+        self.write_buffer = write_buffer
+        self.line_limit = line_limit
+        self.record_directory = record_directory
+        self.active_sessions = 0
+        self._started_sessions = 0
+        self.finished_sessions = 0
+        self.turns = 0
+        self._server = None
+
+    async def start(self, host='127.0.0.1', port=0, path=None):
+        """ Starts listening on TCP, or on a Unix socket if a path is given.
+
+        Args:
+            host (str): The address to listen on.
+            port (int): The TCP port, 0 picks a free one.
+            path (str): The path of the Unix socket.
+
+        Returns:
+            self
+        """
+        if path is not None:
+            self._server = await asyncio.start_unix_server(
+                self._handle, path, limit=self.line_limit)
+        else:
+            self._server = await asyncio.start_server(
+                self._handle, host, port, limit=self.line_limit)
+        return self
+
+    @property
+    def port(self):
+        """ The TCP port the server listens on. """
+        return self._server.sockets[0].getsockname()[1]
+
+    async def _handle(self, reader, writer):
+        """ Runs the session of a new connection until it ends. """
+        writer.transport.set_write_buffer_limits(high=self.write_buffer)
+        seed, rec = None, None
+        if self.record_directory is not None:
+            seed = random.randrange(2 ** 32)
+            rec = recording.Recording(seed)
+        session = Session(reader, writer, self.read_timeout,
+                          self.write_timeout, seed)
+        if rec is not None:
+            session.player.read = recording.Recorder(rec, session.player.read)
+        self._started_sessions += 1
+        number = self._started_sessions
+        self.active_sessions += 1
+        try:
+            await session.run()
+        except (asyncio.TimeoutError, ConnectionError, EOFError,
+                LineTooLongError):
+            # The player left, was too slow, or sent a line that is too long.
+            pass
+        finally:
+            self.active_sessions -= 1
+            self.finished_sessions += 1
+            self.turns += session.turns
+            if rec is not None:
+                rec.result = recording.result_of(session.player)
+                rec.dump(os.path.join(self.record_directory,
+                                      'session-{}.rec'.format(number)))
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    async def close(self):
+        """ Stops accepting connections. """
+        self._server.close()
+        await self._server.wait_closed()
+
+
+def main(argv=None):
+    """ Command line entry point that loads the world and runs the server."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=4000)
+    parser.add_argument('--unix', default=None,
+                        help="Listen on this Unix socket instead of TCP.")
+    parser.add_argument('--record', default=None, metavar='DIRECTORY',
+                        help="Record every session into this directory.")
+    args = parser.parse_args(argv)
+
+    async def serve():
+        world.load_tiles()
+        server = await GameServer(record_directory=args.record).start(
+            args.host, args.port, args.unix)
+        await server.serve_forever()
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+"""Module that spreads the sessions of one world over worker processes.
+
+The rows of the map are split into as many bands as there are workers, and
+every worker owns the players that stand in its band. A worker runs the
+game loop of the server for its players, one message per input line, so
+the workers play their players on all cores at once. When a turn ends in
+the band of another worker, the player is handed off: the worker replies
+with the snapshot of the player (see the savegame module), which holds the
+state of its random generator and the pending events of its rooms, and the
+coordinator passes it to the owner of the new position, which plays on from
+there.
+
+The coordinator routes the input lines of the sessions to the workers over
+local pipes, one batch of messages per worker and round::
+
+    with sharding.Coordinator(shards=4) as coordinator:
+        session = coordinator.start(seed=1)
+        text, result = coordinator.send(session, 'n')
+
+Every player plays on its own WorldOverlay of the world, which ticks once
+per turn, as on the server, so the players of one world don't meet and
+the workers don't share any state of the world. What the bands buy is
+memory locality: by default every worker opens the map with
+world.load_paged, so it only builds the regions its players walk through,
+which are the regions of its band. With paged=False every worker loads the
+whole map and the split only balances the sessions over the workers.
+"""
+
+
+import time
+
+from adventuregame import (actions, game, output, recording, savegame,
+                           scheduler, world)
+from adventuregame.player import Player
+
+
+def region_owner(y, height, shards):
+    """ Returns the index of the worker that owns row y of the map. """
+    return min(shards - 1, y * shards // max(height, 1))
+
+
+class ShardSession:
+    """ The game of one player while it is played by a worker.
+
+    Attributes:
+        player (:obj:'Player'): The player, on its own WorldOverlay.
+        out (:obj:'BufferSink'): The output that hasn't been sent yet.
+        turns (int): Number of actions the player has made.
+        trade: The pending Buy or Sell action while the worker waits for the
+            name of an item, otherwise None.
+    """
+    def __init__(self, player, turns=0):
+        self.player = player
+        self.out = player.out
+        self.turns = turns
+        self.trade = None
+
+
+class Shard:
+    """ The players of one band of rows of the loaded world.
+
+    A message is a tuple of its kind, the session id and its arguments:
+
+    * ('start', session, seed) creates a new player,
+    * ('input', session, line) is a line the user typed,
+    * ('adopt', session, snapshot, turns) takes over a player that was
+      handed off by another worker.
+
+    Every message is answered with one reply:
+
+    * ('prompt', session, text) asks the user for the next line,
+    * ('end', session, text, result) when the game has ended,
+    * ('handoff', session, owner, text, snapshot, turns) when the player
+      has to be adopted by the worker owner.
+
+    Attributes:
+        index (int): The index of this worker.
+        shards (int): The number of workers.
+        sessions (dict): The sessions of this worker by session id.
+    """
+    def __init__(self, index, shards):
+        self.index = index
+        self.shards = shards
+        self.sessions = {}
+
+    def handle(self, message):
+        """ Handles one message and returns the reply. """
+        kind, session_id = message[0], message[1]
+        if kind == 'input':
+            return self._input(session_id, message[2])
+        if kind == 'adopt':
+            snapshot, turns = message[2:]
+            player = savegame.loads(snapshot, output.BufferSink())
+            session = self.sessions[session_id] = ShardSession(player, turns)
+            return self._begin_turn(session_id, session)
+        if kind == 'start':
+            player = Player(world.WorldOverlay(scheduler.TimingWheel()),
+                            output.BufferSink(), message[2])
+            session = self.sessions[session_id] = ShardSession(player)
+            room = player.world.tile_exists(player.location_x,
+                                            player.location_y)
+            session.out.write(room.entry_text())
+            return self._route(session_id, session)
+        raise ValueError("Unknown message {!r}".format(kind))
+
+    def _route(self, session_id, session):
+        """ Plays on, or hands the player off if the player left the band.
+        """
+        if region_owner(session.player.location_y, world.height,
+                        self.shards) == self.index:
+            return self._begin_turn(session_id, session)
+        del self.sessions[session_id]
+        player = session.player
+        return ('handoff', session_id,
+                region_owner(player.location_y, world.height, self.shards),
+                session.out.take(), savegame.dumps(player), session.turns)
+
+    def _begin_turn(self, session_id, session):
+        """ Lets the room modify the player and asks for the next action."""
+        player = session.player
+        player.world.trim()
+        player.world.tick()
+        room = player.world.tile_exists(player.location_x, player.location_y)
+        room.modify_player(player)
+        if not player.is_alive() or player.victory:
+            del self.sessions[session_id]
+            return ('end', session_id, session.out.take(),
+                    recording.result_of(player))
+        game.print_menu(room, session.out)
+        return self._prompt(session_id, session, 'Action: ')
+
+    def _prompt(self, session_id, session, prompt):
+        return ('prompt', session_id,
+                session.out.take() + prompt.encode('utf-8'))
+
+    def _input(self, session_id, line):
+        """ Does what the line asks for, like Session.make_action. """
+        session = self.sessions[session_id]
+        player = session.player
+        if session.trade is not None:
+            action, session.trade = session.trade, None
+            if isinstance(action, actions.Buy):
+                player.buy_item(action.kwargs['trader'], line)
+            else:
+                player.sell_item(action.kwargs['trader'], line)
+            return self._end_turn(session_id, session)
+
+        room = player.world.tile_exists(player.location_x, player.location_y)
+        action = room.action_for_hotkey(line)
+        if action is None:
+            session.out.write("This is not a valid action.")
+            return self._prompt(session_id, session, 'Action: ')
+        if isinstance(action, actions.Buy):
+            action.kwargs['trader'].print_inventory(session.out)
+            session.trade = action
+            return self._prompt(session_id, session, "Choose an item: ")
+        if isinstance(action, actions.Sell):
+            player.print_inventory()
+            session.trade = action
+            return self._prompt(session_id, session, "Choose item to sell: ")
+        player.do_action(action, **action.kwargs)
+        return self._end_turn(session_id, session)
+
+    def _end_turn(self, session_id, session):
+        session.turns += 1
+        return self._route(session_id, session)
+
+
+def _serve(index, shards, path, paged, connection):
+    """ The main function of a worker process.
+
+    Opens the world, paged or dense, and answers every batch of messages
+    with the list of the replies, until it receives None.
+    """
+    if paged:
+        world.load_paged(path)
+    else:
+        world.load_tiles(path)
+    shard = Shard(index, shards)
+    while True:
+        batch = connection.recv()
+        if batch is None:
+            break
+        connection.send([shard.handle(message) for message in batch])
+    connection.close()
+
+
+class Coordinator:
+    """ Starts the workers and routes the sessions to them.
+
+    Every worker gets the messages of a round as one batch over its pipe,
+    and all workers play their batches at the same time. Handed off players
+    are adopted by their new worker in the next round of the same call.
+
+    Args:
+        shards (int): The number of worker processes. Defaults to the
+            number of CPUs.
+        path (str): Path to the map file.
+        paged (bool): If True, the workers open the map with
+            world.load_paged and only build the regions of their band,
+            otherwise every worker loads the whole map.
+
+    Attributes:
+        shards (int): The number of worker processes.
+        owners (dict): The worker that plays each running session.
+    """
+    def __init__(self, shards=None, path=world.MAP_PATH, paged=True):
+        import multiprocessing
+
+        self.shards = shards or multiprocessing.cpu_count()
+        self.owners = {}
+        self._next_session = 0
+        self._connections = []
+        self._processes = []
+        for index in range(self.shards):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_serve, args=(index, self.shards, path, paged, child),
+                daemon=True)
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+
+    def _round(self, messages):
+        """ Sends the messages to their workers and returns the replies. """
+        batches = {}
+        for message in messages:
+            batches.setdefault(self.owners[message[1]], []).append(message)
+        for index, batch in batches.items():
+            self._connections[index].send(batch)
+        replies = []
+        for index in batches:
+            replies.extend(self._connections[index].recv())
+        return replies
+
+    def play(self, messages):
+        """ Plays the messages and the handoffs they cause.
+
+        Args:
+            messages (:obj:'list' of :obj:'tuple'): Start and input messages
+                of sessions that are waiting for input, see Shard.
+
+        Returns:
+            dict: The text to show and the Result of the game, None while the
+                game is running, by session id.
+        """
+        results = {}
+        texts = {}
+        while messages:
+            handoffs = []
+            for reply in self._round(messages):
+                kind, session_id, *values = reply
+                if kind == 'handoff':
+                    owner, text, snapshot, turns = values
+                    texts[session_id] = texts.get(session_id, b'') + text
+                    self.owners[session_id] = owner
+                    handoffs.append(('adopt', session_id, snapshot, turns))
+                    continue
+                text = (texts.pop(session_id, b'') + values[0]).decode(
+                    'utf-8')
+                if kind == 'end':
+                    del self.owners[session_id]
+                    results[session_id] = (text, values[1])
+                else:
+                    results[session_id] = (text, None)
+            messages = handoffs
+        return results
+
+    def start_many(self, seeds):
+        """ Starts a session for every seed.
+
+        Returns:
+            dict: The first text and Result of every session, by session id.
+        """
+        messages = []
+        for seed in seeds:
+            session_id = self._next_session
+            self._next_session += 1
+            # The first worker hands the player to the owner of the start.
+            self.owners[session_id] = 0
+            messages.append(('start', session_id, seed))
+        return self.play(messages)
+
+    def start(self, seed=None):
+        """ Starts a session and returns its id. """
+        session_id, = self.start_many([seed])
+        return session_id
+
+    def send(self, session_id, line):
+        """ Sends a line of a session.
+
+        Returns:
+            tuple: The text to show and the Result, None while the game is
+                running.
+        """
+        return self.play([('input', session_id, line)])[session_id]
+
+    def close(self):
+        """ Stops the workers. """
+        for connection in self._connections:
+            connection.send(None)
+            connection.close()
+        for process in self._processes:
+            process.join()
+        self._connections.clear()
+        self._processes.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main(argv=None):
+    """ Command line entry point that plays random sessions on the shards."""
+    import argparse
+    import random
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--shards', type=int, default=None)
+    parser.add_argument('--sessions', type=int, default=1000)
+    parser.add_argument('--rounds', type=int, default=200)
+    parser.add_argument('--dense', action='store_true',
+                        help="load the whole map in every worker")
+    parser.add_argument('path', nargs='?', default=world.MAP_PATH)
+    args = parser.parse_args(argv)
+
+    choices = random.Random(0)
+    lines = 'nsewiaf'
+    with Coordinator(args.shards, args.path,
+                     not args.dense) as coordinator:
+        start = time.perf_counter()
+        running = coordinator.start_many(range(args.sessions))
+        inputs = 0
+        for _ in range(args.rounds):
+            active = [session_id for session_id, (text, result)
+                      in running.items() if result is None]
+            if not active:
+                break
+            inputs += len(active)
+            running = coordinator.play([
+                ('input', session_id, choices.choice(lines))
+                for session_id in active])
+        seconds = time.perf_counter() - start
+    print("{} workers played {} inputs in {:.2f} s, {:.0f} per second."
+          .format(coordinator.shards, inputs, seconds, inputs / seconds))
+
+
+if __name__ == "__main__":
+    main()
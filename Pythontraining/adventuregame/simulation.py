@@ -0,0 +1,323 @@
+"""Module to play the game headless, for example to test the game balance.
+
+The playthroughs are driven by Policy objects instead of the keyboard and can
+be spread over a pool of processes. Run it with
+``python -m adventuregame.simulation --runs 100000``.
+"""
+
+
+import collections
+import random
+
+from adventuregame import actions, output, pathfinding, scheduler, world
+from adventuregame.player import Player
+
+
+class Policy:
+    """ Superclass for all policies that play the game instead of the user.
+
+    Attributes:
+        ticks (bool): False if the policy can only play a world that doesn't
+            tick, None if it plays either.
+    """
+    ticks = None
+
+    def choose_action(self, player, room, available_actions):
+        """ Chooses one of the available actions in the room.
+
+        Args:
+            player: The player whose turn it is.
+            room: The room the player is standing in.
+            available_actions (:obj:'list' of :obj:'Action'): The actions the
+                room offers.
+
+        Returns:
+            action (:obj:'Action'): One of the available actions.
+        """
+        raise NotImplementedError()
+
+    def choose_item(self, player, item_names):
+        """ Chooses the name of the item to buy or sell.
+
+        Args:
+            player: The player who is trading.
+            item_names (:obj:'list' of :obj:'str'): The names of the items
+                that are offered.
+
+        Returns:
+            str: The name typed in instead of the user.
+        """
+        raise NotImplementedError()
+
+
+class RandomPolicy(Policy):
+    """ Policy that chooses every action and item at random.
+
+    Attributes:
+        random (:obj:'random.Random'): The random generator of the policy.
+    """
+    def __init__(self, seed=None):
+        self.random = random.Random(seed)
+
+    def choose_action(self, player, room, available_actions):
+        return self.random.choice(available_actions)
+
+    def choose_item(self, player, item_names):
+        if not item_names:
+            return ''
+        return self.random.choice(item_names)
+
+
+class ScriptedPolicy(RandomPolicy):
+    """ Policy that plays a fixed list of hotkeys and item names.
+
+    If the next hotkey is not available in the room, or the script has ended,
+    a random action is chosen instead.
+
+    Attributes:
+        hotkeys (:obj:'list' of :obj:'str'): The hotkeys to play in order.
+        item_names (:obj:'list' of :obj:'str'): The item names to type in
+            order whenever an item is bought or sold.
+    """
+    def __init__(self, hotkeys, item_names=(), seed=None):
+        self.hotkeys = collections.deque(hotkeys)
+        self.item_names = collections.deque(item_names)
+        super().__init__(seed)
+
+    def choose_action(self, player, room, available_actions):
+        if self.hotkeys:
+            hotkey = self.hotkeys.popleft()
+            for action in available_actions:
+                if action.hotkey == hotkey:
+                    return action
+        return super().choose_action(player, room, available_actions)
+
+    def choose_item(self, player, item_names):
+        if self.item_names:
+            return self.item_names.popleft()
+        return super().choose_item(player, item_names)
+
+
+class TravelPolicy(RandomPolicy):
+    """ Policy that fights every enemy and walks the shortest way to a room.
+
+    The way is looked up in the distance fields of the world graph. Actions
+    that are neither attacking nor the next move are chosen at random.
+
+    Attributes:
+        room_name (str): Name of the room type the policy travels to.
+    """
+    def __init__(self, room_name='CaveExit', seed=None):
+        self.room_name = room_name
+        super().__init__(seed)
+
+    def choose_action(self, player, room, available_actions):
+        for action in available_actions:
+            if isinstance(action, actions.Attack):
+                return action
+        move = pathfinding.world_graph().next_move(
+            self.room_name, player.location_x, player.location_y)
+        if move in available_actions:
+            return move
+        return super().choose_action(player, room, available_actions)
+
+
+Outcome = collections.namedtuple('Outcome', ['victory', 'turns', 'death_room'])
+Outcome.__doc__ = """ The result of a single playthrough.
+
+Attributes:
+    victory (bool): True if the player reached the exit.
+    turns (int): The number of actions the player made.
+    death_room (str): Name of the room the player died in, None if the player
+        survived.
+"""
+
+
+class BatchReport:
+    """ The aggregated outcomes of many playthroughs.
+
+    Attributes:
+        runs (int): Number of finished playthroughs.
+        wins (int): Number of playthroughs that reached the exit.
+        timeouts (int): Number of playthroughs stopped after max_turns.
+        turns (int): Sum of the turns over all playthroughs.
+        deaths (:obj:'collections.Counter'): Deaths per room name.
+    """
+    def __init__(self):
+        self.runs = 0
+        self.wins = 0
+        self.timeouts = 0
+        self.turns = 0
+        self.deaths = collections.Counter()
+
+    def add(self, outcome):
+        """ Adds the outcome of one playthrough to the report. """
+        self.runs += 1
+        self.turns += outcome.turns
+        if outcome.victory:
+            self.wins += 1
+        elif outcome.death_room is not None:
+            self.deaths[outcome.death_room] += 1
+        else:
+            self.timeouts += 1
+
+    def merge(self, other):
+        """ Adds all the outcomes of another report to this report. """
+        self.runs += other.runs
+        self.wins += other.wins
+        self.timeouts += other.timeouts
+        self.turns += other.turns
+        self.deaths.update(other.deaths)
+
+    @property
+    def win_rate(self):
+        return self.wins / self.runs if self.runs else 0.0
+
+    @property
+    def mean_turns(self):
+        return self.turns / self.runs if self.runs else 0.0
+
+    def __str__(self):
+        lines = ["Runs: {}".format(self.runs),
+                 "Win rate: {:.2%}".format(self.win_rate),
+                 "Mean turns: {:.1f}".format(self.mean_turns),
+                 "Timeouts: {}".format(self.timeouts),
+                 "Deaths per room:"]
+        for room_name, deaths in self.deaths.most_common():
+            lines.append("    {}: {}".format(room_name, deaths))
+        return "\n".join(lines)
+
+
+def take_action(player, room, policy):
+    """ Lets the policy choose an action and executes it for the player.
+
+    Buying and selling ask the policy for the item name instead of input().
+    """
+    action = policy.choose_action(player, room, room.available_actions())
+    if isinstance(action, actions.Buy):
+        item_names = [item.name for item in action.kwargs['trader'].inventory]
+        player.do_action(action, item_name=policy.choose_item(
+            player, item_names), **action.kwargs)
+    elif isinstance(action, actions.Sell):
+        item_names = [item.name for item in player.inventory]
+        player.do_action(action, item_name=policy.choose_item(
+            player, item_names), **action.kwargs)
+    else:
+        player.do_action(action, **action.kwargs)
+
+
+def play_headless(policy, max_turns=1000, seed=None, ticks=True):
+    """ Plays one game with the policy in place of the user.
+
+    The loop is the same as in game.play, but the output is written to a
+    NullSink, so it is neither formatted nor printed. The
+    world has to be loaded; the game is played on a WorldOverlay, so the
+    loaded world is left as it is for the next playthrough.
+
+    Args:
+        policy (:obj:'Policy'): The policy that chooses the actions.
+        max_turns (int): The playthrough is stopped after this many turns.
+        seed (int): Seed for the random generator of the player, which
+            decides where the player flees to.
+        ticks (bool): If True, the world ticks once per turn, as in the
+            terminal game, so enemies respawn and items restock. False
+            plays without any timed events.
+
+    Returns:
+        outcome (:obj:'Outcome'): The outcome of the playthrough.
+
+    Raises:
+        ValueError: If ticks is True and the policy only plays a world
+            without ticks, like the SolverPolicy.
+    """
+    if ticks and policy.ticks is False:
+        raise ValueError("{} can't play a world that ticks."
+                         .format(type(policy).__name__))
+    overlay = world.WorldOverlay(scheduler.TimingWheel() if ticks else None)
+    player = Player(overlay, output.NullSink(), seed)
+    turns = 0
+    room = None
+    while player.is_alive() and not player.victory and turns < max_turns:
+        overlay.trim()
+        overlay.tick()
+        room = overlay.tile_exists(player.location_x, player.location_y)
+        room.modify_player(player)
+        if player.is_alive() and not player.victory:
+            take_action(player, room, policy)
+            turns += 1
+    death_room = None if player.is_alive() else type(room).__name__
+    return Outcome(player.victory, turns, death_room)
+
+
+def _init_worker():
+    """ Loads the map once in every worker process of the pool. """
+    world.load_tiles()
+
+
+def _play_chunk(args):
+    """ Plays the runs start to stop in a worker and reports them together.
+
+    The map has to be loaded in the process by _init_worker.
+    """
+    policy_factory, start, stop, max_turns, seed = args
+    report = BatchReport()
+    for run in range(start, stop):
+        run_seed = seed + run
+        report.add(play_headless(policy_factory(seed=run_seed), max_turns,
+                                 run_seed))
+    return report
+
+
+def run_batch(policy_factory=RandomPolicy, runs=1000, processes=None,
+              max_turns=1000, seed=0, chunk_size=None):
+    """ Plays many headless games, spread over a pool of processes.
+
+    Args:
+        policy_factory: Picklable callable that is called with the keyword
+            argument seed and returns the Policy for one playthrough.
+        runs (int): The number of playthroughs.
+        processes (int): The number of worker processes. Defaults to the
+            number of CPUs, 1 plays all runs in this process.
+        max_turns (int): Every playthrough is stopped after this many turns.
+        seed (int): Run i is played with the seed seed + i.
+        chunk_size (int): Number of runs a worker plays before it reports.
+
+    Returns:
+        report (:obj:'BatchReport'): The aggregated outcomes.
+    """
+    import multiprocessing
+
+    processes = processes or multiprocessing.cpu_count()
+    if chunk_size is None:
+        chunk_size = max(1, min(1000, runs // (processes * 4)))
+    chunks = [(policy_factory, start, min(start + chunk_size, runs),
+               max_turns, seed) for start in range(0, runs, chunk_size)]
+
+    report = BatchReport()
+    if processes == 1:
+        _init_worker()
+        for chunk in chunks:
+            report.merge(_play_chunk(chunk))
+        return report
+    with multiprocessing.Pool(processes, _init_worker) as pool:
+        for chunk_report in pool.imap_unordered(_play_chunk, chunks):
+            report.merge(chunk_report)
+    return report
+
+
+def main(argv=None):
+    """ Command line entry point that prints the report of a batch run. """
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=1000)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--max-turns', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    print(run_batch(RandomPolicy, args.runs, args.processes, args.max_turns,
+                    args.seed))
+
+
+if __name__ == "__main__":
+    main()
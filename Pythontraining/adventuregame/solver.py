@@ -0,0 +1,414 @@
+"""Module that computes the best possible strategy for the loaded map.
+
+The solver searches the states of a game: the position, hp and gold of the
+player, the items in the inventory, which loot has been picked up and how
+much hp every enemy has left. From every state it tries every action the
+room offers, with the room and player code of the game itself, and takes
+the expectation over the rooms Player.flee can end up in. The result is the
+exact probability to reach the exit within a number of turns when always
+choosing the best action, and the best action for every state.
+
+The solver models the game without ticks: enemies don't regenerate or
+respawn and loot doesn't restock, since the state holds no clock. The
+result is only exact for a game played with ticks=False, so SolverPolicy
+refuses to play a world that ticks.
+
+A state is packed into a few bytes. The values of the states are kept in a
+transposition table, so a state that is reached on different ways is only
+searched once; when the table is full, the states with the fewest turns
+left are dropped first, since they are the cheapest to search again. States
+from which the exit is too far away for the turns left are cut off with the
+distance field of the pathfinding module::
+
+    python -m adventuregame.solver --turns 17
+
+The search runs in one process. Most states are reached on many ways, so
+processes with tables of their own search the same states again and use
+more CPU time together than a single search.
+"""
+
+
+import time
+from array import array
+
+from adventuregame import actions, output, pathfinding, world
+from adventuregame.inventory import Inventory
+from adventuregame.player import Player
+from adventuregame.simulation import Policy
+
+
+class TranspositionTable:
+    """ The values of the searched states, with a limited number of entries.
+
+    Attributes:
+        max_entries (int): The number of entries at which the table is
+            halved.
+        hits (int): Number of lookups that found a value.
+        misses (int): Number of lookups that didn't.
+    """
+    def __init__(self, max_entries=2000000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._values = {}
+
+    def __len__(self):
+        return len(self._values)
+
+    def get(self, state, turns):
+        """ Returns the value of the state with turns left, or None. """
+        value = self._values.get((state, turns))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def put(self, state, turns, value):
+        """ Stores a value, dropping the shallow half of the table if full.
+        """
+        if len(self._values) >= self.max_entries:
+            keys = sorted(self._values, key=lambda key: key[1])
+            for key in keys[:len(keys) // 2]:
+                del self._values[key]
+        self._values[(state, turns)] = value
+
+
+def _room_value(state):
+    """ Turns the save_state of a room into a small integer.
+
+    Dead enemies all get the value 0, whatever hp they are below zero.
+    """
+    if state is None:
+        return -1
+    if state is False:
+        return -2
+    if state is True:
+        return -3
+    return max(state, 0)
+
+
+def _room_state(value):
+    """ Turns a value of _room_value back into a room state. """
+    return {-1: None, -2: False, -3: True}.get(value, value)
+
+
+class Solver:
+    """ Searches the best strategy for the loaded world.
+
+    The solver plays on its own WorldOverlay without a scheduler, so the
+    loaded world is not changed and nothing happens between the turns.
+
+    Attributes:
+        table (:obj:'TranspositionTable'): The values of the searched
+            states.
+    """
+    def __init__(self, table_size=2000000):
+        self.table = TranspositionTable(table_size)
+        self._world = world.WorldOverlay()
+        self._player = Player(self._world, output.NullSink())
+        self._exit_distance = pathfinding.world_graph().distance_field(
+            'CaveExit')
+        # The choices of the states that have been expanded, since a state
+        # is searched again for every number of turns left.
+        self._expansions = {}
+        self._inventory = None
+
+        # The rooms with a state get a slot in the packed state, the items
+        # the player can get a counter.
+        self._slots = {}
+        found_items = [item for item in self._player.inventory]
+        for room in world._rooms[1:]:
+            if room is None:
+                continue
+            if room.copy() is not room:
+                self._slots[(room.x, room.y)] = len(self._slots)
+            found_items.append(getattr(room, 'item', None))
+            found_items.extend(getattr(getattr(room, 'trader', None),
+                                       'inventory', ()))
+        self._items = []
+        for item in found_items:
+            if item is not None and item not in self._items:
+                self._items.append(item)
+        self._item_ids = {item: i for i, item in enumerate(self._items)}
+        self._fields = 3 + len(self._items)
+
+    def start_state(self):
+        """ Returns the packed state at the start of a game. """
+        return self.encode(Player(world.WorldOverlay(), output.NullSink()))
+
+    def encode(self, player):
+        """ Returns the packed state of a player in a game on an overlay. """
+        fields = [0] * (self._fields + len(self._slots))
+        fields[0] = player.location_y * world.width + player.location_x
+        fields[1], fields[2] = player.hp, player.gold
+        for item in player.inventory:
+            fields[3 + self._item_ids[item]] += 1
+        for (x, y), slot in self._slots.items():
+            fields[self._fields + slot] = _room_value(
+                player.world.tile_exists(x, y).save_state())
+        return array('i', fields).tobytes()
+
+    def _enter(self, state, entered=False):
+        """ Sets up the player and the room of a state and runs the room.
+
+        Args:
+            state (bytes): The packed state.
+            entered (bool): True if the room has already modified the
+                player in this state.
+
+        Returns:
+            tuple: The room, the fields of the state after the room has
+                modified the player, and the inventory items.
+        """
+        fields = array('i')
+        fields.frombytes(state)
+        player = self._player
+        player.location_x = fields[0] % world.width
+        player.location_y = fields[0] // world.width
+        player.hp, player.gold, player.victory = fields[1], fields[2], False
+        inventory = []
+        for i, item in enumerate(self._items):
+            inventory.extend([item] * fields[3 + i])
+        player.inventory = Inventory(inventory)
+
+        room = self._world.tile_exists(player.location_x, player.location_y)
+        slot = self._slots.get((room.x, room.y))
+        if slot is not None:
+            room.restore_state(_room_state(fields[self._fields + slot]))
+        if not entered:
+            room.modify_player(player)
+        fields[1], fields[2] = player.hp, player.gold
+        if slot is not None:
+            fields[self._fields + slot] = _room_value(room.save_state())
+        self._inventory = player.inventory
+        inventory = list(player.inventory)
+        for i in range(len(self._items)):
+            fields[3 + i] = 0
+        for item in inventory:
+            fields[3 + self._item_ids[item]] += 1
+        return room, fields, inventory
+
+    def _after(self, room, fields, inventory, apply, trade=False):
+        """ Runs apply on the entered state and returns the packed result.
+
+        Only trades change the inventory, so the other actions share the
+        inventory the player got in _enter.
+        """
+        player = self._player
+        slot = self._slots.get((room.x, room.y))
+        player.location_x, player.location_y = room.x, room.y
+        player.hp, player.gold = fields[1], fields[2]
+        if trade:
+            player.inventory = Inventory(inventory)
+        if slot is not None:
+            room.restore_state(_room_state(fields[self._fields + slot]))
+        apply(player)
+
+        result = array('i', fields)
+        result[0] = player.location_y * world.width + player.location_x
+        result[1], result[2] = player.hp, player.gold
+        if trade:
+            for i in range(len(self._items)):
+                result[3 + i] = 0
+            for item in player.inventory:
+                result[3 + self._item_ids[item]] += 1
+            player.inventory = self._inventory
+        if slot is not None:
+            result[self._fields + slot] = _room_value(room.save_state())
+        return result.tobytes()
+
+    def expand(self, state, entered=False):
+        """ Enters the state and lists the choices of the player.
+
+        Args:
+            state (bytes): The packed state.
+            entered (bool): True if the room has already modified the
+                player in this state.
+
+        Returns:
+            tuple: None, or True/False if the game ends in this state with a
+                victory or a death, then a list of choices. A choice is a
+                tuple of the action, the item name for buying and selling,
+                and a list of the probabilities and following states.
+        """
+        room, fields, inventory = self._enter(state, entered)
+        player = self._player
+        if player.victory or not player.is_alive():
+            return player.victory, []
+
+        choices = []
+        for action in room.available_actions():
+            if isinstance(action, actions.Buy):
+                trader = action.kwargs['trader']
+                for item in trader.inventory:
+                    choices.append((action, item.name, [(1.0, self._after(
+                        room, fields, inventory,
+                        lambda p, t=trader, n=item.name: p.buy_item(t, n),
+                        trade=True))]))
+            elif isinstance(action, actions.Sell):
+                trader = action.kwargs['trader']
+                for name in sorted({item.name for item in inventory}):
+                    choices.append((action, name, [(1.0, self._after(
+                        room, fields, inventory,
+                        lambda p, t=trader, n=name: p.sell_item(t, n),
+                        trade=True))]))
+            elif isinstance(action, actions.AutoBattle):
+                # An auto-battle takes the turns of the whole fight, the
+                # solver plays the same fight one Attack at a time.
+                continue
+            elif isinstance(action, actions.Flee):
+                moves = room.adjacent_moves()
+                choices.append((action, None, [(1.0 / len(moves), self._after(
+                    room, fields, inventory,
+                    lambda p, m=move: p.do_action(m))) for move in moves]))
+            else:
+                choices.append((action, None, [(1.0, self._after(
+                    room, fields, inventory,
+                    lambda p, a=action: p.do_action(a, **a.kwargs)))]))
+
+        # Ending up in the same state again only costs a turn. The choices
+        # that lead closer to the exit come first, so a certain win is found
+        # early.
+        choices = [choice for choice in choices
+                   if [s for p, s in choice[2]] != [state]]
+        distances = self._exit_distance
+        choices.sort(key=lambda choice: max(
+            distances[memoryview(s).cast('i')[0]] for p, s in choice[2]))
+        return None, choices
+
+    def _bound(self, state, turns):
+        """ Returns the value of a state that follows from the distance to
+        the exit alone, or None.
+        """
+        distance = self._exit_distance[memoryview(state).cast('i')[0]]
+        if distance == 0:
+            # The exit wins as soon as the player enters it.
+            return 1.0
+        if distance > turns or distance == pathfinding.UNREACHABLE:
+            return 0.0
+        return None
+
+    def value(self, state, turns):
+        """ Returns the probability to win from a state with turns left.
+
+        Args:
+            state (bytes): A packed state.
+            turns (int): The number of actions the player may still make.
+        """
+        value = self._bound(state, turns)
+        if value is not None:
+            return value
+        value = self.table.get(state, turns)
+        if value is not None:
+            return value
+
+        expansion = self._expansions.get(state)
+        if expansion is None:
+            if len(self._expansions) >= self.table.max_entries // 4:
+                self._expansions.clear()
+            expansion = self._expansions[state] = self.expand(state)
+        ended, choices = expansion
+        if ended is not None:
+            value = 1.0 if ended else 0.0
+        else:
+            value = 0.0
+            for action, item_name, outcomes in choices:
+                value = max(value, sum(p * self.value(following, turns - 1)
+                                       for p, following in outcomes))
+                if value == 1.0:
+                    break
+        self.table.put(state, turns, value)
+        return value
+
+    def best_choice(self, state, turns, entered=False):
+        """ Returns the best action and item name in a state, or None.
+
+        Args:
+            state (bytes): The packed state.
+            turns (int): The number of actions the player may still make.
+            entered (bool): True if the room has already modified the
+                player in this state.
+        """
+        ended, choices = self.expand(state, entered)
+        best, best_value = None, -1.0
+        for action, item_name, outcomes in choices:
+            value = sum(p * self.value(following, turns - 1)
+                        for p, following in outcomes)
+            if value > best_value:
+                best, best_value = (action, item_name), value
+        return best
+
+    def solve(self, max_turns):
+        """ Returns the probability to win a new game in max_turns turns.
+
+        The turns are counted like in simulation.play_headless: the game is
+        won if the player has entered the exit after at most max_turns - 1
+        actions.
+
+        Args:
+            max_turns (int): The number of turns of the game.
+        """
+        return self.value(self.start_state(), max_turns - 1)
+
+    def policy(self, max_turns):
+        """ Returns a Policy that plays the best actions for max_turns turns.
+        """
+        return SolverPolicy(self, max_turns)
+
+
+class SolverPolicy(Policy):
+    """ Policy that plays the best actions the Solver found.
+
+    The actions are only the best ones in a world that doesn't tick, see
+    the module docstring.
+
+    Attributes:
+        solver (:obj:'Solver'): The solver that knows the best actions.
+        turns (int): The number of actions the policy may still make
+            before the player has to be in the exit.
+    """
+    ticks = False
+
+    def __init__(self, solver, max_turns):
+        self.solver = solver
+        self.turns = max_turns - 1
+        self._item_name = None
+
+    def choose_action(self, player, room, available_actions):
+        if player.world.scheduler is not None:
+            raise ValueError("The solver can't play a world that ticks.")
+        # The room has already modified the player in this turn.
+        action, self._item_name = self.solver.best_choice(
+            self.solver.encode(player), self.turns, entered=True)
+        self.turns -= 1
+        for available in available_actions:
+            if available.hotkey == action.hotkey:
+                return available
+        return action
+
+    def choose_item(self, player, item_names):
+        return self._item_name
+
+
+def main(argv=None):
+    """ Command line entry point that prints the win probability. """
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path', nargs='?', default=world.MAP_PATH)
+    parser.add_argument('--turns', type=int, default=17)
+    parser.add_argument('--table-size', type=int, default=2000000)
+    args = parser.parse_args(argv)
+
+    world.load_tiles(args.path)
+    game_solver = Solver(args.table_size)
+    start = time.perf_counter()
+    value = game_solver.solve(args.turns)
+    print("Win probability in {} turns: {:.6f}".format(args.turns, value))
+    print("Searched {} states in {:.1f} s".format(
+        game_solver.table.misses, time.perf_counter() - start))
+
+
+if __name__ == "__main__":
+    main()
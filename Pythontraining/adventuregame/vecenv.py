@@ -0,0 +1,309 @@
+"""Module that plays many independent games at once with NumPy arrays.
+
+VecEnv holds the state of N games as arrays instead of Player objects: the
+hp, gold, position and best weapon damage of every player, and for every
+game the Health Points of every enemy and whether the loot of every loot
+room is still there. One call of step() does a turn of all the games that
+haven't ended, with the rules of the rooms and the player:
+
+* the moves, which are only possible while no enemy is alive in the room,
+* Attack, Auto-battle (see the combat module) and Flee,
+* and when the turn is done, the room the player is in modifies the
+  player: the enemy hits, the healing room heals, the loot is picked up and
+  the exit ends the game with a victory.
+
+The actions are given as codes, the index of their hotkey in HOTKEYS.
+Buying and selling need item names and are not part of the environment,
+and View inventory only uses up the turn. An action the room doesn't offer
+uses up the turn as well; action_mask() tells which actions are offered.
+
+NumPy is only needed by this module::
+
+    python -m adventuregame.vecenv --games 10000
+"""
+
+
+import time
+
+import numpy
+
+from adventuregame import items, output, rooms, world
+from adventuregame.player import Player
+
+
+# The hotkeys of the actions, the index of a hotkey is the action code.
+HOTKEYS = ('n', 's', 'e', 'w', 'i', 'a', 'u', 'f')
+MOVE_NORTH, MOVE_SOUTH, MOVE_EAST, MOVE_WEST, VIEW_INVENTORY, ATTACK, \
+    AUTO_BATTLE, FLEE = range(len(HOTKEYS))
+
+# The neighbour bit every action needs, 0 for the actions that are no move.
+_MOVE_BITS = numpy.array([world.NORTH, world.SOUTH, world.EAST, world.WEST,
+                          0, 0, 0, 0], numpy.uint8)
+
+# Room kinds that modify the player without a column of their own.
+_OTHER, _HEALING, _EXIT = range(3)
+
+
+class VecEnv:
+    """ N games on the loaded world, stepped together.
+
+    The world has to be loaded with world.load_tiles, the paged worlds are
+    not supported. The memory of the environment grows with the number of
+    games times the number of enemy and loot rooms.
+
+    Attributes:
+        games (int): The number of games.
+        random (:obj:'numpy.random.Generator'): Decides where players flee.
+        hp (:obj:'numpy.ndarray'): The Health Points of every player.
+        gold (:obj:'numpy.ndarray'): The gold of every player.
+        position (:obj:'numpy.ndarray'): The cell of every player, the index
+            y * world.width + x.
+        weapon (:obj:'numpy.ndarray'): The damage of the best weapon of
+            every player.
+        victory (:obj:'numpy.ndarray'): True for the games that were won.
+        done (:obj:'numpy.ndarray'): True for the games that have ended.
+        turns (:obj:'numpy.ndarray'): The number of actions of every game.
+        enemy_hp (:obj:'numpy.ndarray'): The Health Points of the enemies,
+            one row per game and one column per enemy room.
+        lootable (:obj:'numpy.ndarray'): True for the loot that is still
+            there, one row per game and one column per loot room.
+    """
+    def __init__(self, games, seed=None):
+        if world._pager is not None:
+            raise NotImplementedError("VecEnv needs a world that was loaded "
+                                      "with load_tiles.")
+        self.games = games
+        self.random = numpy.random.default_rng(seed)
+        self.width = world.width
+        cells = world.width * world.height
+        grid = numpy.array(world._grid, numpy.int64)
+        self._neighbours = numpy.frombuffer(bytes(world._neighbours),
+                                            numpy.uint8)
+        self._kind = numpy.zeros(cells, numpy.uint8)
+
+        # Cells without an enemy or loot point to an extra column, whose
+        # enemy is dead and whose loot is gone.
+        enemy_cells, enemy_hp, enemy_damage = [], [], []
+        loot_cells, lootable, loot_gold, loot_damage = [], [], [], []
+        for cell in numpy.flatnonzero(grid):
+            room = world._rooms[grid[cell]]
+            if isinstance(room, rooms.EnemyRoom):
+                enemy_cells.append(cell)
+                enemy_hp.append(room.enemy.hp)
+                enemy_damage.append(room.enemy.damage)
+            elif isinstance(room, rooms.LootRoom):
+                loot_cells.append(cell)
+                lootable.append(room.lootable)
+                item = room.item
+                loot_gold.append(item.amount if isinstance(item, items.Gold)
+                                 else 0)
+                loot_damage.append(item.damage
+                                   if isinstance(item, items.Weapon) else 0)
+            elif isinstance(room, rooms.HealingRoom):
+                self._kind[cell] = _HEALING
+            elif isinstance(room, rooms.CaveExit):
+                self._kind[cell] = _EXIT
+        self._enemy_column = numpy.full(cells, len(enemy_cells), numpy.int64)
+        self._enemy_column[enemy_cells] = numpy.arange(len(enemy_cells))
+        self._enemy_start = numpy.array(enemy_hp + [0], numpy.int16)
+        self._enemy_damage = numpy.zeros(cells, numpy.int32)
+        self._enemy_damage[enemy_cells] = enemy_damage
+        self._loot_column = numpy.full(cells, len(loot_cells), numpy.int64)
+        self._loot_column[loot_cells] = numpy.arange(len(loot_cells))
+        self._loot_start = numpy.array(lootable + [False], bool)
+        self._loot_gold = numpy.zeros(cells, numpy.int32)
+        self._loot_gold[loot_cells] = loot_gold
+        self._loot_damage = numpy.zeros(cells, numpy.int32)
+        self._loot_damage[loot_cells] = loot_damage
+
+        # The flee move for every neighbour mask and random number, in the
+        # order of RoomTile.adjacent_moves.
+        self._move_count = numpy.zeros(16, numpy.int64)
+        self._flee_delta = numpy.zeros((16, 4), numpy.int64)
+        for mask in range(16):
+            for bit, delta in ((world.EAST, 1), (world.WEST, -1),
+                               (world.NORTH, -self.width),
+                               (world.SOUTH, self.width)):
+                if mask & bit:
+                    self._flee_delta[mask, self._move_count[mask]] = delta
+                    self._move_count[mask] += 1
+        self._move_delta = numpy.array([-self.width, self.width, 1, -1,
+                                        0, 0, 0, 0], numpy.int64)
+
+        # A new player is the template of the players of every game.
+        player = Player(world.WorldOverlay(), output.NullSink())
+        best = player.inventory.best_weapon()
+        self._start = (player.hp, player.gold,
+                       player.location_y * self.width + player.location_x,
+                       0 if best is None else best.damage)
+        # HealingRoom heals every player to 100 Health Points.
+        self._healed_hp = 100
+
+        self.hp = numpy.zeros(games, numpy.int32)
+        self.gold = numpy.zeros(games, numpy.int32)
+        self.position = numpy.zeros(games, numpy.int64)
+        self.weapon = numpy.zeros(games, numpy.int32)
+        self.victory = numpy.zeros(games, bool)
+        self.done = numpy.zeros(games, bool)
+        self.turns = numpy.zeros(games, numpy.int64)
+        self.enemy_hp = numpy.zeros((games, len(self._enemy_start)),
+                                    numpy.int16)
+        self.lootable = numpy.zeros((games, len(self._loot_start)), bool)
+        self.reset()
+
+    def reset(self):
+        """ Starts all games again, in the state of the loaded world. """
+        self.hp[:], self.gold[:], self.position[:], self.weapon[:] = \
+            self._start
+        self.victory[:] = False
+        self.turns[:] = 0
+        self.enemy_hp[:] = self._enemy_start
+        self.lootable[:] = self._loot_start
+        self._enter(numpy.arange(self.games))
+        self.done[:] = (self.hp <= 0) | self.victory
+
+    def _fighting(self, games):
+        """ Returns True for the games whose room has a living enemy. """
+        columns = self._enemy_column[self.position[games]]
+        return self.enemy_hp[games, columns] > 0
+
+    def _enter(self, games):
+        """ Lets the rooms of the games modify their players. """
+        positions = self.position[games]
+        hit = games[self._fighting(games)]
+        self.hp[hit] -= self._enemy_damage[self.position[hit]]
+
+        kind = self._kind[positions]
+        self.hp[games[kind == _HEALING]] = self._healed_hp
+        self.victory[games[kind == _EXIT]] = True
+
+        columns = self._loot_column[positions]
+        found = self.lootable[games, columns]
+        looted, columns = games[found], columns[found]
+        cells = self.position[looted]
+        self.gold[looted] += self._loot_gold[cells]
+        self.weapon[looted] = numpy.maximum(self.weapon[looted],
+                                            self._loot_damage[cells])
+        self.lootable[looted, columns] = False
+
+    def action_mask(self):
+        """ Returns which actions the rooms of the games offer.
+
+        Returns:
+            :obj:'numpy.ndarray': A bool array with a row per game and a
+                column per action code.
+        """
+        everyone = numpy.arange(self.games)
+        fighting = self._fighting(everyone)
+        masks = self._neighbours[self.position]
+        offered = numpy.zeros((self.games, len(HOTKEYS)), bool)
+        for code in (MOVE_NORTH, MOVE_SOUTH, MOVE_EAST, MOVE_WEST):
+            offered[:, code] = ~fighting & (masks & _MOVE_BITS[code] != 0)
+        offered[:, VIEW_INVENTORY] = ~fighting
+        for code in (ATTACK, AUTO_BATTLE, FLEE):
+            offered[:, code] = fighting
+        return offered
+
+    def random_actions(self):
+        """ Returns a random offered action for every game. """
+        keys = self.random.random((self.games, len(HOTKEYS)))
+        return numpy.argmax(keys * self.action_mask(), axis=1)
+
+    def step(self, actions):
+        """ Does one turn of every game that hasn't ended.
+
+        Args:
+            actions: The action code of every game, an array of length
+                games. The codes of the ended games are ignored.
+
+        Returns:
+            :obj:'numpy.ndarray': True for the games that ended in this turn.
+        """
+        actions = numpy.asarray(actions)
+        games = numpy.flatnonzero(~self.done)
+        codes = actions[games]
+        positions = self.position[games]
+        fighting = self._fighting(games)
+
+        moves = ~fighting & (self._neighbours[positions]
+                             & _MOVE_BITS[codes] != 0)
+        self.position[games[moves]] += self._move_delta[codes[moves]]
+
+        attacking = games[fighting & (codes == ATTACK)]
+        columns = self._enemy_column[self.position[attacking]]
+        self.enemy_hp[attacking, columns] -= self.weapon[attacking]
+
+        battling = games[fighting & (codes == AUTO_BATTLE)
+                         & (self.weapon[games] > 0)]
+        self._auto_battle(battling)
+
+        fleeing = games[fighting & (codes == FLEE)]
+        masks = self._neighbours[self.position[fleeing]]
+        counts = self._move_count[masks]
+        chosen = self.random.integers(0, numpy.maximum(counts, 1))
+        self.position[fleeing] += self._flee_delta[masks, chosen]
+
+        self.turns[games] += 1
+        self._enter(games)
+        self.done[games] = (self.hp[games] <= 0) | self.victory[games]
+        ended = numpy.zeros(self.games, bool)
+        ended[games] = self.done[games]
+        return ended
+
+    def _auto_battle(self, games):
+        """ Fights the enemies of the games like combat.fight. """
+        cells = self.position[games]
+        columns = self._enemy_column[cells]
+        enemy_hp = self.enemy_hp[games, columns].astype(numpy.int64)
+        damage = self._enemy_damage[cells].astype(numpy.int64)
+        weapon = self.weapon[games].astype(numpy.int64)
+        hp = self.hp[games].astype(numpy.int64)
+        attacks = -(-enemy_hp // weapon)
+        hits = numpy.where(damage > 0, -(-hp // numpy.maximum(damage, 1)),
+                           attacks)
+        # A lost fight ends before the killing hit, which the room deals.
+        made = numpy.where(hits >= attacks, attacks, hits)
+        self.enemy_hp[games, columns] = enemy_hp - made * weapon
+        self.hp[games] = hp - (made - 1) * damage
+
+
+def play_random(env, max_turns=1000):
+    """ Plays all games of the environment with random offered actions.
+
+    Returns:
+        int: The number of turns that were played in all games together.
+    """
+    env.reset()
+    turns = 0
+    for _ in range(max_turns):
+        active = int(numpy.count_nonzero(~env.done))
+        if not active:
+            break
+        env.step(env.random_actions())
+        turns += active
+    return turns
+
+
+def main(argv=None):
+    """ Command line entry point that plays random games and times them. """
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--games', type=int, default=10000)
+    parser.add_argument('--max-turns', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    world.load_tiles()
+    env = VecEnv(args.games, args.seed)
+    start = time.perf_counter()
+    turns = play_random(env, args.max_turns)
+    seconds = time.perf_counter() - start
+    print("Played {} turns in {:.2f} s, {:.0f} turns per second."
+          .format(turns, seconds, turns / seconds))
+    print("Win rate: {:.2%}".format(numpy.count_nonzero(env.victory)
+                                    / env.games))
+
+
+if __name__ == "__main__":
+    main()
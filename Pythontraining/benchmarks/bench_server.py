@@ -0,0 +1,90 @@
+"""Benchmark of the sessions per core the game server can handle.
+
+The server runs in its own process, so its CPU time can be measured apart
+from the clients. Run it from the Pythontraining directory with
+``python -m benchmarks.bench_server --sessions 1000 --turns 50``.
+"""
+
+
+import argparse
+import asyncio
+import multiprocessing
+import random
+import re
+import time
+
+from adventuregame import server, world
+
+_HOTKEY = re.compile(rb'^(\w): ', re.MULTILINE)
+
+
+def _serve(connection):
+    """ Runs the server until the parent process sends anything. """
+    async def serve():
+        world.load_tiles()
+        game_server = await server.GameServer().start()
+        connection.send(game_server.port)
+        stop = asyncio.Event()
+        asyncio.get_running_loop().add_reader(connection.fileno(), stop.set)
+        cpu_start = time.process_time()
+        await stop.wait()
+        cpu = time.process_time() - cpu_start
+        await game_server.close()
+        connection.send((cpu, game_server.finished_sessions,
+                         game_server.turns))
+
+    asyncio.run(serve())
+
+
+async def _client(port, turns, rng):
+    """ Plays random moves, fights and looks into the inventory. """
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        for _ in range(turns):
+            menu = await reader.readuntil(b'Action: ')
+            hotkeys = [hotkey for hotkey in _HOTKEY.findall(menu)
+                       if hotkey not in (b'b', b't')]
+            writer.write(rng.choice(hotkeys) + b'\n')
+    except asyncio.IncompleteReadError:
+        # The player died or found the exit.
+        pass
+    finally:
+        writer.close()
+
+
+async def _run_clients(port, sessions, turns, seed):
+    rng = random.Random(seed)
+    await asyncio.gather(*(_client(port, turns, random.Random(rng.random()))
+                           for _ in range(sessions)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=1000)
+    parser.add_argument('--turns', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=_serve, args=(child,),
+                                      daemon=True)
+    process.start()
+    port = parent.recv()
+    wall_start = time.perf_counter()
+    asyncio.run(_run_clients(port, args.sessions, args.turns, args.seed))
+    wall = time.perf_counter() - wall_start
+    # Give the server the chance to finish the last sessions.
+    time.sleep(0.2)
+    parent.send(None)
+    cpu, sessions, turns = parent.recv()
+    process.join()
+
+    print("Sessions: {} ({} concurrent)".format(sessions, args.sessions))
+    print("Turns: {}".format(turns))
+    print("Wall time: {:.2f} s, server CPU time: {:.2f} s".format(wall, cpu))
+    print("Sessions per core-second: {:.0f}".format(sessions / cpu))
+    print("Turns per core-second: {:.0f}".format(turns / cpu))
+
+
+if __name__ == "__main__":
+    main()
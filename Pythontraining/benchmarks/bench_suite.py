@@ -0,0 +1,206 @@
+"""Benchmarks of the hot paths of the game on generated maps.
+
+Maps with 10^2, 10^4 and 10^6 tiles are generated with mapgen, and on each
+of them the loading of the world, the room menus, the player actions and
+whole playthroughs are timed. The throughput of every benchmark is compared
+with the baselines in baselines.json; a benchmark that got slower than the
+tolerance allows is reported as a regression. Run it from the
+Pythontraining directory with ``python -m benchmarks.bench_suite`` and
+store new baselines with ``--save`` after a deliberate change.
+
+The baselines depend on the machine, so they have to be saved on the
+machine the regressions are checked on.
+"""
+
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from adventuregame import (actions, enemies, mapfile, mapgen, output,
+                           pathfinding, simulation, world)
+from adventuregame.player import Player
+
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         'baselines.json')
+SIZES = {'1e2': (10, 10), '1e4': (100, 100), '1e6': (1000, 1000)}
+
+
+def _rate(function, operations, repeat=3):
+    """ Returns the best number of operations per second of a function.
+
+    Args:
+        function: Function without arguments that does the operations.
+        operations (int): The number of operations one call does.
+        repeat (int): The number of calls, the fastest one counts.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return operations / best if best else float('inf')
+
+
+def _sample_rooms(count):
+    """ Returns up to count rooms of the loaded world, spread over the map.
+    """
+    found = []
+    step = max(1, world.width * world.height // count)
+    for i in range(0, world.width * world.height, step):
+        room = world.tile_exists(i % world.width, i // world.width)
+        if room is not None:
+            found.append(room)
+    return found[:count]
+
+
+def bench_map(path, tiles):
+    """ Runs all benchmarks on the map file.
+
+    Args:
+        path (str): The map.txt file.
+        tiles (int): The number of cells of the map.
+
+    Returns:
+        results (dict): Operations per second by benchmark name, and the
+            memory of the loaded world in bytes under 'memory'.
+    """
+    results = {}
+    # Loading the big maps takes seconds, once is enough for them.
+    repeat = 5 if tiles <= 10 ** 4 else 1
+    results['load_tiles text'] = _rate(lambda: world.load_tiles(path),
+                                       tiles, repeat)
+    mapfile.compile_map(path)
+    results['load_tiles compiled'] = _rate(lambda: world.load_tiles(path),
+                                           tiles, repeat)
+
+    world._close_pager()
+    tracemalloc.start()
+    world.load_tiles(path)
+    results['memory'] = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    os.remove(mapfile.compiled_path(path))
+
+    sample = _sample_rooms(10000)
+
+    def adjacent_moves():
+        for room in sample:
+            room.adjacent_moves()
+    results['adjacent_moves'] = _rate(adjacent_moves, len(sample))
+
+    def available_actions():
+        for room in sample:
+            room.available_actions()
+    results['available_actions'] = _rate(available_actions, len(sample))
+
+    player = Player(out=output.NullSink())
+    enemy = enemies.Ogre()
+
+    def attack():
+        enemy.hp = 10 ** 9
+        for _ in range(10000):
+            player.attack(enemy)
+    results['attack'] = _rate(attack, 10000)
+
+    # The first row is a corridor, so the player can walk east and back.
+    player.location_x, player.location_y = 0, 0
+    moves = (actions.MOVE_EAST, actions.MOVE_WEST) * 5000
+
+    def do_action():
+        for move in moves:
+            player.do_action(move)
+    results['do_action'] = _rate(do_action, len(moves))
+
+    pathfinding.world_graph()
+    turns = 0
+    start = time.perf_counter()
+    for seed in range(20):
+        turns += simulation.play_headless(
+            simulation.TravelPolicy(seed=seed), max_turns=5000,
+            seed=seed).turns
+    results['playthrough turns'] = turns / (time.perf_counter() - start)
+    return results
+
+
+def run(sizes):
+    """ Generates the maps and benchmarks them.
+
+    Returns:
+        results (dict): The results of bench_map by size name.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name in sizes:
+            width, height = SIZES[name]
+            path = os.path.join(directory, 'map_{}.txt'.format(name))
+            mapgen.generate(path, width, height)
+            results[name] = bench_map(path, width * height)
+    world.load_tiles()
+    return results
+
+
+def regressions(results, baselines, tolerance):
+    """ Compares the results with the baselines.
+
+    Returns:
+        :obj:'list' of :obj:'str': A line for every benchmark that is slower
+            than the baseline allows, or uses more memory.
+    """
+    found = []
+    for size, metrics in results.items():
+        for metric, value in metrics.items():
+            baseline = baselines.get(size, {}).get(metric)
+            if baseline is None:
+                continue
+            if metric == 'memory':
+                worse = value > baseline * (1 + tolerance)
+            else:
+                worse = value < baseline * (1 - tolerance)
+            if worse:
+                found.append("{} {}: {:.0f} (baseline {:.0f})"
+                             .format(size, metric, value, baseline))
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', choices=sorted(SIZES),
+                        default=sorted(SIZES))
+    parser.add_argument('--tolerance', type=float, default=0.4,
+                        help="Allowed slowdown against the baselines.")
+    parser.add_argument('--save', action='store_true',
+                        help="Store the results as the new baselines.")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes)
+    for size, metrics in results.items():
+        print("{} tiles".format(size))
+        for metric, value in metrics.items():
+            unit = 'bytes' if metric == 'memory' else 'per second'
+            print("    {}: {:.0f} {}".format(metric, value, unit))
+
+    baselines = {}
+    if os.path.exists(BASELINES):
+        with open(BASELINES) as f:
+            baselines = json.load(f)
+    if args.save:
+        for size, metrics in results.items():
+            baselines[size] = {metric: round(value)
+                               for metric, value in metrics.items()}
+        with open(BASELINES, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write('\n')
+        return 0
+    found = regressions(results, baselines, args.tolerance)
+    for line in found:
+        print("Regression: " + line)
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
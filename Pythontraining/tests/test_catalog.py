@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+import unittest
+from adventuregame import catalog, enemies, items, npc, rooms
+
+
+class TestCatalog(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'catalog.txt')
+
+    def write(self, *rows):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            for row in (catalog.COLUMNS,) + rows:
+                f.write('\t'.join(row) + '\n')
+
+    def test_classes_are_built_from_the_table(self):
+        table = catalog.get()
+        sword = table.ids['Sword']
+        self.assertIs(catalog.entity_class(sword), items.Sword)
+        self.assertEqual((items.Sword.name, items.Sword.damage,
+                          items.Sword.value), ("Sword", 25, 20))
+        self.assertEqual(table.damage[sword], 25)
+        self.assertTrue(issubclass(enemies.Wolf, enemies.Enemy))
+        self.assertEqual(enemies.Wolf.catalog_id, table.ids['Wolf'])
+        self.assertEqual(npc.ItemTrader().inventory,
+                         [items.SmallHealthPotion(),
+                          items.LargeHealthPotion()])
+        self.assertEqual(npc.WeaponTrader().name, "Trader Jill")
+
+    def test_new_row_defines_a_class(self):
+        self.write(('Axe', 'Weapon', 'Axe', '0', '15', '15', '0', '',
+                    'A heavy axe.'),
+                   ('Smith', 'Trader', 'Smith', '10', '0', '0', '0', 'Axe',
+                    'Trader that sells axes.'))
+        table = catalog.read(self.path)
+        self.assertEqual(list(table.hp), [0, 10])
+        self.assertEqual(table.stock[1], (0,))
+        self.assertEqual(table.rows('Weapon'), [0])
+
+    def test_bad_tables_are_rejected(self):
+        self.write(('Axe', 'Weapon', 'Axe', '0', 'lots', '15', '0', '', ''))
+        with self.assertRaises(catalog.CatalogFormatError):
+            catalog.read(self.path)
+        self.write(('Smith', 'Trader', 'Smith', '10', '0', '0', '0', 'Axe',
+                    ''))
+        with self.assertRaises(catalog.CatalogFormatError):
+            catalog.read(self.path)
+
+    def test_spawn_many(self):
+        ogres = catalog.spawn_many(catalog.get().ids['Ogre'], 3)
+        self.assertEqual([ogre.hp for ogre in ogres], [50, 50, 50])
+        ogres[0].hp = 0
+        self.assertEqual(ogres[1].hp, 50)
+        daggers = catalog.spawn_many(catalog.get().ids['Dagger'], 2)
+        self.assertEqual(daggers, [items.Dagger(), items.Dagger()])
+
+    def test_bulk_rooms_equal_single_rooms(self):
+        positions = [(0, 0), (1, 0), (2, 3)]
+        for room_type in (rooms.OgreRoom, rooms.DaggerRoom,
+                          rooms.Find5GoldRoom, rooms.WeaponRoom):
+            for room, (x, y) in zip(room_type.create_many(positions),
+                                    positions):
+                single = room_type(x, y)
+                self.assertIs(type(room), room_type)
+                self.assertEqual((room.x, room.y), (x, y))
+                self.assertEqual(room.save_state(), single.save_state())
+        ogres = rooms.OgreRoom.create_many(positions)
+        self.assertIsNot(ogres[1].enemy, ogres[2].enemy)
@@ -0,0 +1,66 @@
+import unittest
+from adventuregame import (combat, enemies, items, output, rooms, scheduler,
+                           world)
+from adventuregame.inventory import Inventory
+from adventuregame.player import Player
+
+
+class TestCombat(unittest.TestCase):
+
+    def fight_by_rounds(self, player, room):
+        """ Attacks in every turn like the game loop, until one is dead. """
+        attacks = 0
+        while player.is_alive() and room.enemy.is_alive():
+            player.attack(room.enemy)
+            attacks += 1
+            room.modify_player(player)
+        return attacks
+
+    def test_auto_battle_matches_rounds(self):
+        weapons = [items.Stone(), items.Dagger(), items.Sword()]
+        for weapon in weapons:
+            for enemy_type in (enemies.Wolf, enemies.Zombie, enemies.Ogre):
+                for enemy_hp in range(1, enemy_type.max_hp + 1, 7):
+                    for hp in range(1, 101):
+                        by_rounds = Player(out=output.NullSink())
+                        by_rounds.inventory = Inventory([weapon])
+                        by_rounds.hp = hp
+                        room = rooms.EnemyRoom(0, 0, enemy_type(enemy_hp))
+                        attacks = self.fight_by_rounds(by_rounds, room)
+
+                        auto = Player(out=output.NullSink())
+                        auto.inventory = Inventory([weapon])
+                        auto.hp = hp
+                        auto_room = rooms.EnemyRoom(0, 0, enemy_type(enemy_hp))
+                        battle = combat.resolve(hp, weapon, auto_room.enemy)
+                        auto.auto_battle(auto_room.enemy)
+                        auto_room.modify_player(auto)
+
+                        self.assertEqual(auto.hp, by_rounds.hp)
+                        self.assertEqual(auto_room.enemy.hp, room.enemy.hp)
+                        self.assertEqual(battle.won, by_rounds.is_alive())
+                        self.assertEqual(battle.attacks, attacks)
+                        self.assertEqual(battle.hp_lost, hp - by_rounds.hp)
+
+    def test_attacks_are_cached(self):
+        sword = items.Sword()
+        self.assertEqual(combat.attacks_to_kill(sword, enemies.Ogre()), 2)
+        self.assertIn((items.Sword, enemies.Ogre, 50), combat._attacks)
+
+    def test_auto_battle_without_weapon(self):
+        sink = output.BufferSink()
+        player = Player(out=sink)
+        player.inventory = Inventory([])
+        enemy = enemies.Wolf()
+        player.auto_battle(enemy)
+        self.assertEqual((player.hp, enemy.hp), (100, 20))
+        self.assertIn(b'no weapon', sink.take())
+
+    def test_auto_battle_takes_the_ticks_of_the_fight(self):
+        overlay = world.WorldOverlay(scheduler.TimingWheel())
+        player = Player(overlay, output.NullSink())
+        player.inventory = Inventory([items.Dagger()])
+        enemy = enemies.Ogre()
+        battle = combat.resolve(player.hp, items.Dagger(), enemy)
+        player.auto_battle(enemy)
+        self.assertEqual(overlay.scheduler.now, battle.attacks - 1)
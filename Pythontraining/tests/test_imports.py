@@ -0,0 +1,88 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The cumulative import time the entry modules may take, in microseconds.
+# Wall-clock times vary with the load of the machine, so they are only
+# checked if the environment variable ADVENTUREGAME_IMPORT_BUDGETS is set,
+# and they are loose: several times the 4 ms, 11 ms and 15 ms measured on
+# a laptop.
+BUDGETS_US = {
+    'adventuregame.rooms': 30000,
+    'adventuregame.game': 50000,
+    'adventuregame.simulation': 80000,
+}
+
+# Modules that only some commands need and that take long to import.
+DEFERRED = ('argparse', 'multiprocessing', 'zipfile', 'xml.etree.ElementTree',
+            'asyncio')
+
+
+def import_times(statement, pycache_prefix=None):
+    """ Runs the statement in a fresh interpreter with -X importtime.
+
+    Args:
+        statement (str): The Python code to run.
+        pycache_prefix (str): A directory the bytecode is written to and
+            read from, see PYTHONPYCACHEPREFIX. None leaves the environment
+            as it is.
+
+    Returns:
+        dict: The cumulative import time in microseconds by module name.
+    """
+    env = dict(os.environ)
+    if pycache_prefix is not None:
+        env.pop('PYTHONDONTWRITEBYTECODE', None)
+        env['PYTHONPYCACHEPREFIX'] = pycache_prefix
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+                             statement], cwd=PACKAGE_ROOT, env=env,
+                            check=True, capture_output=True, text=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+class TestImportTime(unittest.TestCase):
+
+    def test_package_imports_nothing(self):
+        times = import_times('import adventuregame')
+        self.assertEqual([name for name in times
+                          if name.startswith('adventuregame.')], [])
+
+    def test_worker_modules_defer_command_modules(self):
+        for module in BUDGETS_US:
+            times = import_times('import ' + module)
+            for name in DEFERRED:
+                self.assertNotIn(name, times, module)
+
+    @unittest.skipUnless(os.environ.get('ADVENTUREGAME_IMPORT_BUDGETS'),
+                         "import times are only checked on request")
+    def test_worker_modules_within_budget(self):
+        with tempfile.TemporaryDirectory() as prefix:
+            for module, budget in BUDGETS_US.items():
+                # The first run writes the bytecode, so compiling isn't
+                # measured.
+                import_times('import ' + module, prefix)
+                times = import_times('import ' + module, prefix)
+                self.assertLess(times[module], budget, module)
+
+    def test_rooms_import_their_content_on_first_use(self):
+        times = import_times('import adventuregame.rooms')
+        self.assertEqual([name for name in times
+                          if name.startswith('adventuregame.')],
+                         ['adventuregame.rooms'])
+
+    def test_text_map_loads_without_spreadsheet_modules(self):
+        times = import_times('from adventuregame import world; '
+                             'world.load_tiles()')
+        self.assertIn('adventuregame.rooms', times)
+        self.assertNotIn('zipfile', times)
@@ -0,0 +1,61 @@
+import unittest
+from adventuregame import actions, instrument, output, rooms, simulation, world
+from adventuregame.player import Player
+
+
+class TestInstrument(unittest.TestCase):
+
+    def setUp(self):
+        world.load_tiles()
+        instrument.reset()
+
+    def tearDown(self):
+        instrument.disable()
+        instrument.reset()
+
+    def test_playthrough_is_measured(self):
+        original = Player.do_action
+        original_actions = rooms.RoomTile.available_actions
+        instrument.enable()
+        self.assertIsNot(Player.do_action, original)
+        policy = simulation.ScriptedPolicy('ssnwbennnananaae', ['Sword'])
+        outcome = simulation.play_headless(policy)
+        instrument.disable()
+        self.assertIs(Player.do_action, original)
+        self.assertIs(rooms.RoomTile.available_actions, original_actions)
+
+        stats = instrument.snapshot()
+        self.assertEqual(sum(s['count'] for s in stats['do_action'].values()),
+                         outcome.turns)
+        self.assertEqual(stats['do_action']['buy']['count'], 1)
+        self.assertEqual(stats['action']['attack']['count'], 4)
+        self.assertEqual(stats['modify_player']['OgreRoom']['count'], 3)
+        self.assertIn('StartingRoom', stats['available_actions'])
+        wolf = stats['modify_player']['WolfRoom']
+        self.assertLessEqual(wolf['p50_ns'], wolf['p99_ns'])
+        self.assertIn('attack', instrument.dump())
+
+    def test_cached_methods_follow_the_switch(self):
+        player = Player(out=output.NullSink())
+        player.do_action(actions.VIEW_INVENTORY)
+        instrument.enable()
+        player.do_action(actions.VIEW_INVENTORY)
+        self.assertEqual(
+            instrument.snapshot()['action']['print_inventory']['count'], 1)
+        instrument.disable()
+        instrument.reset()
+        player.do_action(actions.VIEW_INVENTORY)
+        self.assertEqual(instrument.snapshot(), {})
+
+    def test_disabled_measures_nothing(self):
+        simulation.play_headless(simulation.RandomPolicy(seed=1), seed=1)
+        self.assertEqual(instrument.snapshot(), {})
+
+    def test_histogram_percentiles(self):
+        histogram = instrument.Histogram()
+        for nanoseconds in range(1, 1001):
+            histogram.record(nanoseconds)
+        self.assertEqual(histogram.count, 1000)
+        self.assertTrue(500 <= histogram.percentile(50) < 600)
+        self.assertTrue(990 <= histogram.percentile(99) < 1024)
+        self.assertEqual(instrument.Histogram().percentile(50), 0)
@@ -0,0 +1,42 @@
+import unittest
+from adventuregame import items
+from adventuregame.inventory import Inventory
+
+
+class TestInventory(unittest.TestCase):
+
+    def test_best_weapon_follows_changes(self):
+        inventory = Inventory([items.Stone()])
+        self.assertIs(inventory.best_weapon(), items.Stone())
+        inventory.append(items.Sword())
+        inventory.append(items.SmallHealthPotion())
+        inventory.append(items.Dagger())
+        self.assertIs(inventory.best_weapon(), items.Sword())
+        inventory.remove(items.Sword())
+        self.assertIs(inventory.best_weapon(), items.Dagger())
+        inventory.remove(items.Dagger())
+        inventory.remove(items.Stone())
+        self.assertIsNone(inventory.best_weapon())
+
+    def test_name_index_and_totals(self):
+        inventory = Inventory([items.Dagger(), items.Stone(), items.Dagger()])
+        self.assertEqual(inventory.count('Dagger'), 2)
+        self.assertEqual(inventory.total_value, 20)
+        self.assertIs(inventory.find('Stone'), items.Stone())
+        self.assertIsNone(inventory.find('Sword'))
+        inventory.remove(inventory.find('Dagger'))
+        self.assertEqual([item.name for item in inventory],
+                         ['Stone', 'Dagger'])
+        self.assertEqual(inventory.total_value, 10)
+        self.assertNotIn(items.Sword(), inventory)
+        with self.assertRaises(ValueError):
+            inventory.remove(items.Sword())
+
+    def test_heap_is_compacted(self):
+        inventory = Inventory()
+        for _ in range(100):
+            inventory.append(items.Dagger())
+            inventory.append(items.Sword())
+            inventory.remove(items.Sword())
+        self.assertLessEqual(len(inventory._weapons), 2 * 100 + 16)
+        self.assertIs(inventory.best_weapon(), items.Dagger())
@@ -0,0 +1,26 @@
+import unittest
+from adventuregame import enemies, items, npc, rooms
+
+
+class TestItems(unittest.TestCase):
+
+    def test_items_are_shared_prototypes(self):
+        self.assertIs(items.Dagger(), items.Dagger())
+        self.assertIs(items.Gold(5), items.Gold(5))
+        self.assertIs(items.Gold(amount=5), items.Gold(5))
+        self.assertIsNot(items.Gold(5), items.Gold(6))
+        self.assertEqual(items.Gold(6).value, 6)
+        self.assertIs(npc.WeaponTrader().inventory[0], items.Sword())
+        self.assertIs(rooms.DaggerRoom(0, 0).item, items.Dagger())
+
+    def test_entities_have_no_instance_dict(self):
+        for entity in (items.Sword(), items.Gold(5), enemies.Ogre(),
+                       npc.ItemTrader(), rooms.OgreRoom(0, 0),
+                       rooms.WeaponRoom(0, 0), rooms.CaveExit(0, 0)):
+            self.assertFalse(hasattr(entity, '__dict__'), type(entity))
+
+    def test_enemy_starts_with_max_hp(self):
+        ogre = enemies.Ogre()
+        self.assertEqual((ogre.name, ogre.hp, ogre.damage), ("Ogre", 50, 20))
+        ogre.hp -= 30
+        self.assertEqual(enemies.Ogre().hp, 50)
@@ -0,0 +1,60 @@
+import os
+import shutil
+import tempfile
+import unittest
+from adventuregame import mapfile, world
+
+
+class TestMapFile(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.addCleanup(world.load_tiles)
+        self.source = os.path.join(directory, 'map.txt')
+        shutil.copy(world.MAP_PATH, self.source)
+
+    def test_compiled_map_equals_text(self):
+        text = mapfile.read_text(self.source)
+        compiled = mapfile.load_compiled(mapfile.compile_map(self.source))
+        self.assertEqual(compiled.names, text.names)
+        self.assertEqual((compiled.width, compiled.height), (4, 8))
+        self.assertEqual(list(compiled.cells), list(text.cells))
+        index = mapfile.index_rooms(text)
+        for field, numbers in zip(index._fields, compiled.index):
+            self.assertEqual(list(numbers), list(getattr(index, field)),
+                             field)
+
+    def test_compiled_world_equals_text_world(self):
+        world.load_tiles(self.source)
+        text = [(type(world.tile_exists(x, y)), world.neighbours(x, y))
+                for y in range(world.height) for x in range(world.width)]
+        start = world.starting_position
+        mapfile.compile_map(self.source)
+        world.load_tiles(self.source)
+        self.assertEqual(
+            [(type(world.tile_exists(x, y)), world.neighbours(x, y))
+             for y in range(world.height) for x in range(world.width)],
+            text)
+        self.assertEqual(world.starting_position, start)
+
+    def test_xlsx_equals_text(self):
+        xlsx = os.path.join(os.path.dirname(world.MAP_PATH), 'map.xlsx')
+        text = mapfile.read_text(self.source)
+        sheet = mapfile.read_xlsx(xlsx)
+        self.assertEqual((sheet.width, sheet.height), (4, 8))
+        self.assertEqual(
+            [sheet.names[i - 1] if i else '' for i in sheet.cells],
+            [text.names[i - 1] if i else '' for i in text.cells])
+
+    def test_stale_compiled_map_is_ignored(self):
+        compiled = mapfile.compile_map(self.source)
+        self.assertTrue(mapfile.is_fresh(compiled, self.source))
+        world.load_tiles(self.source)
+        self.assertEqual(world.starting_position, (2, 4))
+
+        with open(self.source, 'a') as f:
+            f.write('\nStartingRoom\t\t\t')
+        self.assertFalse(mapfile.is_fresh(compiled, self.source))
+        world.load_tiles(self.source)
+        self.assertEqual(world.starting_position, (0, 8))
@@ -0,0 +1,34 @@
+import os
+import tempfile
+import unittest
+from adventuregame import mapgen, pathfinding, world
+
+
+class TestMapgen(unittest.TestCase):
+
+    def tearDown(self):
+        world.load_tiles()
+
+    def test_generated_map_can_be_played_through(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'map.txt')
+            rooms = mapgen.generate(path, 30, 21, seed=4)
+            world.load_tiles(path)
+        self.assertEqual((world.width, world.height), (30, 21))
+        self.assertEqual(world.starting_position, (0, 0))
+        self.assertEqual(sum(room is not None for room in world._rooms), rooms)
+
+        # Every room is connected to the exit.
+        exit_distance = pathfinding.world_graph().distance_field('CaveExit')
+        for room in world._rooms[1:]:
+            self.assertNotEqual(exit_distance[room.y * 30 + room.x],
+                                pathfinding.UNREACHABLE)
+
+    def test_same_seed_same_map(self):
+        with tempfile.TemporaryDirectory() as directory:
+            first = os.path.join(directory, 'first.txt')
+            second = os.path.join(directory, 'second.txt')
+            mapgen.generate(first, 12, 12, seed=1)
+            mapgen.generate(second, 12, 12, seed=1)
+            with open(first) as f, open(second) as g:
+                self.assertEqual(f.read(), g.read())
@@ -0,0 +1,115 @@
+import threading
+import unittest
+from adventuregame import actions, enemies, items, melee, output, rooms, world
+from adventuregame.inventory import Inventory
+from adventuregame.player import Player
+
+
+def armed_player(weapon):
+    player = Player(out=output.NullSink())
+    player.inventory = Inventory([weapon])
+    player.hp = 1000
+    return player
+
+
+class TestMelee(unittest.TestCase):
+
+    def tearDown(self):
+        world.arena = None
+
+    def test_round_splits_the_hit(self):
+        arena = melee.Arena()
+        room = rooms.EnemyRoom(0, 0, enemies.Ogre())
+        players = [armed_player(items.Stone()) for _ in range(3)]
+        for player in players:
+            self.assertEqual(arena.join(player, room), enemies.Ogre().damage)
+        self.assertTrue(arena.attack(players[0], room))
+        self.assertTrue(arena.attack(players[1], room))
+        battle_round, = arena.tick()
+        self.assertEqual(battle_round.attacks, 2)
+        self.assertEqual(room.enemy.hp,
+                         enemies.Ogre.max_hp - 2 * items.Stone().damage)
+        # The third player didn't attack, so it has left the room.
+        self.assertEqual([player for player, _ in battle_round.hits],
+                         players[:2])
+        lost = [arena.join(player, room) for player in players[:2]]
+        self.assertEqual(sum(lost), enemies.Ogre().damage)
+        self.assertLessEqual(max(lost) - min(lost), 1)
+        # The rounds don't change the Health Points of the players.
+        self.assertEqual([player.hp for player in players], [1000] * 3)
+
+    def test_killed_enemy_does_not_hit(self):
+        arena = melee.Arena()
+        room = rooms.EnemyRoom(0, 0, enemies.Wolf())
+        player = armed_player(items.Sword())
+        arena.join(player, room)
+        arena.attack(player, room)
+        battle_round, = arena.tick()
+        self.assertFalse(room.enemy.is_alive())
+        self.assertEqual(battle_round.hits, ())
+        self.assertEqual(arena.join(player, room), 0)
+        arena.leave(player, room)
+        self.assertEqual(arena.tick(), [])
+        self.assertFalse(arena.attack(player, room))
+
+    def test_lone_player_fights_like_on_an_overlay(self):
+        world.load_tiles()
+        position = (2, 2)
+        alone = Player(world.WorldOverlay(), output.NullSink())
+        together = Player(out=output.NullSink())
+        for player in (alone, together):
+            player.inventory = Inventory([items.Stone()])
+            player.location_x, player.location_y = position
+        world.arena = melee.Arena()
+        rooms_by_player = [(player, player.world.tile_exists(*position))
+                           for player in (alone, together)]
+        hp = []
+        while rooms_by_player[1][1].enemy.is_alive():
+            world.tick()
+            for player, room in rooms_by_player:
+                room.modify_player(player)
+                if room.enemy.is_alive():
+                    player.do_action(actions.Attack(enemy=room.enemy),
+                                     enemy=room.enemy)
+            hp.append((alone.hp, together.hp))
+        self.assertEqual([first for first, _ in hp],
+                         [second for _, second in hp])
+        self.assertGreater(len(hp), 2)
+        self.assertFalse(rooms_by_player[0][1].enemy.is_alive())
+
+    def test_threads_attack_one_enemy(self):
+        world.load_tiles()
+        world.arena = melee.Arena()
+        room = world.tile_exists(2, 2)
+        room.enemy = enemies.Ogre(10 ** 6)
+        players = [armed_player(items.Dagger()) for _ in range(8)]
+        turns = 50
+        barrier = threading.Barrier(len(players) + 1)
+
+        def fight(player):
+            player.location_x, player.location_y = 2, 2
+            for _ in range(turns):
+                room.modify_player(player)
+                player.do_action(actions.Attack(enemy=room.enemy),
+                                 enemy=room.enemy)
+                barrier.wait()
+                barrier.wait()
+
+        threads = [threading.Thread(target=fight, args=(player,))
+                   for player in players]
+        for thread in threads:
+            thread.start()
+        for _ in range(turns):
+            barrier.wait()
+            world.tick()
+            barrier.wait()
+        for thread in threads:
+            thread.join()
+        attacks = turns * len(players)
+        self.assertEqual(room.enemy.hp,
+                         10 ** 6 - attacks * items.Dagger().damage)
+        # Every player is hit when it enters, then the hits of all but the
+        # last round are split.
+        damage = enemies.Ogre().damage
+        self.assertEqual(sum(1000 - player.hp for player in players),
+                         len(players) * damage + (turns - 1) * damage)
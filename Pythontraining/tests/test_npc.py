@@ -0,0 +1,77 @@
+import threading
+import unittest
+from adventuregame import items, npc, output
+from adventuregame.inventory import Inventory
+from adventuregame.player import Player
+
+
+class TestTrader(unittest.TestCase):
+
+    def test_fill_orders(self):
+        trader = npc.WeaponTrader()
+        player = Player(out=output.NullSink())
+        player.gold = items.Sword().value
+        bought = trader.fill_orders([
+            npc.Order(player, 'Sword'),
+            npc.Order(player, 'Dagger'),
+            npc.Order(player, 'Rock'),
+            npc.Order(player, 'Sword', sell=True),
+            npc.Order(player, 'Sword', sell=True)])
+        self.assertEqual(bought, [items.Sword(), None, None, items.Sword(),
+                                  None])
+        self.assertEqual(player.gold, items.Sword().value)
+        self.assertEqual(player.inventory.count('Sword'), 0)
+        # Selling doesn't change what the trader offers.
+        self.assertIs(trader.find('Sword'), items.Sword())
+
+    def test_index_follows_inventory(self):
+        trader = npc.ItemTrader()
+        trader.inventory = [items.Dagger()]
+        self.assertIsNone(trader.find('Small Health Potion'))
+        self.assertIs(trader.find('Dagger'), items.Dagger())
+        trader.inventory = [items.Stone(), items.Sword(), items.Stone()]
+        self.assertIsNone(trader.find('Dagger'))
+        self.assertIs(trader.find('Stone'), items.Stone())
+
+    def test_players_trade_at_once(self):
+        trader = npc.WeaponTrader()
+        price = items.Dagger().value
+        players = [Player(out=output.NullSink()) for _ in range(8)]
+        for player in players:
+            player.gold = 100 * price
+
+        def trade(player):
+            for _ in range(100):
+                trader.fill_orders([npc.Order(player, 'Dagger'),
+                                    npc.Order(player, 'Dagger', sell=True),
+                                    npc.Order(player, 'Dagger')])
+                trader.inventory = [items.Sword(), items.Dagger()]
+
+        threads = [threading.Thread(target=trade, args=(player,))
+                   for player in players]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for player in players:
+            self.assertEqual(player.gold, 0)
+            self.assertEqual(player.inventory.count('Dagger'), 100)
+
+    def test_player_sells_through_the_trader(self):
+        orders = []
+
+        class CountingTrader(npc.WeaponTrader):
+            __slots__ = ()
+
+            def fill_orders(self, batch):
+                orders.extend(batch)
+                return super().fill_orders(batch)
+
+        sink = output.BufferSink()
+        player = Player(out=sink)
+        player.inventory = Inventory([items.Dagger()])
+        gold = player.gold
+        player.sell_item(CountingTrader(), 'Dagger')
+        self.assertEqual(orders, [npc.Order(player, 'Dagger', True)])
+        self.assertEqual(player.gold, gold + items.Dagger().value)
+        self.assertIn(b'You sold Dagger', sink.take())
@@ -0,0 +1,33 @@
+import contextlib
+import io
+import unittest
+from adventuregame import output
+
+
+class TestOutputSinks(unittest.TestCase):
+
+    def test_terminal_sink_writes_on_flush(self):
+        sink = output.TerminalSink()
+        with contextlib.redirect_stdout(io.StringIO()) as stdout:
+            sink.write("You have {} Gold", 15)
+            sink.write("Choose an action:")
+            self.assertEqual(stdout.getvalue(), '')
+            sink.flush()
+            sink.flush()
+        self.assertEqual(stdout.getvalue(),
+                         "You have 15 Gold\nChoose an action:\n")
+
+    def test_null_sink_does_not_format(self):
+        class Unprintable:
+            def __format__(self, spec):
+                raise AssertionError("The value was formatted.")
+
+        output.NullSink().write("{}", Unprintable())
+
+    def test_buffer_sink(self):
+        sink = output.BufferSink()
+        sink.write("{} has been defeated.", "Wolf")
+        sink.write("Grüße")
+        self.assertEqual(sink.take(),
+                         "Wolf has been defeated.\nGrüße\n".encode('utf-8'))
+        self.assertEqual(sink.take(), b'')
@@ -0,0 +1,106 @@
+import os
+import tempfile
+import unittest
+from adventuregame import enemies, output, scheduler, world
+from adventuregame.player import Player
+
+
+class TestPagedWorld(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(world.load_tiles)
+
+    def test_same_rooms_as_dense_world(self):
+        world.load_tiles()
+        dense = {(x, y): (type(world.tile_exists(x, y)),
+                          world.neighbours(x, y))
+                 for x in range(world.width) for y in range(world.height)}
+        start = world.starting_position
+
+        world.load_paged(region_size=3, max_regions=2)
+        self.assertEqual((world.width, world.height), (4, 8))
+        self.assertEqual(world.starting_position, start)
+        for (x, y), (room_type, mask) in dense.items():
+            self.assertIsInstance(world.tile_exists(x, y), room_type)
+            self.assertEqual(world.neighbours(x, y), mask)
+        self.assertLessEqual(len(world._pager._regions), 2)
+
+    def test_short_rows_are_padded_like_dense_world(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'map.txt')
+            with open(path, 'w') as f:
+                f.write('StartingRoom\tEmptyRoom\tEmptyRoom\tDaggerRoom\n'
+                        'EmptyRoom\n'
+                        '\tEmptyRoom\n'
+                        'OgreRoom\tEmptyRoom\tEmptyRoom\tCaveExit')
+            world.load_tiles(path)
+            dense = {(x, y): (type(world.tile_exists(x, y)),
+                              world.neighbours(x, y))
+                     for x in range(world.width) for y in range(world.height)}
+            for region_size in (1, 2, 3):
+                world.load_paged(path, region_size=region_size)
+                self.assertEqual((world.width, world.height), (4, 4))
+                for (x, y), (room_type, mask) in dense.items():
+                    self.assertIsInstance(world.tile_exists(x, y), room_type)
+                    self.assertEqual(world.neighbours(x, y), mask)
+
+    def test_start_is_the_last_starting_room_cell(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'map.txt')
+            with open(path, 'w') as f:
+                f.write('EmptyRoom\tStartingRoom\tEmptyRoom\n'
+                        'StartingRoom\tEmptyRoom\tCaveExit\n')
+            world.load_tiles(path)
+            start = world.starting_position
+            world.load_paged(path)
+            self.assertEqual(world.starting_position, start)
+            self.assertEqual(start, (0, 1))
+            # Only whole cells are found.
+            self.assertEqual(world._pager._find(b'Room'), (0, 0))
+            self.assertEqual(world._pager._find(b'CaveExit'), (2, 1))
+
+    def test_evicted_state_is_restored(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'map.txt')
+            with open(path, 'w') as f:
+                f.write('StartingRoom\tDaggerRoom\t\tOgreRoom\n'
+                        '\t\t\tEmptyRoom\n')
+            world.load_paged(path, region_size=2, max_regions=1)
+            world.tile_exists(1, 0).lootable = False
+            world.tile_exists(3, 0).enemy.hp = 7
+            world.tile_exists(1, 0)
+            self.assertFalse(world.tile_exists(1, 0).lootable)
+            self.assertEqual(world.tile_exists(3, 0).enemy.hp, 7)
+            self.assertEqual(world.neighbours(3, 0), world.SOUTH)
+            self.assertEqual(world.neighbours(0, 0), world.EAST)
+            # Rooms that are as they were loaded are not kept.
+            world.tile_exists(3, 0).enemy.hp = enemies.Ogre.max_hp
+            world.tile_exists(1, 0)
+            self.assertEqual(world._pager._saved, {})
+            self.assertEqual(world.tile_exists(3, 0).enemy.hp,
+                             enemies.Ogre.max_hp)
+            self.assertEqual(list(world._pager._saved), [(1, 0)])
+
+    def test_events_of_evicted_rooms_are_moved_to_the_new_rooms(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'map.txt')
+            with open(path, 'w') as f:
+                f.write('StartingRoom\tDaggerRoom\t\tOgreRoom\n'
+                        '\t\t\tEmptyRoom\n')
+            world.load_paged(path, region_size=2, max_regions=1)
+            world.scheduler = scheduler.TimingWheel()
+            old_room = world.tile_exists(1, 0)
+            old_room.modify_player(Player(out=output.NullSink()))
+            world.scheduler.advance(50)
+
+            world.tile_exists(3, 0)
+            self.assertEqual(world.scheduler.pending, 0)
+            world.scheduler.advance(100)
+            room = world.tile_exists(1, 0)
+            self.assertIsNot(room, old_room)
+            self.assertFalse(room.lootable)
+            world.scheduler.advance(room.restock_ticks - 151)
+            self.assertFalse(room.lootable)
+            world.scheduler.advance()
+            self.assertTrue(room.lootable)
+            self.assertFalse(old_room.lootable)
@@ -0,0 +1,60 @@
+import random
+import unittest
+from adventuregame import pathfinding, rooms, world
+
+
+class TestPathfindingMethods(unittest.TestCase):
+
+    def setUp(self):
+        world.load_tiles()
+        self.graph = pathfinding.world_graph()
+
+    def tearDown(self):
+        world.load_tiles()
+
+    def test_distance_fields(self):
+        self.assertEqual(self.graph.distance_to('CaveExit', 2, 4), 5)
+        self.assertEqual(self.graph.distance_to('TraderRoom', 2, 4), 2)
+        self.assertEqual(self.graph.distance_to('HealingRoom', 3, 5), 0)
+        self.assertEqual(self.graph.distance_to('CaveExit', 0, 0),
+                         pathfinding.UNREACHABLE)
+        path = self.graph.path_to('TraderRoom', 2, 4)
+        self.assertEqual((path[0], path[-1], len(path)), ((2, 4), (1, 5), 3))
+        self.assertEqual(self.graph.next_move('CaveExit', 2, 4).hotkey, 'n')
+
+    def test_positions_outside_the_world(self):
+        for x, y in ((-1, 4), (2, -1), (world.width, 4), (2, world.height)):
+            self.assertIsNone(self.graph.distance_to('CaveExit', x, y))
+            self.assertIsNone(self.graph.next_move('CaveExit', x, y))
+            self.assertIsNone(self.graph.path_to('CaveExit', x, y))
+            self.assertIsNone(self.graph.shortest_path((x, y), (2, 4)))
+
+    def test_shortest_path(self):
+        path = self.graph.shortest_path((2, 4), (3, 7))
+        self.assertEqual(path[0], (2, 4))
+        self.assertEqual(path[-1], (3, 7))
+        self.assertEqual(len(path) - 1, 4)
+        self.assertEqual(self.graph.distance((2, 4), (3, 0)), 5)
+        self.assertEqual(self.graph.distance((2, 4), (0, 0)),
+                         pathfinding.UNREACHABLE)
+
+    def test_graph_is_rebuilt_for_a_new_world(self):
+        world.load_tiles()
+        self.assertIsNot(pathfinding.world_graph(), self.graph)
+
+    def test_incremental_updates_match_a_new_graph(self):
+        generator = random.Random(0)
+        for _ in range(200):
+            x = generator.randrange(world.width)
+            y = generator.randrange(world.height)
+            if world.tile_exists(x, y) is None or generator.random() < 0.5:
+                room_class = generator.choice([rooms.EmptyRoom,
+                                               rooms.HealingRoom,
+                                               rooms.ItemRoom])
+                world.set_tile(x, y, room_class(x, y))
+            else:
+                world.set_tile(x, y, None)
+            fresh = pathfinding.WorldGraph()
+            for name in pathfinding.KEY_ROOMS:
+                self.assertEqual(self.graph.distance_field(name),
+                                 fresh.distance_field(name))
@@ -0,0 +1,41 @@
+import os
+import tempfile
+import unittest
+from adventuregame import game, output, recording, scheduler, world
+from adventuregame.player import Player
+
+
+class TestRecording(unittest.TestCase):
+
+    def setUp(self):
+        world.load_tiles()
+
+    def record(self, seed, lines):
+        """ Plays the lines like a user would and records them. """
+        rec = recording.Recording(seed)
+        player = Player(world.WorldOverlay(scheduler.TimingWheel()),
+                        output.NullSink(), seed,
+                        recording.Recorder(rec, recording._reader(lines)))
+        with self.assertRaises(EOFError):
+            game.run(player)
+        rec.result = recording.result_of(player)
+        return rec
+
+    def test_replay_matches_the_recording(self):
+        # Fleeing from the zombie goes to a random neighbour room.
+        lines = ['n', 'n', 'x', 'f', 'f', 'a', 'i', 's', 'n', 'f', 'a', 'a']
+        for seed in range(10):
+            rec = self.record(seed, lines)
+            self.assertEqual(rec.inputs, lines)
+            self.assertEqual(recording.replay(rec), rec.result)
+
+    def test_file_round_trip(self):
+        rec = self.record(3, ['s', 's', 'n', 'w', 'b', 'Large Potion', 't',
+                              ' Stone', 'e'])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'game.rec')
+            rec.dump(path)
+            loaded = recording.Recording.load(path)
+            self.assertEqual(recording.replay_files([path]), [])
+        self.assertEqual((loaded.seed, loaded.inputs, loaded.result),
+                         (rec.seed, rec.inputs, rec.result))
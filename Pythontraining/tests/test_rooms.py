@@ -0,0 +1,33 @@
+import unittest
+from adventuregame import actions, output, world
+from adventuregame.player import Player
+
+
+class TestRoomActions(unittest.TestCase):
+
+    def setUp(self):
+        world.load_tiles()
+
+    def test_actions_are_cached(self):
+        room = world.tile_exists(1, 5)
+        self.assertIs(room.available_actions(), room.available_actions())
+        self.assertEqual([action.hotkey for action in
+                          room.available_actions()],
+                         ['e', 'n', 's', 'i', 'b', 't'])
+        sell = room.action_for_hotkey('t')
+        self.assertIsInstance(sell, actions.Sell)
+        self.assertIs(sell.kwargs['trader'], room.trader)
+        self.assertIsNone(room.action_for_hotkey('a'))
+
+    def test_actions_change_when_enemy_dies(self):
+        room = world.tile_exists(2, 2)
+        self.assertEqual([action.hotkey for action in
+                          room.available_actions()], ['f', 'a', 'u'])
+        player = Player(out=output.NullSink())
+        attack = room.action_for_hotkey('a')
+        for _ in range(3):
+            player.do_action(attack, **attack.kwargs)
+        self.assertFalse(room.enemy.is_alive())
+        self.assertIsInstance(room.entry_text(), str)
+        self.assertEqual([action.hotkey for action in
+                          room.available_actions()], ['w', 'n', 's', 'i'])
@@ -0,0 +1,126 @@
+import os
+import tempfile
+import unittest
+from adventuregame import (items, output, savegame, scheduler, simulation,
+                           world)
+from adventuregame.player import Player
+
+
+class TestSavegame(unittest.TestCase):
+
+    def setUp(self):
+        world.load_tiles()
+        self.directory = tempfile.TemporaryDirectory()
+        self.snapshot = os.path.join(self.directory.name, 'game.sav')
+        self.journal = os.path.join(self.directory.name, 'game.journal')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def play(self, player, hotkeys, item_names=(), journal=None):
+        policy = simulation.ScriptedPolicy(hotkeys, item_names)
+        for _ in hotkeys:
+            player.world.trim()
+            player.world.tick()
+            room = player.world.tile_exists(player.location_x,
+                                            player.location_y)
+            room.modify_player(player)
+            simulation.take_action(player, room, policy)
+            if journal is not None:
+                journal.record(player, room)
+
+    def assertSameGame(self, first, second):
+        self.assertEqual(
+            (first.hp, first.gold, first.location_x, first.location_y,
+             first.victory, [item.name for item in first.inventory]),
+            (second.hp, second.gold, second.location_x, second.location_y,
+             second.victory, [item.name for item in second.inventory]))
+        first.world.trim()
+        second.world.trim()
+        self.assertEqual(
+            {position: room.save_state()
+             for position, room in first.world.rooms.items()},
+            {position: room.save_state()
+             for position, room in second.world.rooms.items()})
+
+    def test_snapshot_round_trip(self):
+        player = Player(world.WorldOverlay(), output.NullSink())
+        self.play(player, 'ssnwbn', ['Sword'])
+        player.inventory.append(items.Gold(7))
+        restored = savegame.loads(savegame.dumps(player), output.NullSink())
+        self.assertSameGame(player, restored)
+        self.assertIs(restored.inventory.find('Gold'), items.Gold(7))
+        self.assertFalse(restored.world.tile_exists(2, 6).lootable)
+        self.assertTrue(world.tile_exists(2, 6).lootable)
+
+    def test_resume_replays_the_journal(self):
+        player = Player(world.WorldOverlay(), output.NullSink())
+        with savegame.Journal(self.journal) as journal:
+            self.play(player, 'ss', journal=journal)
+            journal.checkpoint(player, self.snapshot)
+            self.play(player, 'nwbennnan', ['Sword'], journal)
+        self.assertEqual(player.world.tile_exists(2, 2).enemy.hp, -10)
+        self.assertEqual(player.location_y, 1)
+
+        restored = savegame.resume(self.snapshot, self.journal,
+                                   output.NullSink())
+        self.assertSameGame(player, restored)
+
+    def test_resume_keeps_the_events_and_the_random_state(self):
+        player = Player(world.WorldOverlay(scheduler.TimingWheel()),
+                        output.NullSink(), seed=3)
+        with savegame.Journal(self.journal) as journal:
+            journal.checkpoint(player, self.snapshot)
+            # The dagger at (2, 6) is picked up in the third turn.
+            self.play(player, 'ss', journal=journal)
+            player.random.random()
+            self.play(player, 'n', journal=journal)
+        restored = savegame.resume(self.snapshot, self.journal)
+        self.assertSameGame(player, restored)
+        self.assertEqual(restored.random.getstate(), player.random.getstate())
+        self.assertEqual(restored.world.save_events(),
+                         player.world.save_events())
+
+        room = restored.world.tile_exists(2, 6)
+        self.assertFalse(room.lootable)
+        restored.world.tick(room.restock_ticks)
+        self.assertTrue(room.lootable)
+
+        restored = savegame.loads(savegame.dumps(player))
+        self.assertEqual(restored.world.save_events(),
+                         player.world.save_events())
+
+    def test_cut_off_record_is_ignored(self):
+        player = Player(world.WorldOverlay(), output.NullSink())
+        savegame.save(player, self.snapshot)
+        with savegame.Journal(self.journal) as journal:
+            self.play(player, 'ss', journal=journal)
+        with open(self.journal, 'ab') as f:
+            f.write(b'\x40\0\0\0\1\2')
+        restored = savegame.resume(self.snapshot, self.journal)
+        self.assertSameGame(player, restored)
+
+    def test_not_a_snapshot(self):
+        with self.assertRaises(savegame.SaveFormatError):
+            savegame.loads(b'AGMP\1\0')
+
+    def test_crash_during_checkpoint_skips_old_records(self):
+        player = Player(world.WorldOverlay(), output.NullSink())
+        with savegame.Journal(self.journal) as journal:
+            self.play(player, 'ss', journal=journal)
+            journal.checkpoint(player, self.snapshot)
+            self.play(player, 'nwbe', ['Sword'], journal)
+            journal.flush()
+            # The snapshot of the next checkpoint is written, but the crash
+            # comes before the journal is emptied.
+            self.play(player, 'nn')
+            savegame.save(player, self.snapshot, journal.generation + 1)
+        restored = savegame.resume(self.snapshot, self.journal)
+        self.assertSameGame(player, restored)
+
+        generation = savegame.snapshot_generation(self.snapshot)
+        with savegame.Journal(self.journal, generation) as journal:
+            self.assertEqual(journal.generation, 2)
+            self.play(restored, 'a', journal=journal)
+        self.assertSameGame(restored,
+                            savegame.resume(self.snapshot, self.journal))
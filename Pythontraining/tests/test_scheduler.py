@@ -0,0 +1,97 @@
+import random
+import unittest
+from adventuregame import (enemies, items, output, rooms, savegame,
+                           scheduler, world)
+from adventuregame.player import Player
+
+
+class TestScheduler(unittest.TestCase):
+
+    def test_events_fire_at_their_tick(self):
+        # A small wheel, so many delays are beyond its horizon of 16 ticks.
+        wheel = scheduler.TimingWheel(slots=4, levels=2)
+        choices = random.Random(3)
+        fired = []
+        expected = []
+        for _ in range(500):
+            delay = choices.randint(1, 100)
+            wheel.schedule(delay, lambda due: fired.append((wheel.now, due)),
+                           delay)
+            expected.append((delay, delay))
+        self.assertEqual(wheel.pending, 500)
+        called = sum(wheel.advance() for _ in range(100))
+        self.assertEqual(called, 500)
+        self.assertEqual(wheel.pending, 0)
+        self.assertEqual(sorted(fired), sorted(expected))
+
+    def test_cancel_and_reschedule(self):
+        wheel = scheduler.TimingWheel(slots=4, levels=2)
+        fired = []
+        event = wheel.schedule(5, fired.append, 'cancelled')
+
+        def again(count):
+            fired.append(wheel.now)
+            if count:
+                wheel.schedule(20, again, count - 1)
+
+        wheel.schedule(3, again, 2)
+        wheel.cancel(event)
+        wheel.advance(100)
+        self.assertEqual(fired, [3, 23, 43])
+        self.assertEqual(wheel.pending, 0)
+
+    def test_enemy_regenerates_and_respawns(self):
+        overlay = world.WorldOverlay(scheduler.TimingWheel())
+        player = Player(overlay, output.NullSink())
+        player.hp = 1000
+        room = rooms.EnemyRoom(0, 0, enemies.Ogre())
+        room.enemy.hp -= 12
+        room.modify_player(player)
+        overlay.scheduler.advance(room.regeneration_ticks)
+        self.assertEqual(room.enemy.hp,
+                         enemies.Ogre.max_hp - 12 + room.regeneration_hp)
+        room.enemy.hp = 0
+        overlay.scheduler.advance(room.regeneration_ticks
+                                  + room.respawn_ticks)
+        self.assertEqual(room.enemy.hp, enemies.Ogre.max_hp)
+        self.assertEqual(overlay.scheduler.pending, 0)
+
+    def test_loot_restock(self):
+        overlay = world.WorldOverlay(scheduler.TimingWheel())
+        player = Player(overlay, output.NullSink())
+        loot = rooms.LootRoom(0, 0, items.Dagger())
+        loot.modify_player(player)
+        self.assertFalse(loot.lootable)
+        overlay.scheduler.advance(loot.restock_ticks)
+        self.assertTrue(loot.lootable)
+
+    def test_events_move_with_a_snapshot(self):
+        world.load_tiles()
+        player = Player(world.WorldOverlay(scheduler.TimingWheel()),
+                        output.NullSink())
+        room = player.world.tile_exists(2, 6)
+        room.modify_player(player)
+        player.world.scheduler.advance(50)
+        events = player.world.save_events()
+        self.assertEqual(events, [(2, 6, '_restock', room.restock_ticks - 50)])
+
+        restored = savegame.loads(savegame.dumps(player))
+        self.assertEqual(restored.world.save_events(), events)
+        room = restored.world.tile_exists(2, 6)
+        restored.world.scheduler.advance(room.restock_ticks - 51)
+        self.assertFalse(room.lootable)
+        restored.world.scheduler.advance()
+        self.assertTrue(room.lootable)
+
+    def test_loading_a_map_drops_the_scheduler(self):
+        world.scheduler = scheduler.TimingWheel()
+        world.load_tiles()
+        self.assertIsNone(world.scheduler)
+
+    def test_world_without_scheduler_does_not_tick(self):
+        player = Player(world.WorldOverlay(), output.NullSink())
+        room = rooms.LootRoom(0, 0, items.Dagger())
+        room.modify_player(player)
+        player.world.tick()
+        self.assertIsNone(room._event)
+        self.assertFalse(room.lootable)
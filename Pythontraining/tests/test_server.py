@@ -0,0 +1,79 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from adventuregame import recording, server, world
+
+WINNING_LINES = 's s n w b Sword e n n n a n a n a a e'.split()
+
+
+class TestGameServer(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        world.load_tiles()
+        self.server = await server.GameServer(read_timeout=5).start()
+
+    async def asyncTearDown(self):
+        await self.server.close()
+
+    async def play(self, reader, writer, lines):
+        writer.write(''.join(line + '\n' for line in lines).encode())
+        writer.write_eof()
+        output = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+        return output.decode()
+
+    async def test_sessions_play_concurrently(self):
+        connections = [await asyncio.open_connection('127.0.0.1',
+                                                     self.server.port)
+                       for _ in range(2)]
+        await asyncio.sleep(0.1)
+        self.assertEqual(self.server.active_sessions, 2)
+        first = await self.play(*connections[0], WINNING_LINES)
+        self.assertIn("You bought Sword", first)
+        self.assertTrue(first.rstrip().endswith(
+            "You find an exit to the cave. Be happy."))
+
+        # The second player doesn't see the changes of the first one.
+        self.assertTrue(world.tile_exists(2, 2).enemy.is_alive())
+        second = await self.play(*connections[1], ['x', 'i'])
+        self.assertIn("This is not a valid action.", second)
+        self.assertIn("You have 15 Gold", second)
+        self.assertEqual(self.server.finished_sessions, 2)
+        self.assertEqual(self.server.turns, 17)
+
+    async def test_unix_socket_and_read_timeout(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'game.sock')
+            unix_server = server.GameServer(read_timeout=0.1)
+            await unix_server.start(path=path)
+            reader, writer = await asyncio.open_unix_connection(path)
+            output = await asyncio.wait_for(reader.read(), 5)
+            writer.close()
+            await unix_server.close()
+        self.assertTrue(output.decode().endswith("Action: "))
+        self.assertEqual(unix_server.finished_sessions, 1)
+
+    async def test_line_over_limit_ends_session(self):
+        limited = await server.GameServer(read_timeout=5,
+                                          line_limit=16).start()
+        reader, writer = await asyncio.open_connection('127.0.0.1',
+                                                       limited.port)
+        output = await self.play(reader, writer, ['n' * 100])
+        await limited.close()
+        self.assertTrue(output.endswith("Action: "))
+        self.assertEqual(limited.finished_sessions, 1)
+
+    async def test_recorded_session_replays(self):
+        with tempfile.TemporaryDirectory() as directory:
+            recorder = await server.GameServer(
+                read_timeout=5, record_directory=directory).start()
+            reader, writer = await asyncio.open_connection('127.0.0.1',
+                                                           recorder.port)
+            await self.play(reader, writer, ['x'] + WINNING_LINES)
+            await recorder.close()
+            path = os.path.join(directory, 'session-1.rec')
+            rec = recording.Recording.load(path)
+            self.assertEqual(rec.inputs, ['x'] + WINNING_LINES)
+            self.assertTrue(rec.result.victory)
+            self.assertEqual(recording.replay_files([path]), [])
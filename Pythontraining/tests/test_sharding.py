@@ -0,0 +1,61 @@
+import random
+import unittest
+from adventuregame import recording, sharding, world
+
+
+class TestSharding(unittest.TestCase):
+
+    def setUp(self):
+        world.load_tiles()
+
+    def test_player_is_handed_off_at_the_border(self):
+        # The map has 8 rows, the start in row 4 belongs to the second band.
+        shards = [sharding.Shard(0, 2), sharding.Shard(1, 2)]
+        kind, session, owner, text, *handoff = shards[0].handle(
+            ('start', 7, 1))
+        self.assertEqual((kind, owner), ('handoff', 1))
+        self.assertIn(b'cave', text)
+        self.assertEqual(shards[0].sessions, {})
+
+        kind, session, text = shards[1].handle(('adopt', 7, *handoff))
+        self.assertEqual(kind, 'prompt')
+        self.assertTrue(text.endswith(b'Action: '))
+        kind, session, owner, text, *handoff = shards[1].handle(
+            ('input', 7, 'n'))
+        self.assertEqual((kind, owner), ('handoff', 0))
+        kind, session, text = shards[0].handle(('adopt', 7, *handoff))
+        self.assertEqual(kind, 'prompt')
+        self.assertEqual(shards[0].sessions[7].turns, 1)
+        self.assertEqual(shards[0].sessions[7].player.location_y, 3)
+
+    def test_coordinator_plays_like_one_process(self):
+        lines = ['n', 's', 'e', 'w', 'a', 'f', 'i', 'u', 'b', 't', 'Sword',
+                 'Stone', 'Dagger', 'x']
+        choices = random.Random(5)
+        with sharding.Coordinator(shards=2) as coordinator:
+            replies = coordinator.start_many(range(6))
+            inputs = {session: [] for session in replies}
+            for _ in range(120):
+                running = [session for session, (text, result)
+                           in replies.items() if result is None]
+                if not running:
+                    break
+                messages = []
+                for session in running:
+                    line = choices.choice(lines)
+                    inputs[session].append(line)
+                    messages.append(('input', session, line))
+                replies.update(coordinator.play(messages))
+            self.assertEqual(coordinator.owners.keys(),
+                             {session for session, (text, result)
+                              in replies.items() if result is None})
+
+        for seed, session in enumerate(sorted(inputs)):
+            text, result = replies[session]
+            expected = recording.replay(
+                recording.Recording(seed, inputs[session]))
+            if result is not None:
+                self.assertEqual(result, expected)
+            else:
+                self.assertFalse(expected.victory)
+                self.assertGreater(expected.hp, 0)
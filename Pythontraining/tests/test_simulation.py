@@ -0,0 +1,40 @@
+import unittest
+from adventuregame import output, simulation, world
+from adventuregame.player import Player
+
+
+class TestSimulation(unittest.TestCase):
+
+    def setUp(self):
+        world.load_tiles()
+
+    def test_scripted_playthrough_reaches_exit(self):
+        # Collect the gold, buy the sword and fight north to the exit.
+        policy = simulation.ScriptedPolicy('ssnwbennnananaae', ['Sword'])
+        outcome = simulation.play_headless(policy)
+        self.assertTrue(outcome.victory)
+        self.assertIsNone(outcome.death_room)
+
+    def test_scripted_trade(self):
+        player = Player(out=output.BufferSink())
+        player.location_x, player.location_y = 1, 5
+        room = world.tile_exists(1, 5)
+        policy = simulation.ScriptedPolicy('b', ['Dagger'])
+        simulation.take_action(player, room, policy)
+        self.assertEqual(player.out.take(), b'You bought Dagger\n')
+        self.assertEqual(player.gold, 5)
+        self.assertEqual([i.name for i in player.inventory],
+                         ['Stone', 'Dagger'])
+
+    def test_travel_policy_takes_the_shortest_way(self):
+        # With nothing but the stone the Ogre in front of the exit wins.
+        outcome = simulation.play_headless(simulation.TravelPolicy(seed=0))
+        self.assertEqual(outcome.death_room, 'OgreRoom')
+
+    def test_batch_is_reproducible(self):
+        first = simulation.run_batch(runs=20, processes=1, max_turns=200)
+        second = simulation.run_batch(runs=20, processes=2, max_turns=200)
+        self.assertEqual(first.runs, 20)
+        self.assertEqual(first.wins, second.wins)
+        self.assertEqual(first.turns, second.turns)
+        self.assertEqual(first.deaths, second.deaths)
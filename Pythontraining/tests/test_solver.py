@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+from adventuregame import simulation, solver, world
+
+
+class TestSolver(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Fleeing from the wolf leads to the exit or back to the start.
+        cls.directory = tempfile.TemporaryDirectory()
+        path = os.path.join(cls.directory.name, 'map.txt')
+        with open(path, 'w') as f:
+            f.write('StartingRoom\tWolfRoom\tCaveExit\n')
+        cls.path = path
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+        world.load_tiles()
+
+    def setUp(self):
+        world.load_tiles(self.path)
+
+    def test_win_probability_is_exact(self):
+        game_solver = solver.Solver()
+        self.assertEqual(game_solver.solve(2), 0.0)
+        self.assertEqual(game_solver.solve(3), 0.5)
+        self.assertEqual(game_solver.solve(5), 0.75)
+        self.assertEqual(game_solver.solve(6), 0.75)
+        # Four hits with the stone kill the wolf.
+        self.assertEqual(game_solver.solve(7), 1.0)
+
+    def test_policy_plays_the_best_actions(self):
+        game_solver = solver.Solver()
+        report = simulation.BatchReport()
+        for seed in range(400):
+            report.add(simulation.play_headless(
+                game_solver.policy(5), max_turns=5, seed=seed, ticks=False))
+        self.assertAlmostEqual(report.win_rate, 0.75, delta=0.07)
+
+    def test_policy_refuses_a_world_that_ticks(self):
+        game_solver = solver.Solver()
+        with self.assertRaises(ValueError):
+            simulation.play_headless(game_solver.policy(5), max_turns=5)
+
+    def test_small_table_gives_the_same_result(self):
+        game_solver = solver.Solver(table_size=8)
+        self.assertEqual(game_solver.solve(9), solver.Solver().solve(9))
+        self.assertLessEqual(len(game_solver.table), 8)
@@ -0,0 +1,78 @@
+import random
+import unittest
+from adventuregame import output, world
+from adventuregame.player import Player
+
+try:
+    import numpy
+    from adventuregame import vecenv
+except ImportError:
+    numpy = None
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestVecEnv(unittest.TestCase):
+
+    def setUp(self):
+        world.load_tiles()
+
+    def test_steps_match_the_players(self):
+        games = 30
+        env = vecenv.VecEnv(games, seed=1)
+        players = []
+        for _ in range(games):
+            player = Player(world.WorldOverlay(), output.NullSink())
+            player.world.tile_exists(player.location_x,
+                                     player.location_y).modify_player(player)
+            players.append(player)
+
+        # Fleeing is random, so the games only choose the other actions.
+        choices = random.Random(2)
+        for _ in range(150):
+            offered = env.action_mask()
+            codes = numpy.zeros(games, numpy.int64)
+            for i, player in enumerate(players):
+                room = player.world.tile_exists(player.location_x,
+                                                player.location_y)
+                hotkeys = {action.hotkey for action in
+                           room.available_actions()} & set(vecenv.HOTKEYS)
+                self.assertEqual({vecenv.HOTKEYS[code] for code in
+                                  numpy.flatnonzero(offered[i])}, hotkeys)
+                if env.done[i]:
+                    continue
+                code = choices.choice([code for code in
+                                       numpy.flatnonzero(offered[i])
+                                       if code != vecenv.FLEE])
+                codes[i] = code
+                action = room.action_for_hotkey(vecenv.HOTKEYS[code])
+                player.do_action(action, **action.kwargs)
+                player.world.tile_exists(
+                    player.location_x, player.location_y).modify_player(player)
+            env.step(codes)
+
+            for i, player in enumerate(players):
+                self.assertEqual(
+                    (env.hp[i], env.gold[i], env.victory[i],
+                     env.position[i] % world.width,
+                     env.position[i] // world.width,
+                     env.weapon[i]),
+                    (player.hp, player.gold, player.victory,
+                     player.location_x, player.location_y,
+                     player.inventory.best_weapon().damage))
+                self.assertEqual(env.done[i],
+                                 not player.is_alive() or player.victory)
+
+    def test_flee_moves_to_a_neighbour(self):
+        env = vecenv.VecEnv(50, seed=3)
+        # (2, 2) is a ZombieRoom with rooms in the west, north and south.
+        env.position[:] = 2 * world.width + 2
+        env.step(numpy.full(50, vecenv.FLEE))
+        neighbours = {2 * world.width + 1, 1 * world.width + 2,
+                      3 * world.width + 2}
+        self.assertLessEqual(set(env.position.tolist()), neighbours)
+
+    def test_random_games_end(self):
+        env = vecenv.VecEnv(100, seed=4)
+        turns = vecenv.play_random(env, max_turns=5000)
+        self.assertGreater(turns, 0)
+        self.assertTrue(env.done.all())
@@ -1,10 +1,78 @@
+import os
+import tempfile
 import unittest
-from adventuregame import world, rooms
+from adventuregame import melee, rooms, scheduler, world
 
 
 class TestWorldMethods(unittest.TestCase):
 
     def test_starting_position(self):
         world.load_tiles()
-        print(world.tile_exists(2, 4))
-        self.assertEqual(world.tile_exists(2, 4), rooms.StartingRoom)
+        self.assertIsInstance(world.tile_exists(2, 4), rooms.StartingRoom)
+        self.assertEqual(world.starting_position, (2, 4))
+
+    def test_neighbours(self):
+        world.load_tiles()
+        self.assertEqual(world.neighbours(2, 4),
+                         world.WEST | world.NORTH | world.SOUTH)
+        self.assertEqual([move.hotkey for move in
+                          world.tile_exists(2, 4).adjacent_moves()],
+                         ['w', 'n', 's'])
+        self.assertEqual(world.neighbours(-1, 0), 0)
+        self.assertIsNone(world.tile_exists(4, 0))
+        self.assertIsNone(world.tile_exists(0, 0))
+
+    def test_unknown_room_type(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'map.txt')
+            with open(path, 'w') as f:
+                f.write('StartingRoom\tEmptyRoom\n\tDragonRoom\n')
+            with self.assertRaises(rooms.UnknownRoomError) as context:
+                world.load_tiles(path)
+            self.assertEqual((context.exception.line,
+                              context.exception.column), (2, 2))
+            # Base classes of rooms are not room types of the map.
+            with open(path, 'w') as f:
+                f.write('StartingRoom\tEnemyRoom\n')
+            with self.assertRaises(rooms.UnknownRoomError) as context:
+                world.load_tiles(path)
+            self.assertEqual((context.exception.line,
+                              context.exception.column), (1, 2))
+        world.load_tiles()
+
+    def test_failed_load_keeps_the_world(self):
+        world.load_tiles()
+        wheel, arena = scheduler.TimingWheel(), melee.Arena()
+        world.scheduler, world.arena = wheel, arena
+        generation = world.generation
+        room = world.tile_exists(2, 4)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'map.txt')
+            with open(path, 'w') as f:
+                f.write('StartingRoom\tDragonRoom\n')
+            with self.assertRaises(rooms.UnknownRoomError):
+                world.load_tiles(path)
+            with self.assertRaises(OSError):
+                world.load_tiles(os.path.join(directory, 'missing.txt'))
+        self.assertEqual(world.generation, generation)
+        self.assertIs(world.scheduler, wheel)
+        self.assertIs(world.arena, arena)
+        self.assertIs(world.tile_exists(2, 4), room)
+        self.assertEqual(world.starting_position, (2, 4))
+        world.load_tiles()
+
+    def test_overlays_are_independent(self):
+        world.load_tiles()
+        first, second = world.WorldOverlay(), world.WorldOverlay()
+        self.assertIs(first.tile_exists(2, 4), world.tile_exists(2, 4))
+
+        first.tile_exists(0, 3).lootable = False
+        first.tile_exists(2, 2).enemy.hp = 3
+        first.tile_exists(1, 3)
+        first.trim()
+        self.assertEqual(sorted(first.rooms), [(0, 3), (2, 2)])
+        self.assertTrue(second.tile_exists(0, 3).lootable)
+        self.assertEqual(second.tile_exists(2, 2).enemy.hp, 15)
+        self.assertTrue(world.tile_exists(0, 3).lootable)
+        second.trim()
+        self.assertEqual(second.rooms, {})